@@ -13,6 +13,13 @@ if ('serviceWorker' in navigator) {
                 console.log('Service Worker registration failed:', error);
             });
     });
+
+    // Nouvel instantané du screener trouvé par le service worker en arrière-plan
+    navigator.serviceWorker.addEventListener('message', event => {
+        if (event.data && event.data.type === 'snapshot') {
+            loadLatestSnapshot(event.data.manifest);
+        }
+    });
 }
 
 // PWA Install Prompt
@@ -71,6 +78,8 @@ window.addEventListener('appinstalled', () => {
 
 const appState = {
     screeningResults: [],
+    snapshotVersion: null,
+    liveScreening: false,
     backtestResults: {},
     settings: {},
     theme: localStorage.getItem('theme') || 'dark'
@@ -227,13 +236,13 @@ function getScreeningParams() {
 }
 
 async function handleScreening() {
-    showLoading();
+    // Pas d'overlay bloquant : l'avancement du job s'affiche dans la carte des résultats
+    elements.startScreening.disabled = true;
+    appState.liveScreening = true;
 
     try {
         const params = getScreeningParams();
 
-        // Simulate API call - In production, this would call a real API
-        // For demonstration, we'll create mock data
         await simulateScreening(params);
 
         displayScreeningResults();
@@ -242,38 +251,99 @@ async function handleScreening() {
         console.error('Screening error:', error);
         showToast('Erreur', 'Une erreur est survenue lors du screening', 'error');
     } finally {
-        hideLoading();
+        elements.startScreening.disabled = false;
+    }
+}
+
+function displayScreeningProgress(job) {
+    const total = job.total ? `/${job.total}` : '';
+    elements.resultsCount.textContent =
+        `Screening en cours : ${job.checked}${total} symboles vérifiés, ${job.survivors} retenus (${job.elapsed} s)`;
+    elements.screeningResults.style.display = 'block';
+}
+
+function followScreeningJob(jobId, onProgress) {
+    // Suit l'avancement d'un screening en arrière-plan (Server-Sent Events)
+    return new Promise((resolve, reject) => {
+        const source = new EventSource(`/api/screener/jobs/${jobId}/events`);
+        source.addEventListener('progress', event => onProgress(JSON.parse(event.data)));
+        source.addEventListener('done', event => {
+            source.close();
+            onProgress(JSON.parse(event.data));
+            resolve();
+        });
+        source.addEventListener('error', event => {
+            source.close();
+            reject(new Error(event.data ? JSON.parse(event.data).error : 'Connexion au serveur perdue'));
+        });
+    });
+}
+
+async function readNdjson(response, onLine) {
+    // Lit une réponse NDJSON ligne par ligne au fur et à mesure de sa réception
+    const reader = response.body.getReader();
+    const decoder = new TextDecoder();
+    let buffer = '';
+
+    while (true) {
+        const { value, done } = await reader.read();
+        buffer += decoder.decode(value || new Uint8Array(), { stream: !done });
+        const lines = buffer.split('\n');
+        buffer = lines.pop();
+        lines.filter(line => line.trim()).forEach(line => onLine(JSON.parse(line)));
+        if (done) {
+            break;
+        }
     }
 }
 
+function matchesScreeningParams(item, params) {
+    return item.price >= params.priceMin &&
+        item.price <= params.priceMax &&
+        item.volume >= params.volumeMin &&
+        item.change >= params.changeMin &&
+        item.relativeVolume >= params.relativeVolumeMin;
+}
+
 async function simulateScreening(params) {
     try {
         console.log("Appel du screener sur le serveur...");
 
-        // Appel à notre nouveau serveur intelligent
-        // Cela va déclencher l'exécution du script Python generate_data.py
-        const response = await fetch('/api/screener');
+        // Appel à notre nouveau serveur intelligent : le dernier screening s'il est récent,
+        // sinon generate_data.py tourne en arrière-plan et chaque action retenue arrive
+        // dès que son VWAP est vérifié
+        const response = await fetch('/api/screener/stream');
 
         if (!response.ok) {
             throw new Error(`Erreur serveur: ${response.status}`);
         }
 
-        let results = await response.json();
-
-        if (results.error) {
-            throw new Error(results.error);
-        }
-
-        console.log(`${results.length} résultats reçus du serveur.`);
-
-        // Filtrage côté client pour affiner si besoin
-        appState.screeningResults = results.filter(item => {
-            return item.price >= params.priceMin &&
-                item.price <= params.priceMax &&
-                item.volume >= params.volumeMin &&
-                item.change >= params.changeMin &&
-                item.relativeVolume >= params.relativeVolumeMin;
+        const jobId = response.headers.get('X-Screener-Job');
+        const progress = jobId
+            ? followScreeningJob(jobId, displayScreeningProgress).catch(error => console.warn(error))
+            : Promise.resolve();
+
+        appState.screeningResults = [];
+        renderScreeningTable();
+        let received = 0;
+
+        await readNdjson(response, item => {
+            if (item.error) {
+                throw new Error(item.error);
+            }
+            if (item.done) {
+                return;
+            }
+            received += 1;
+            // Filtrage côté client pour affiner si besoin
+            if (matchesScreeningParams(item, params)) {
+                appState.screeningResults.push(item);
+                appendScreeningRow(item);
+            }
         });
+        await progress;
+
+        console.log(`${received} résultats reçus du serveur.`);
 
     } catch (error) {
         console.error('Erreur lors du screening:', error);
@@ -294,6 +364,40 @@ async function simulateScreening(params) {
     }
 }
 
+async function loadLatestSnapshot(manifest = null) {
+    // Dernier instantané publié par le serveur, affiché dès l'ouverture (servi par le
+    // service worker depuis son cache) ; un screening lancé entre-temps reste affiché
+    try {
+        if (!manifest) {
+            const response = await fetch('/snapshots/latest.json');
+            if (!response.ok) {
+                return;
+            }
+            manifest = await response.json();
+        }
+        if (appState.liveScreening || manifest.version === appState.snapshotVersion) {
+            return;
+        }
+        const response = await fetch(`/snapshots/${manifest.file}`);
+        if (!response.ok) {
+            return;
+        }
+        const snapshot = await response.json();
+        if (appState.liveScreening) {
+            return;
+        }
+        const params = getScreeningParams();
+        appState.snapshotVersion = snapshot.version;
+        appState.screeningResults = snapshot.results.filter(item => matchesScreeningParams(item, params));
+        renderScreeningTable();
+        const created = new Date(snapshot.created).toLocaleString('fr-FR');
+        elements.resultsCount.textContent =
+            `${appState.screeningResults.length} tickers candidats (dernier screening du ${created})`;
+    } catch (error) {
+        console.log('Aucun instantané du screener disponible:', error);
+    }
+}
+
 function displayScreeningResults() {
     if (appState.screeningResults.length === 0) {
         elements.screeningResults.style.display = 'none';
@@ -302,7 +406,24 @@ function displayScreeningResults() {
     }
 
     elements.resultsCount.textContent = `${appState.screeningResults.length} tickers candidats trouvés après screening`;
+    renderScreeningTable();
+}
 
+function screeningRowHTML(result) {
+    return `
+        <tr>
+            <td><strong>${result.ticker}</strong></td>
+            <td>$${result.price}</td>
+            <td>${formatNumber(result.volume)}</td>
+            <td style="color: ${result.change >= 0 ? 'var(--success-color)' : 'var(--danger-color)'}">
+                ${result.change >= 0 ? '+' : ''}${result.change}%
+            </td>
+            <td>${result.relativeVolume}</td>
+        </tr>
+    `;
+}
+
+function renderScreeningTable() {
     const tableHTML = `
         <table>
             <thead>
@@ -315,17 +436,7 @@ function displayScreeningResults() {
                 </tr>
             </thead>
             <tbody>
-                ${appState.screeningResults.map(result => `
-                    <tr>
-                        <td><strong>${result.ticker}</strong></td>
-                        <td>$${result.price}</td>
-                        <td>${formatNumber(result.volume)}</td>
-                        <td style="color: ${result.change >= 0 ? 'var(--success-color)' : 'var(--danger-color)'}">
-                            ${result.change >= 0 ? '+' : ''}${result.change}%
-                        </td>
-                        <td>${result.relativeVolume}</td>
-                    </tr>
-                `).join('')}
+                ${appState.screeningResults.map(screeningRowHTML).join('')}
             </tbody>
         </table>
     `;
@@ -334,6 +445,12 @@ function displayScreeningResults() {
     elements.screeningResults.style.display = 'block';
 }
 
+function appendScreeningRow(result) {
+    // Ajout d'une ligne sans reconstruire le tableau pendant la réception du flux
+    elements.resultsTable.querySelector('tbody').insertAdjacentHTML('beforeend', screeningRowHTML(result));
+    elements.screeningResults.style.display = 'block';
+}
+
 // ========================
 // Backtest Functions
 // ========================
@@ -390,35 +507,46 @@ async function handleBacktest() {
         const backtestParams = getBacktestParams();
         const strategySettings = getStrategySettings();
 
-        // Simulate backtest - In production, this would call a real API
-        await simulateBacktest(backtestParams, strategySettings);
+        await runBacktest(backtestParams, strategySettings);
 
         displayBacktestResults();
         showToast('Succès', 'Backtest terminé avec succès!', 'success');
     } catch (error) {
         console.error('Backtest error:', error);
-        showToast('Erreur', 'Une erreur est survenue lors du backtest', 'error');
+        showToast('Erreur', `Une erreur est survenue lors du backtest : ${error.message}`, 'error');
     } finally {
         hideLoading();
     }
 }
 
-async function simulateBacktest(params, settings) {
-    // Simulate API delay
-    await new Promise(resolve => setTimeout(resolve, 3000));
-
-    // Generate mock backtest results
-    const totalTrades = Math.floor(Math.random() * 50 + 10);
-    const winningTrades = Math.floor(totalTrades * (Math.random() * 0.4 + 0.4)); // 40-80% win rate
+async function runBacktest(params, settings) {
+    // Backtest réel : le serveur rejoue la stratégie sur les barres 5m de chaque ticker retenu
+    const response = await fetch('/api/backtest', {
+        method: 'POST',
+        headers: { 'Content-Type': 'application/json' },
+        body: JSON.stringify({
+            tickers: appState.screeningResults.map(result => result.ticker),
+            backtest: params,
+            strategy: settings
+        })
+    });
+    const data = await response.json();
+    if (!response.ok || data.error) {
+        throw new Error(data.error || `HTTP ${response.status}`);
+    }
 
+    const summary = data.summary;
     appState.backtestResults = {
-        trades: totalTrades,
-        winrate: ((winningTrades / totalTrades) * 100).toFixed(2),
-        avgWin: (Math.random() * 100 + 50).toFixed(2),
-        avgLoss: -(Math.random() * 50 + 20).toFixed(2),
-        totalPnl: (Math.random() * 5000 - 1000).toFixed(2),
-        totalPnlPct: (Math.random() * 50 - 10).toFixed(2),
-        maxDrawdown: -(Math.random() * 20 + 5).toFixed(2)
+        trades: summary.trades,
+        winrate: summary['winrate_%'],
+        avgWin: summary['avg_win_$'] ?? 0,
+        avgLoss: summary['avg_loss_$'] ?? 0,
+        totalPnl: summary['total_pnl_$'] ?? 0,
+        totalPnlPct: summary['total_pnl_%'],
+        maxDrawdown: summary['max_drawdown_%'],
+        equity: data.equity,
+        tickers: data.tickers,
+        errors: data.errors
     };
 }
 
@@ -458,19 +586,14 @@ function displayBacktestResults() {
 
     elements.backtestMetrics.innerHTML = metricsHTML;
 
-    // Create mock chart placeholders
     const chartsHTML = `
         <div class="chart-wrapper">
             <h3 style="margin-bottom: 1rem; color: var(--text-primary);">Courbe de capital</h3>
-            <div style="height: 300px; display: flex; align-items: center; justify-content: center; background: var(--bg-secondary); border-radius: var(--radius-sm);">
-                <p style="color: var(--text-muted);">Graphique de la courbe de capital</p>
-            </div>
+            ${equityChartHTML(results.equity)}
         </div>
         <div class="chart-wrapper">
-            <h3 style="margin-bottom: 1rem; color: var(--text-primary);">Distribution des trades</h3>
-            <div style="height: 300px; display: flex; align-items: center; justify-content: center; background: var(--bg-secondary); border-radius: var(--radius-sm);">
-                <p style="color: var(--text-muted);">Graphique de distribution</p>
-            </div>
+            <h3 style="margin-bottom: 1rem; color: var(--text-primary);">Résultats par ticker</h3>
+            ${tickerResultsHTML(results.tickers, results.errors)}
         </div>
     `;
 
@@ -478,6 +601,69 @@ function displayBacktestResults() {
     elements.backtestResults.style.display = 'block';
 }
 
+function equityChartHTML(equity) {
+    // Courbe SVG à partir des points déjà sous-échantillonnés par le serveur
+    if (!equity || equity.v.length < 2) {
+        return `
+            <div style="height: 300px; display: flex; align-items: center; justify-content: center; background: var(--bg-secondary); border-radius: var(--radius-sm);">
+                <p style="color: var(--text-muted);">Aucun trade sur la période</p>
+            </div>
+        `;
+    }
+    const width = 600, height = 300;
+    const min = Math.min(...equity.v), max = Math.max(...equity.v);
+    const span = max - min || 1;
+    const points = equity.v.map((value, i) => {
+        const x = (i / (equity.v.length - 1)) * width;
+        const y = height - ((value - min) / span) * (height - 20) - 10;
+        return `${x.toFixed(1)},${y.toFixed(1)}`;
+    }).join(' ');
+    const color = equity.v[equity.v.length - 1] >= equity.v[0] ? 'var(--success-color)' : 'var(--danger-color)';
+
+    return `
+        <svg viewBox="0 0 ${width} ${height}" preserveAspectRatio="none" style="width: 100%; height: 300px; background: var(--bg-secondary); border-radius: var(--radius-sm);">
+            <polyline points="${points}" fill="none" stroke="${color}" stroke-width="2" vector-effect="non-scaling-stroke" />
+        </svg>
+        <p style="color: var(--text-muted); font-size: 0.85rem;">
+            ${new Date(equity.t[0]).toLocaleDateString('fr-FR')} → ${new Date(equity.t[equity.t.length - 1]).toLocaleDateString('fr-FR')}
+            · $${formatNumber(Math.round(min))} – $${formatNumber(Math.round(max))}
+        </p>
+    `;
+}
+
+function tickerResultsHTML(tickers, errors) {
+    const rows = Object.entries(tickers || {}).map(([ticker, { metrics }]) => `
+        <tr>
+            <td><strong>${ticker}</strong></td>
+            <td>${metrics.trades}</td>
+            <td>${metrics['winrate_%']}%</td>
+            <td style="color: ${(metrics['total_pnl_$'] ?? 0) >= 0 ? 'var(--success-color)' : 'var(--danger-color)'}">
+                $${metrics['total_pnl_$'] ?? 0}
+            </td>
+            <td>${metrics['max_drawdown_%']}%</td>
+        </tr>
+    `).join('');
+    const failed = Object.keys(errors || {});
+
+    return `
+        <div class="results-table">
+            <table>
+                <thead>
+                    <tr>
+                        <th>Ticker</th>
+                        <th>Trades</th>
+                        <th>Réussite</th>
+                        <th>P&L ($)</th>
+                        <th>Drawdown</th>
+                    </tr>
+                </thead>
+                <tbody>${rows}</tbody>
+            </table>
+        </div>
+        ${failed.length ? `<p style="color: var(--text-muted); font-size: 0.85rem;">Sans données : ${failed.join(', ')}</p>` : ''}
+    `;
+}
+
 // ========================
 // Settings Functions
 // ========================
@@ -536,6 +722,9 @@ function initApp() {
     // Load saved settings
     loadSettings();
 
+    // Derniers résultats connus, sans attendre un nouveau screening
+    loadLatestSnapshot();
+
     console.log('Stock Market Screener PWA initialized');
 }
 
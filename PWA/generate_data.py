@@ -1,121 +1,526 @@
 import json
-from tradingview_screener import Query, col
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+import numpy as np
 import pandas as pd
-import yfinance as yf
+import argparse
 import os
-from datetime import datetime
+import sys
+from datetime import date, datetime, timedelta
 
-def generate_screener_data():
-    print("🚀 Démarrage du screening (TradingView + Yahoo Finance)...")
-    
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from engine.bar_cache import MARKET_TZ, is_finished, latest_session
+from engine.metrics import METRICS
+from engine.providers import get_provider, provider_bar_cache, provider_from_env
+from engine.vwap import session_days, session_sums
+from snapshots import publish_snapshot
+
+# Paramètres du téléchargement Yahoo par lots
+BATCH_SIZE = 100      # symboles par requête yf.download
+MAX_WORKERS = 4       # lots téléchargés en parallèle
+MAX_RETRIES = 3       # tentatives par lot
+RETRY_BACKOFF = 1.0   # secondes, doublé à chaque nouvel échec
+WATCH_INTERVAL = 300  # secondes entre deux passes du mode surveillance
+
+# Colonnes demandées à TradingView : celles des résultats + celles du pré-filtre
+TV_COLUMNS = ['name', 'close', 'volume', 'change', 'relative_volume_10d_calc', 'VWAP', 'low']
+
+# Source des données : TradingView + Yahoo ("live") ou marché synthétique hors ligne
+# ("synthetic"), choisie par MARKET_DATA (voir engine/providers.py). Séances terminées
+# relues depuis le cache disque du fournisseur plutôt que retéléchargées
+PROVIDER = None
+BAR_CACHE = None
+
+
+def use_provider(provider, cache_root=None):
+    global PROVIDER, BAR_CACHE
+    PROVIDER = provider
+    BAR_CACHE = provider_bar_cache(provider, cache_root)
+
+
+use_provider(provider_from_env())
+
+
+def download_intraday(symbols):
+    session = PROVIDER.latest_session()
+    # Jour férié déjà constaté (séance mémorisée vide) : séance ouvrée précédente
+    while is_finished(session) and BAR_CACHE.is_empty(symbols, session):
+        session -= timedelta(days=3 if session.weekday() == 0 else 1)
+    if is_finished(session):
+        bars = BAR_CACHE.get_many(symbols, session, session + timedelta(days=1))
+        bars = {s: f.rename(columns=str.capitalize) for s, f in bars.items() if len(f) > 0}
+        if bars:
+            return pd.concat(bars, axis=1, sort=True)
+
+    # Séance en cours (ou jour férié) : une seule requête Yahoo pour tout le lot
+    raw = PROVIDER.intraday(symbols)
+    day = (session - date(1970, 1, 1)).days
+    if is_finished(session) and raw is not None and not raw.empty and day not in session_days(raw.index):
+        # Réponse d'une autre séance : jour férié, mémorisé pour ne plus le redemander
+        BAR_CACHE.mark_empty(symbols, session)
+    return raw
+
+
+def download_since(symbols, start):
+    # Barres 5m à partir de `start` (inclus) : quelques barres au lieu de la journée entière
+    return PROVIDER.since(symbols, start)
+
+
+class EmptyResponse(ValueError):
+    pass
+
+
+def fetch_batch(symbols, download=download_intraday, retries=MAX_RETRIES, backoff=RETRY_BACKOFF):
+    # Chaque requête est chronométrée (durée du lot et durée ramenée au symbole) ; les échecs
+    # sont comptés par type d'exception, y compris ceux rattrapés par une nouvelle tentative
+    for attempt in range(retries):
+        started = time.perf_counter()
+        try:
+            raw = download(symbols)
+            if raw is None or raw.dropna(how='all').empty:
+                raise EmptyResponse("réponse vide")
+        except Exception as e:
+            METRICS.observe("yahoo_request_seconds", time.perf_counter() - started,
+                            "Durée d'une requête Yahoo (un lot de symboles)", outcome="error")
+            METRICS.inc("yahoo_failures_total", help="Requêtes Yahoo en échec par type d'erreur", type=type(e).__name__)
+            if attempt == retries - 1:
+                METRICS.inc("yahoo_symbols_total", len(symbols), "Symboles demandés à Yahoo", outcome="abandoned")
+                print(f"\n⚠️  Lot de {len(symbols)} symboles abandonné: {e}", file=sys.stderr)
+                return None
+            METRICS.inc("yahoo_retries_total", help="Nouvelles tentatives de requêtes Yahoo")
+            time.sleep(backoff * 2 ** attempt)
+        else:
+            elapsed = time.perf_counter() - started
+            METRICS.observe("yahoo_request_seconds", elapsed, "Durée d'une requête Yahoo (un lot de symboles)", outcome="ok")
+            METRICS.observe("yahoo_symbol_seconds", elapsed / len(symbols), "Durée d'une requête Yahoo par symbole du lot")
+            METRICS.inc("yahoo_symbols_total", len(symbols), "Symboles demandés à Yahoo", outcome="ok")
+            return raw
+
+
+def to_wide_frame(raw, symbols):
+    # Colonnes (symbole, champ) comme yf.download(group_by='ticker'), même pour un seul symbole
+    if raw is None or raw.empty:
+        return None
+    if not isinstance(raw.columns, pd.MultiIndex):
+        raw = pd.concat({symbols[0]: raw}, axis=1)
+    return raw.loc[:, (slice(None), ['Close', 'Volume'])]
+
+
+def iter_download_jobs(jobs, max_workers=MAX_WORKERS):
+    # jobs : [(lot, fonction de téléchargement)] ; renvoie (lot, tableau heure x symbole)
+    # au fur et à mesure que les lots arrivent
+    with ThreadPoolExecutor(max_workers=max_workers) as pool:
+        futures = {pool.submit(fetch_batch, batch, download): batch for batch, download in jobs}
+        for future in as_completed(futures):
+            batch = futures[future]
+            yield batch, to_wide_frame(future.result(), batch)
+
+
+def split_batches(symbols, batch_size=BATCH_SIZE):
+    return [symbols[i:i + batch_size] for i in range(0, len(symbols), batch_size)]
+
+
+def iter_intraday_batches(symbols, download=download_intraday, batch_size=BATCH_SIZE, max_workers=MAX_WORKERS):
+    yield from iter_download_jobs([(batch, download) for batch in split_batches(symbols, batch_size)], max_workers)
+
+
+def compute_vwap_summary(bars):
+    with METRICS.timer("vwap_compute_seconds", "Calcul du VWAP de séance d'un lot de symboles"):
+        return _vwap_summary(bars)
+
+
+def _vwap_summary(bars):
+    if bars.empty:
+        return pd.DataFrame(columns=['vwap', 'price'], dtype=float)
+    close_df = bars.xs('Close', axis=1, level=1)
+    close = close_df.to_numpy(dtype=float)
+    volume = bars.xs('Volume', axis=1, level=1).to_numpy(dtype=float)
+
+    # VWAP de séance (engine.vwap) ; les barres absentes pour un symbole (alignement sur
+    # l'union des horaires) sont ignorées. Valeur à la dernière barre valide de chaque symbole
+    cum_pv, cum_volume, valid = session_sums(close, volume, session_days(bars.index))
+    last_row = len(valid) - 1 - np.argmax(valid[::-1], axis=0)
+    columns = np.arange(close.shape[1])
+    received = valid.any(axis=0)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        vwap = np.where(received, cum_pv[last_row, columns] / cum_volume[last_row, columns], np.nan)
+    price = np.where(received, close[last_row, columns], np.nan)
+    return pd.DataFrame({'vwap': vwap, 'price': price}, index=close_df.columns)
+
+
+def format_results(df):
+    return [
+        {
+            "ticker": row.name,
+            "price": round(float(row.price), 2),
+            "volume": int(row.volume),
+            "change": round(float(row.change), 2),
+            "relativeVolume": round(float(row.relative_volume_10d_calc), 2),
+            "vwap": round(float(row.vwap), 2)
+        }
+        for row in df.itertuples(index=False)
+    ]
+
+
+def iter_vwap_results(df_tv, download=download_intraday, batch_size=BATCH_SIZE, max_workers=MAX_WORKERS, progress=None):
+    # Renvoie chaque action retenue dès que le lot qui la contient a été vérifié
+    symbols = list(pd.unique(df_tv['name']))
+    checked = 0
+    survivors = 0
+    for batch, bars in iter_intraday_batches(symbols, download, batch_size, max_workers):
+        checked += len(batch)
+        rows = []
+        if bars is not None:
+            # Condition du notebook: vwap_last <= price, évaluée en une passe sur tout le lot
+            summary = compute_vwap_summary(bars)
+            passed = summary[summary['vwap'] <= summary['price']]
+            rows = format_results(df_tv.join(passed, on='name', how='inner'))
+            survivors += len(rows)
+        # Progression sur stderr, réécrite sur place : la sortie standard reste lisible
+        print(f"   [{checked}/{len(symbols)}] symboles vérifiés...", end="\r", file=sys.stderr)
+        if progress is not None:
+            progress(checked, len(symbols), survivors)
+        yield from rows
+    if symbols:
+        print(file=sys.stderr)
+
+
+def screen_vwap(df_tv, download=download_intraday, batch_size=BATCH_SIZE, max_workers=MAX_WORKERS, progress=None):
+    results = list(iter_vwap_results(df_tv, download, batch_size, max_workers, progress))
+    # Ordre TradingView (volume décroissant), indépendant de l'ordre d'arrivée des lots
+    rank = {name: i for i, name in enumerate(df_tv['name'])}
+    return sorted(results, key=lambda r: rank[r['ticker']])
+
+
+# ========================
+# Entonnoir du screening (symboles restants et durée de chaque étape, aussi exportés
+# dans engine.metrics)
+# ========================
+class Funnel:
+    def __init__(self, verbose=True):
+        self.verbose = verbose
+        self.stages = []
+        self.started = time.perf_counter()
+        self._last = self.started
+
+    def record(self, stage, remaining, removed=None):
+        # removed : {motif: nombre de symboles écartés}
+        now = time.perf_counter()
+        entry = {"stage": stage, "remaining": int(remaining),
+                 "removed": {k: int(v) for k, v in (removed or {}).items()}, "seconds": round(now - self._last, 2)}
+        METRICS.observe("screener_stage_seconds", now - self._last, "Durée de chaque étape du screening", stage=stage)
+        METRICS.set("screener_funnel_symbols", entry["remaining"], "Symboles restants après chaque étape (dernier screening)",
+                    stage=stage)
+        for reason, count in entry["removed"].items():
+            METRICS.inc("screener_removed_total", count, "Symboles écartés par motif", stage=stage, reason=reason)
+        self._last = now
+        self.stages.append(entry)
+        if self.verbose:
+            removed = sum(entry["removed"].values())
+            detail = ", ".join(f"{k}: {v}" for k, v in entry["removed"].items())
+            print(f"   📉 {stage:<14} {entry['remaining']:>5} restants"
+                  + (f" (-{removed} ; {detail})" if detail else "") + f" en {entry['seconds']:.2f} s")
+        return entry
+
+    def summary(self):
+        return {"stages": self.stages, "seconds": round(time.perf_counter() - self.started, 2)}
+
+
+# Pré-filtre : cours sous le VWAP TradingView de plus de cette marge (0,5 %). Le VWAP
+# TradingView (prix typique, données du jour) n'est pas celui du screener (close 5m
+# Yahoo) : sans marge, des actions retenues par la vérification exacte seraient écartées
+# (2 faux négatifs sur 3000 dans benchmarks/bench_funnel.py, aucun à 0,5 %)
+PREFILTER_VWAP_MARGIN = 0.005
+
+
+def prefilter(df_tv, margin=PREFILTER_VWAP_MARGIN):
+    # Écarte avant Yahoo les échecs évidents du test vwap <= cours, avec les colonnes
+    # TradingView (une règle est ignorée si sa colonne manque ou vaut NaN).
+    # Renvoie (actions gardées, {motif: nombre d'actions écartées})
+    rules = {}
+    if 'close' not in df_tv:
+        return df_tv, rules
+    close = df_tv['close']
+    if 'VWAP' in df_tv:
+        rules['sous VWAP TradingView'] = close < df_tv['VWAP'] * (1 - margin)
+    if 'low' in df_tv:
+        # Au plus bas de la séance : le VWAP (moyenne de cours >= plus bas) ne peut pas être sous le cours
+        rules['au plus bas du jour'] = close <= df_tv['low']
+    dropped = pd.Series(False, index=df_tv.index)
+    removed = {}
+    for reason, mask in rules.items():
+        mask = mask.fillna(False) & ~dropped
+        removed[reason] = int(mask.sum())
+        dropped |= mask
+    return df_tv[~dropped], removed
+
+
+def query_tradingview():
     # 1. TradingView Screener (Pré-sélection)
     print("1️⃣  Interrogation de TradingView...")
     try:
-        tickers = (
-            Query()
-            .select('name', 'close', 'volume', 'change', 'relative_volume_10d_calc')
-            .where(
-                col('type') == 'stock',
-                col('exchange').isin(['NASDAQ', 'NYSE']),
-                col('close').between(25, 250),
-                col('market_cap_basic') >= 1_000_000_000,
-                col('average_volume_30d_calc') > 1_000_000,
-                col('volume') > 1_000_000,
-                col('change') > 0,
-                col('relative_volume') > 1.2,
-                col('SMA50') < col('close'),
-                col('SMA100') < col('close'),
-                col('SMA200') < col('close')
-            )
-            .order_by('volume', ascending=False)
-            .limit(3000)
-            .get_scanner_data()
-        )
+        df_tv = PROVIDER.scan(TV_COLUMNS)
     except Exception as e:
+        METRICS.inc("screener_failures_total", help="Échecs du screening par étape et type d'erreur",
+                    stage="TradingView", type=type(e).__name__)
         print(f"❌ Erreur TradingView: {e}")
         return
 
-    if not tickers or len(tickers) < 2:
+    if df_tv is None or df_tv.empty:
+        METRICS.inc("screener_failures_total", help="Échecs du screening par étape et type d'erreur",
+                    stage="TradingView", type="EmptyResponse")
         print("⚠️  Aucun résultat trouvé sur TradingView.")
         return
 
-    # Extraction du DataFrame
-    df_tv = tickers[1]
     print(f"✅ {len(df_tv)} actions trouvées sur TradingView.")
+    return df_tv
+
+
+def pre_screen(funnel):
+    # TradingView puis pré-filtre, chaque étape enregistrée dans l'entonnoir
+    df_tv = query_tradingview()
+    if df_tv is None:
+        return None
+    funnel.record("TradingView", len(df_tv))
+    df_tv, removed = prefilter(df_tv)
+    funnel.record("Pré-filtre", len(df_tv), removed)
+    return df_tv
+
+
+def iter_screener_results(progress=None, funnel=None):
+    # Version flux du screener : chaque action est renvoyée dès que son VWAP est vérifié
+    print("🚀 Démarrage du screening (TradingView + Yahoo Finance)...")
+    funnel = funnel or Funnel()
+    df_tv = pre_screen(funnel)
+    if df_tv is None:
+        raise RuntimeError("Aucun résultat TradingView (service indisponible ?)")
 
     # 2. Yahoo Finance Filter (VWAP check)
     print("2️⃣  Filtrage via Yahoo Finance (VWAP)...")
-    
-    final_results = []
-    
-    # On parcourt les résultats TradingView
-    # df_tv contient: name, close, volume, change, relative_volume_10d_calc
-    
-    total = len(df_tv)
-    for index, row in df_tv.iterrows():
-        symbol = row['name']
-        tv_price = row['close']
-        tv_volume = row['volume']
-        tv_change = row['change']
-        tv_rvol = row['relative_volume_10d_calc']
-        
-        print(f"   [{index+1}/{total}] Vérification {symbol}...", end="\r")
-        
-        try:
-            ticker = yf.Ticker(symbol)
-            
-            # Données intraday 5m pour VWAP
-            # Note: yfinance peut être lent, on essaie d'optimiser
-            intraday = ticker.history(period='1d', interval='5m')
-            
-            if len(intraday) < 1:
-                continue
-
-            # Calcul VWAP
-            # VWAP = Cumulative(Price * Volume) / Cumulative(Volume)
-            vwap_series = (intraday['Close'] * intraday['Volume']).cumsum() / intraday['Volume'].cumsum()
-            
-            if vwap_series.empty:
-                continue
-                
-            vwap_last = vwap_series.iloc[-1]
-            
-            # Récupérer le prix actuel (soit du dernier close 5m, soit de l'info)
-            current_price = intraday['Close'].iloc[-1]
-            
-            # Condition du notebook: vwap_last <= price
-            if vwap_last <= current_price:
-                final_results.append({
-                    "ticker": symbol,
-                    "price": round(current_price, 2),
-                    "volume": int(tv_volume),
-                    "change": round(tv_change, 2),
-                    "relativeVolume": round(tv_rvol, 2),
-                    "vwap": round(vwap_last, 2)
-                })
-                
-        except Exception as e:
-            # print(f"Erreur sur {symbol}: {e}")
-            continue
+    if progress is not None:
+        progress(0, len(df_tv), 0)
+    count = 0
+    for row in iter_vwap_results(df_tv, progress=progress):
+        count += 1
+        yield row
+    funnel.record("VWAP Yahoo", count, {"VWAP au-dessus du cours": len(df_tv) - count})
+    print(f"✅ {count} actions retenues après filtrage VWAP ({funnel.summary()['seconds']} s).")
 
-    print(f"\n✅ {len(final_results)} actions retenues après filtrage VWAP.")
 
+def generate_screener_data(progress=None, funnel=None):
+    # Même pipeline que iter_screener_results, résultats réunis une fois tous les lots vérifiés
+    try:
+        final_results = list(iter_screener_results(progress, funnel))
+    except RuntimeError:
+        return None   # TradingView indisponible (erreur déjà affichée)
+    # Ordre TradingView (volume décroissant), indépendant de l'ordre d'arrivée des lots
+    final_results.sort(key=lambda row: row["volume"], reverse=True)
     return final_results
 
-if __name__ == "__main__":
-    results = generate_screener_data()
-    
-    # 3. Sauvegarde en JSON (seulement si exécuté directement)
+# ========================
+# Mode surveillance (séance en cours)
+# ========================
+class ScreenerWatch:
+    # Screening répété pendant la séance. À chaque passe : nouvelle pré-sélection
+    # TradingView, comparaison avec la passe précédente, puis seules les dernières barres
+    # des symboles déjà suivis sont téléchargées ; leur VWAP est prolongé au lieu d'être
+    # recalculé sur la journée. Chaque passe renvoie un delta (ajouts, retraits, mises à jour).
+    def __init__(self, query=query_tradingview, download=download_intraday, download_since=download_since,
+                 batch_size=BATCH_SIZE, max_workers=MAX_WORKERS):
+        self.query = query
+        self.download = download
+        self.download_since = download_since
+        self.batch_size = batch_size
+        self.max_workers = max_workers
+        self.passes = 0
+        self.session = None
+        self.rows = {}
+        self._reset()
+
+    def _reset(self):
+        self.vwap = {}      # symbole -> (séance, somme close × volume, somme volume) des barres terminées
+        self.partial = {}   # symbole -> (horodatage ns, close, VWAP) de la dernière barre reçue
+        self.rows = {}
+
+    def _fold(self, bars):
+        # Prolonge le VWAP de chaque symbole du lot avec les barres reçues. Les barres déjà
+        # intégrées sont ignorées ; la dernière barre reçue est peut-être encore en cours :
+        # elle compte dans le VWAP affiché mais pas dans l'état, et elle est redemandée à
+        # la passe suivante.
+        if bars is None:
+            return 0
+        close_df = bars.xs('Close', axis=1, level=1)
+        symbols = list(close_df.columns)
+        close = close_df.to_numpy(dtype=float)
+        volume = bars.xs('Volume', axis=1, level=1)[symbols].to_numpy(dtype=float)
+        times = bars.index.as_unit('ns').asi8
+        days = session_days(bars.index)
+        n = len(times)
+
+        since = np.array([self.partial[s][0] if s in self.partial else np.iinfo(np.int64).min for s in symbols])
+        keep = ~(np.isnan(close) | np.isnan(volume)) & (times[:, None] >= since[None, :])
+        received = keep.any(axis=0)
+        last = n - 1 - np.argmax(keep[::-1], axis=0)
+
+        # Sommes de séance reprises de l'état précédent (engine.vwap) : mêmes additions,
+        # dans le même ordre, que compute_vwap_summary sur la journée entière
+        state = [self.vwap.get(s, (-1, 0.0, 0.0)) for s in symbols]
+        state = tuple(np.array(values) for values in zip(*state)) if symbols else None
+        cum_pv, cum_volume, _ = session_sums(np.where(keep, close, np.nan), volume, days, state)
+
+        for j in np.flatnonzero(received):
+            symbol = symbols[j]
+            k = last[j]
+            if k > 0:
+                self.vwap[symbol] = (days[k - 1], cum_pv[k - 1, j], cum_volume[k - 1, j])
+            elif self.vwap.get(symbol, (-1,))[0] != days[0]:
+                # Seule barre reçue : première de la séance
+                self.vwap[symbol] = (days[0], 0.0, 0.0)
+            with np.errstate(divide='ignore', invalid='ignore'):
+                vwap = np.float64(cum_pv[k, j]) / cum_volume[k, j]
+            self.partial[symbol] = (times[k], close[k, j], vwap)
+        return int(keep.sum())
+
+    def _summary(self, symbols):
+        # VWAP et cours à la dernière barre reçue de chaque symbole
+        vwap = np.array([self.partial[s][2] for s in symbols], dtype=float)
+        close = np.array([self.partial[s][1] for s in symbols], dtype=float)
+        return pd.DataFrame({'vwap': vwap, 'price': close}, index=pd.Index(symbols, name='name'))
+
+    def step(self, now=None):
+        started = time.time()
+        now = now or pd.Timestamp.now(tz=MARKET_TZ)
+        session = latest_session(now)
+        if session != self.session:
+            # Nouvelle séance : le VWAP repart de zéro
+            self._reset()
+            self.session = session
+
+        funnel = Funnel(verbose=False)
+        df_tv = self.query()
+        if df_tv is None:
+            raise RuntimeError("Aucun résultat TradingView (service indisponible ?)")
+        funnel.record("TradingView", len(df_tv))
+        df_tv, removed = prefilter(df_tv)
+        funnel.record("Pré-filtre", len(df_tv), removed)
+        universe = list(pd.unique(df_tv['name']))
+        members = set(universe)
+        dropped = [s for s in self.vwap if s not in members]
+        for symbol in dropped:
+            del self.vwap[symbol]
+            del self.partial[symbol]
+
+        # Nouveaux symboles : journée complète ; symboles suivis : depuis leur dernière barre
+        # (rien à faire une fois la séance terminée, leurs barres sont définitives)
+        new = [s for s in universe if s not in self.vwap]
+        since = {}
+        if not is_finished(session, now):
+            for s in universe:
+                if s in self.vwap:
+                    since.setdefault(pd.Timestamp(self.partial[s][0], tz='UTC'), []).append(s)
+        jobs = [(batch, self.download) for batch in split_batches(new, self.batch_size)]
+        for start, symbols in since.items():
+            download = lambda batch, start=start: self.download_since(batch, start)
+            jobs += [(batch, download) for batch in split_batches(symbols, self.batch_size)]
+        fetched = 0
+        for _, bars in iter_download_jobs(jobs, self.max_workers):
+            fetched += self._fold(bars)
+
+        tracked = [s for s in universe if s in self.vwap]
+        summary = self._summary(tracked)
+        passed = summary[summary['vwap'] <= summary['price']]
+        rows = {row['ticker']: row for row in format_results(df_tv.join(passed, on='name', how='inner'))}
+        funnel.record("VWAP Yahoo", len(rows), {"VWAP au-dessus du cours": len(universe) - len(rows)})
+
+        delta = {
+            "pass": self.passes + 1,
+            "session": session.isoformat(),
+            "added": [row for t, row in rows.items() if t not in self.rows],
+            "removed": [t for t in self.rows if t not in rows],
+            "updated": [row for t, row in rows.items() if t in self.rows and self.rows[t] != row],
+            "universe": {"size": len(universe), "new": len(new), "dropped": len(dropped)},
+            "bars": fetched,
+            "funnel": funnel.stages,
+            "elapsed": round(time.time() - started, 2),
+        }
+        self.rows = rows
+        self.passes += 1
+        return delta
+
+    def results(self):
+        # Ordre TradingView (volume décroissant)
+        return sorted(self.rows.values(), key=lambda row: row["volume"], reverse=True)
+
+    def run(self, interval=WATCH_INTERVAL, on_delta=None):
+        while True:
+            next_pass = time.time() + interval
+            try:
+                delta = self.step()
+            except Exception as e:
+                METRICS.inc("screener_failures_total", help="Échecs du screening par étape et type d'erreur",
+                            stage="surveillance", type=type(e).__name__)
+                print(f"❌ Passe de surveillance en échec: {e}")
+            else:
+                funnel = " → ".join(f"{stage['stage']} {stage['remaining']}" for stage in delta['funnel'])
+                print(f"🔄 Passe {delta['pass']} : {funnel} ; +{len(delta['added'])} / -{len(delta['removed'])} / "
+                      f"~{len(delta['updated'])} actions ({delta['universe']['new']} nouveaux symboles, "
+                      f"{delta['bars']} barres, {delta['elapsed']} s)")
+                if on_delta is not None:
+                    on_delta(self, delta)
+            time.sleep(max(0.0, next_pass - time.time()))
+
+
+def save_results(results, extra=None):
+    # Sauvegarde en JSON + fichier de métadonnées pour le timestamp
     output_file = "screener_results.json"
-    with open(output_file, "w") as f:
-        json.dump(results, f, indent=4)
-        
+    with METRICS.timer("json_serialize_seconds", "Sérialisation JSON des résultats", payload="fichier"):
+        with open(output_file, "w") as f:
+            json.dump(results, f, indent=4)
+
     print(f"💾 Résultats sauvegardés dans {output_file}")
-    
-    # Création d'un fichier de métadonnées pour le timestamp
+
     meta = {
         "last_updated": datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
-        "count": len(results)
+        "count": len(results),
+        **(extra or {}),
     }
     with open("screener_meta.json", "w") as f:
         json.dump(meta, f, indent=4)
+
+    # Instantané compact et pré-compressé lu par l'application à son ouverture
+    manifest = publish_snapshot(results, extra)
+    print(f"📦 Instantané {manifest['file']} ({manifest['bytes']} octets)")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Screener LONG (TradingView + VWAP Yahoo)")
+    parser.add_argument("--watch", action="store_true", help="surveillance continue pendant la séance")
+    parser.add_argument("--interval", type=int, default=WATCH_INTERVAL, help="secondes entre deux passes")
+    parser.add_argument("--metrics", help="fichier où écrire les métriques (format texte Prometheus) après chaque passe")
+    parser.add_argument("--synthetic", type=int, metavar="N",
+                        help="marché synthétique de N actions au lieu de TradingView / Yahoo (hors ligne)")
+    parser.add_argument("--seed", type=int, default=0, help="graine du marché synthétique")
+    args = parser.parse_args()
+    if args.synthetic:
+        use_provider(get_provider("synthetic", tickers=args.synthetic, seed=args.seed))
+
+    def write_metrics():
+        if args.metrics:
+            with open(args.metrics, "w") as f:
+                f.write(METRICS.render())
+
+    if args.watch:
+        print(f"👀 Mode surveillance : une passe toutes les {args.interval} s (Ctrl+C pour arrêter)")
+        try:
+            def on_delta(watch, delta):
+                save_results(watch.results(), {"pass": delta["pass"], "added": [r["ticker"] for r in delta["added"]],
+                                               "removed": delta["removed"]})
+                write_metrics()
+            ScreenerWatch().run(args.interval, on_delta)
+        except KeyboardInterrupt:
+            print("\n🛑 Surveillance arrêtée.")
+    else:
+        # 3. Sauvegarde en JSON (seulement si exécuté directement)
+        funnel = Funnel()
+        save_results(generate_screener_data(funnel=funnel), {"funnel": funnel.summary()})
+        write_metrics()
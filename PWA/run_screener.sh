@@ -23,5 +23,5 @@ echo "🌐 Lancement du serveur PWA..."
 echo "   Accédez à http://localhost:8000"
 echo ""
 
-# Lancer le serveur HTTP
-$PYTHON_CMD -m http.server 8000
+# Lancer le serveur de l'application (instantanés pré-compressés, cache longue durée)
+$PYTHON_CMD server.py
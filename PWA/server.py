@@ -1,13 +1,20 @@
 import http.server
-import socketserver
 import json
 import sys
 import os
-from urllib.parse import urlparse
+import hashlib
+import threading
+import time
+import uuid
+from collections import OrderedDict, deque
+from concurrent.futures import ProcessPoolExecutor
+from datetime import date, timedelta
+from email.utils import formatdate, parsedate_to_datetime
+from urllib.parse import urlparse, parse_qs
 
 # Import de la logique du screener
 try:
-    from generate_data import generate_screener_data
+    from generate_data import Funnel, ScreenerWatch, iter_screener_results
 except ImportError as e:
     print(f"❌ Erreur d'importation: {e}")
     print("\nVérifiez que les librairies nécessaires sont installées:")
@@ -17,48 +24,552 @@ except Exception as e:
     print(f"❌ Erreur inattendue lors de l'import: {e}")
     sys.exit(1)
 
+from engine.backtest import CHECKLIST_LONG, DEFAULT_PARAMS, backtest_tickers
+from engine.metrics import CONTENT_TYPE, METRICS
+from engine.rules import parse_rule
+from snapshots import MANIFEST, publish_snapshot, snapshot_file
+
 PORT = 8000
+SSE_HEARTBEAT = 15  # secondes entre deux commentaires keep-alive sur le flux d'événements
+SCREENER_TTL = int(os.environ.get("SCREENER_TTL", 300))  # secondes pendant lesquelles un résultat est resservi
+SCREENER_WATCH = int(os.environ.get("SCREENER_WATCH", 0))  # secondes entre deux passes de surveillance (0 : désactivé)
+WATCH_HISTORY = 100  # deltas de surveillance conservés pour /api/screener/changes
+BACKTEST_WORKERS = int(os.environ.get("BACKTEST_WORKERS", 0)) or None  # processus de backtest (défaut : nombre de cœurs)
+BACKTEST_MAX_DAYS = 59   # Yahoo ne fournit les barres 5m que sur 60 jours
+BACKTEST_MAX_TICKERS = 200
+SNAPSHOT_MAX_AGE = 365 * 24 * 3600   # instantanés immuables (nom = empreinte du contenu)
+LISTEN_BACKLOG = int(os.environ.get("LISTEN_BACKLOG", 1024))  # connexions en attente d'accept (5 par défaut dans socketserver)
+
+# Paramètres envoyés par app.js (camelCase) -> paramètres du moteur
+BACKTEST_PARAMS = {
+    "initialCapital": "initial_capital",
+    "allocPct": "alloc_pct",
+    "leverage": "leverage",
+    "enableProfitTarget": "enable_profit_target",
+    "profitPct": "profit_pct",
+    "profitAmount": "profit_amount",
+    "keybarAtrLength": "keybar_atr_length",
+    "keybarAtrMult": "keybar_atr_mult",
+    "keybarVolAvgLength": "keybar_vol_avg_length",
+    "keybarMinBodyPct": "keybar_min_body_pct",
+    "volumeSmaCheck": "volume_sma_check",
+    "volumeSmaLength": "volume_sma_length",
+    "rrsPriceChangeLength": "rrs_price_change_length",
+    "rrsAtrLength": "rrs_atr_length",
+    "rvolNDayAvg": "rvol_n_day_avg",
+    "rvolHighlightThres": "rvol_highlight_thres",
+    "rvolSoftHighlightThres": "rvol_soft_highlight_thres",
+    "nAtrPeriod": "nATRPeriod",
+    "nAtrMultip": "nATRMultip",
+    "entryRule": "entry_rule",   # règles engine/rules.py (ex. "close > ema(30) and rvol(5) > 1.5")
+    "exitRule": "exit_rule",
+}
+# Routes de l'API pour l'étiquette `route` des métriques HTTP (identifiants de jobs regroupés)
+API_ROUTES = ['/api/screener', '/api/screener/stream', '/api/screener/changes', '/api/screener/jobs',
+              '/api/backtest', '/api/metrics', '/snapshots/latest.json']
+CHECKLIST_KEYS = dict(zip([
+    "alignedRelativeStrength", "rrs30mCrossover", "keybarVwapBreakout", "redToGreenStrike",
+    "haBullishReversal", "bullishThrust", "atrTrailingStopBullishCross", "breakoutHod1",
+], CHECKLIST_LONG))
+
+
+# Un screening lancé en arrière-plan et son avancement
+class ScreenJob:
+    def __init__(self):
+        self.id = uuid.uuid4().hex[:12]
+        self.status = "running"
+        self.checked = 0
+        self.total = 0
+        self.survivors = 0
+        self.started = time.time()
+        self.finished = None
+        self.error = None
+        self.entry = None
+        self.rows = []
+        self.funnel = Funnel()
+        self.version = 0
+        self._cond = threading.Condition()
+
+    def update(self, checked, total, survivors):
+        with self._cond:
+            self.checked, self.total, self.survivors = checked, total, survivors
+            self.version += 1
+            self._cond.notify_all()
+
+    def add_row(self, row):
+        with self._cond:
+            self.rows.append(row)
+            self.version += 1
+            self._cond.notify_all()
+
+    def rows_since(self, position, timeout):
+        # Attend de nouvelles lignes (ou la fin du job) et renvoie (lignes, terminé)
+        with self._cond:
+            self._cond.wait_for(lambda: len(self.rows) > position or self.finished is not None, timeout)
+            return self.rows[position:], self.finished is not None
+
+    def finish(self, entry=None, error=None):
+        with self._cond:
+            self.entry = entry
+            self.error = error
+            self.status = "error" if error is not None else "done"
+            self.finished = time.time()
+            self.version += 1
+            self._cond.notify_all()
+        METRICS.inc("screener_jobs_total", help="Screenings terminés par statut", status=self.status)
+        METRICS.observe("screener_job_seconds", self.finished - self.started, "Durée d'un screening complet")
+        if error is not None:
+            METRICS.inc("screener_failures_total", help="Échecs du screening par étape et type d'erreur",
+                        stage="job", type=type(error).__name__)
+
+    def wait_change(self, version, timeout):
+        # Bloque jusqu'à la prochaine mise à jour (ou timeout) et renvoie l'état courant
+        with self._cond:
+            self._cond.wait_for(lambda: self.version != version, timeout)
+            return self.version, self.snapshot()
+
+    def result(self):
+        with self._cond:
+            self._cond.wait_for(lambda: self.finished is not None)
+        if self.error is not None:
+            raise self.error
+        return self.entry
+
+    def snapshot(self):
+        return {
+            "id": self.id,
+            "status": self.status,
+            "checked": self.checked,
+            "total": self.total,
+            "survivors": self.survivors,
+            "started": formatdate(self.started, usegmt=True),
+            "elapsed": round((self.finished or time.time()) - self.started, 1),
+            "error": str(self.error) if self.error is not None else None,
+            "funnel": list(self.funnel.stages),
+        }
+
+
+# Dernier résultat du screener, partagé par toutes les requêtes.
+# Un seul calcul à la fois : les requêtes qui arrivent pendant un screening attendent
+# ce calcul au lieu d'en lancer un nouveau.
+class ScreenerCache:
+    def __init__(self, compute, ttl, history=20):
+        self.compute = compute
+        self.ttl = ttl
+        self.history = history
+        self._lock = threading.Lock()
+        self._inflight = None
+        self._entry = None   # (corps JSON, ETag, horodatage, lignes)
+        self.jobs = OrderedDict()
+
+    def fresh_entry(self):
+        with self._lock:
+            entry = self._entry
+        if entry is not None and time.time() - entry[2] < self.ttl:
+            return entry
+        return None
+
+    def get(self, refresh=False):
+        entry = None if refresh else self.fresh_entry()
+        METRICS.inc("screener_cache_total", help="Demandes de screening servies depuis le cache ou recalculées",
+                    result="hit" if entry is not None else "miss")
+        return entry or self.start().result()
+
+    def start(self):
+        with self._lock:
+            if self._inflight is not None:
+                return self._inflight
+            job = self._inflight = ScreenJob()
+            self.jobs[job.id] = job
+            while len(self.jobs) > self.history:
+                self.jobs.popitem(last=False)
+        threading.Thread(target=self._run, args=(job,), daemon=True).start()
+        return job
+
+    def publish(self, rows):
+        # Ordre TradingView (volume décroissant) pour la réponse complète
+        data = sorted(rows, key=lambda row: row["volume"], reverse=True)
+        with METRICS.timer("json_serialize_seconds", "Sérialisation JSON des résultats", payload="screener"):
+            body = json.dumps(data).encode('utf-8')
+        entry = (body, f'"{hashlib.sha1(body).hexdigest()}"', time.time(), data)
+        with self._lock:
+            self._entry = entry
+        try:
+            publish_snapshot(data)
+        except OSError as e:
+            print(f"⚠️  Instantané non écrit: {e}")
+        return entry
+
+    def _run(self, job):
+        try:
+            for row in self.compute(progress=job.update, funnel=job.funnel):
+                job.add_row(row)
+            job.finish(entry=self.publish(job.rows))
+        except Exception as e:
+            job.finish(error=e)
+        finally:
+            with self._lock:
+                self._inflight = None
+
+
+# Deltas du mode surveillance (SCREENER_WATCH) : chaque passe publie le nouveau résultat
+# et la liste des actions ajoutées / retirées / mises à jour
+class WatchChanges:
+    def __init__(self, history=WATCH_HISTORY):
+        self._lock = threading.Lock()
+        self.deltas = deque(maxlen=history)
+
+    def record(self, watch, delta):
+        screener_cache.publish(watch.results())
+        with self._lock:
+            self.deltas.append(delta)
+
+    def since(self, version):
+        # Deltas postérieurs à la passe `version` ; None si l'historique ne remonte pas
+        # assez loin (le client doit recharger /api/screener)
+        with self._lock:
+            deltas = list(self.deltas)
+        if not deltas:
+            return {"pass": 0, "changes": []}
+        if version < deltas[0]["pass"] - 1:
+            return None
+        return {"pass": deltas[-1]["pass"], "changes": [d for d in deltas if d["pass"] > version]}
+
+
+screener_cache = ScreenerCache(iter_screener_results, SCREENER_TTL)
+watch_changes = WatchChanges()
+backtest_pool = None   # ProcessPoolExecutor créé au premier backtest
+
+
+def parse_backtest_request(payload):
+    # {"tickers": [...], "backtest": getBacktestParams(), "strategy": getStrategySettings()}
+    tickers = list(dict.fromkeys(str(t).strip().upper() for t in payload.get("tickers") or [] if str(t).strip()))
+    if not tickers:
+        raise ValueError("Aucun ticker à tester")
+    if len(tickers) > BACKTEST_MAX_TICKERS:
+        raise ValueError(f"Trop de tickers ({len(tickers)} > {BACKTEST_MAX_TICKERS})")
+
+    settings = {**payload.get("backtest", {}), **payload.get("strategy", {})}
+    params = dict(DEFAULT_PARAMS)
+    for key, name in BACKTEST_PARAMS.items():
+        if settings.get(key) is not None:
+            default = DEFAULT_PARAMS[name]
+            params[name] = bool(settings[key]) if isinstance(default, bool) else type(default)(settings[key])
+    checklist = settings.get("checklist") or {}
+    params["checklist_long"] = {name: bool(checklist.get(key, CHECKLIST_LONG[name])) for key, name in CHECKLIST_KEYS.items()}
+    # Règle invalide : RuleError (ValueError) avec la position de l'erreur, avant tout téléchargement
+    for name in ("entry_rule", "exit_rule"):
+        if params[name]:
+            parse_rule(params[name])
+
+    days = min(max(int(settings.get("lookbackDays") or 15), 1), BACKTEST_MAX_DAYS)
+    end = date.today() + timedelta(days=1)
+    return tickers, end - timedelta(days=days + 1), end, params
+
+
+def run_backtest_request(payload):
+    global backtest_pool
+    tickers, start, end, params = parse_backtest_request(payload)
+    if backtest_pool is None:
+        backtest_pool = ProcessPoolExecutor(max_workers=BACKTEST_WORKERS)
+    started = time.time()
+    result = backtest_tickers(tickers, start, end, params, backtest_pool)
+    result["start"], result["end"] = start.isoformat(), end.isoformat()
+    result["elapsed"] = round(time.time() - started, 2)
+    return result
+
+
+def route_label(path):
+    if path.startswith('/api/screener/jobs/'):
+        return '/api/screener/jobs/<id>/events' if path.endswith('/events') else '/api/screener/jobs/<id>'
+    if path in API_ROUTES:
+        return path
+    if path.startswith('/snapshots/'):
+        return '/snapshots/<instantané>'
+    return 'inconnue' if path.startswith('/api/') else 'statique'
+
 
 class ScreenerRequestHandler(http.server.SimpleHTTPRequestHandler):
     def do_GET(self):
+        self.instrumented(self.handle_get)
+
+    def do_POST(self):
+        self.instrumented(self.handle_post)
+
+    def instrumented(self, handler):
+        # Nombre de requêtes par route et statut, durée par route (flux : jusqu'à la fin du flux)
+        started = time.perf_counter()
+        self.status = None
+        try:
+            handler()
+        finally:
+            route = route_label(urlparse(self.path).path)
+            METRICS.observe("http_request_seconds", time.perf_counter() - started, "Durée des requêtes HTTP",
+                            route=route, method=self.command)
+            METRICS.inc("http_requests_total", help="Requêtes HTTP par route et statut",
+                        route=route, method=self.command, status=self.status or 500)
+
+    def send_response(self, code, message=None):
+        self.status = code
+        super().send_response(code, message)
+
+    def handle_get(self):
         # Analyse de l'URL demandée
         parsed_path = urlparse(self.path)
         
-        # Si l'URL est /api/screener, on lance le script Python
+        # Si l'URL est /api/screener, on sert le dernier screening (ou on le lance)
         if parsed_path.path == '/api/screener':
-            self.send_response(200)
-            self.send_header('Content-type', 'application/json')
-            self.send_header('Access-Control-Allow-Origin', '*') # Pour éviter les soucis CORS
-            self.end_headers()
-            
             print("\n⚡ Demande de screening reçue depuis l'application...")
+            refresh = parse_qs(parsed_path.query).get('refresh', ['0'])[0] == '1'
             try:
-                # Exécution du screener
-                data = generate_screener_data()
-                
-                # Envoi de la réponse JSON au navigateur
-                response = json.dumps(data).encode('utf-8')
-                self.wfile.write(response)
-                print("✅ Données envoyées à l'application.\n")
-                
+                body, etag, created, _ = screener_cache.get(refresh)
             except Exception as e:
                 print(f"❌ Erreur lors du screening: {e}")
-                error_response = json.dumps({"error": str(e)}).encode('utf-8')
-                self.wfile.write(error_response)
+                self.send_json_error(500, str(e))
+                return
+
+            last_modified = formatdate(created, usegmt=True)
+            if self.not_modified(etag, created):
+                self.send_response(304)
+                self.send_cache_headers(etag, last_modified)
+                self.end_headers()
+                print("✅ Données inchangées (304).\n")
+                return
+
+            self.send_response(200)
+            self.send_header('Content-type', 'application/json')
+            self.send_header('Content-Length', str(len(body)))
+            self.send_cache_headers(etag, last_modified)
+            self.end_headers()
+            # Envoi de la réponse JSON au navigateur
+            self.wfile.write(body)
+            print("✅ Données envoyées à l'application.\n")
                 
+        elif parsed_path.path == '/api/screener/stream':
+            self.stream_results()
+
+        elif parsed_path.path.startswith('/snapshots/'):
+            self.serve_snapshot(parsed_path.path[len('/snapshots/'):])
+
+        elif parsed_path.path == '/api/metrics':
+            body = METRICS.render().encode('utf-8')
+            self.send_response(200)
+            self.send_header('Content-Type', CONTENT_TYPE)
+            self.send_header('Content-Length', str(len(body)))
+            self.send_header('Cache-Control', 'no-store')
+            self.end_headers()
+            self.wfile.write(body)
+
+        elif parsed_path.path == '/api/screener/changes':
+            try:
+                version = int(parse_qs(parsed_path.query).get('since', ['0'])[0])
+            except ValueError:
+                self.send_json_error(400, "Paramètre since invalide")
+                return
+            changes = watch_changes.since(version)
+            if changes is None:
+                self.send_json(200, {"reset": True})
+            else:
+                self.send_json(200, changes)
+
+        elif parsed_path.path.startswith('/api/screener/jobs/'):
+            parts = parsed_path.path[len('/api/screener/jobs/'):].split('/')
+            job = screener_cache.jobs.get(parts[0])
+            if job is None:
+                self.send_json_error(404, "Screening inconnu")
+            elif len(parts) == 1:
+                self.send_json(200, job.snapshot())
+            elif parts[1:] == ['events']:
+                self.stream_job_events(job)
+            else:
+                self.send_json_error(404, "Ressource inconnue")
+
         else:
             # Sinon, comportement normal (servir les fichiers HTML, CSS, JS...)
             super().do_GET()
 
-print(f"🚀 Serveur PWA intelligent démarré sur http://localhost:{PORT}")
-print("   Prêt à exécuter le screener à la demande.")
+    def handle_post(self):
+        path = urlparse(self.path).path
+        # Lancement d'un screening en arrière-plan : réponse immédiate avec l'identifiant du job
+        if path == '/api/screener/jobs':
+            job = screener_cache.start()
+            print(f"\n⚡ Screening {job.id} en arrière-plan...")
+            self.send_json(202, job.snapshot(), {'Location': f'/api/screener/jobs/{job.id}'})
+        elif path == '/api/backtest':
+            self.backtest()
+        else:
+            self.send_json_error(404, "Ressource inconnue")
+
+    def backtest(self):
+        try:
+            length = int(self.headers.get('Content-Length') or 0)
+            payload = json.loads(self.rfile.read(length) or b"{}")
+        except ValueError:
+            self.send_json_error(400, "Corps JSON invalide")
+            return
+        print("\n📈 Demande de backtest reçue depuis l'application...")
+        try:
+            result = run_backtest_request(payload)
+        except (ValueError, TypeError) as e:
+            self.send_json_error(400, str(e))
+            return
+        except Exception as e:
+            print(f"❌ Erreur lors du backtest: {e}")
+            self.send_json_error(500, str(e))
+            return
+        print(f"✅ Backtest de {len(result['tickers'])} tickers en {result['elapsed']} s.\n")
+        self.send_json(200, result)
+
+    def serve_snapshot(self, name):
+        # Fichier pré-compressé selon Accept-Encoding ; latest.json est revalidé à chaque
+        # ouverture, les instantanés (nom versionné) sont gardés en cache un an
+        found = snapshot_file(name, self.headers.get('Accept-Encoding', ''))
+        if found is None:
+            self.send_json_error(404, "Instantané inconnu")
+            return
+        path, encoding = found
+        with open(path, 'rb') as f:
+            body = f.read()
+        etag = f'"{hashlib.sha1(body).hexdigest()}"'
+        if name == MANIFEST and etag in [tag.strip() for tag in self.headers.get('If-None-Match', '').split(',')]:
+            self.send_response(304)
+            self.send_header('ETag', etag)
+            self.send_header('Cache-Control', 'no-cache')
+            self.end_headers()
+            return
+        self.send_response(200)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(body)))
+        if encoding is not None:
+            self.send_header('Content-Encoding', encoding)
+        self.send_header('Vary', 'Accept-Encoding')
+        self.send_header('ETag', etag)
+        if name == MANIFEST:
+            self.send_header('Cache-Control', 'no-cache')
+        else:
+            self.send_header('Cache-Control', f'public, max-age={SNAPSHOT_MAX_AGE}, immutable')
+        self.end_headers()
+        self.wfile.write(body)
+
+    def stream_results(self):
+        # NDJSON : une ligne par action retenue dès qu'elle est connue, puis une ligne de fin
+        # {"done": true, "count": n} (ou {"error": "..."})
+        entry = screener_cache.fresh_entry()
+        job = None if entry is not None else screener_cache.start()
+        self.send_response(200)
+        self.send_header('Content-Type', 'application/x-ndjson')
+        self.send_header('Cache-Control', 'no-store')
+        self.send_header('Access-Control-Allow-Origin', '*')
+        if job is not None:
+            # Permet au client de suivre l'avancement via /api/screener/jobs/<id>/events
+            self.send_header('X-Screener-Job', job.id)
+        self.end_headers()
+        try:
+            if entry is not None:
+                count = len(entry[3])
+                self.write_ndjson(entry[3])
+            else:
+                count = 0
+                finished = False
+                while not finished:
+                    rows, finished = job.rows_since(count, SSE_HEARTBEAT)
+                    count += len(rows)
+                    self.write_ndjson(rows)
+                if job.error is not None:
+                    self.write_ndjson([{"error": str(job.error)}])
+                    return
+            self.write_ndjson([{"done": True, "count": count}])
+        except (BrokenPipeError, ConnectionResetError):
+            return
+
+    def write_ndjson(self, rows):
+        if rows:
+            self.wfile.write(b"".join(json.dumps(row).encode('utf-8') + b"\n" for row in rows))
+        self.wfile.flush()
+
+    def stream_job_events(self, job):
+        # Server-Sent Events : un événement "progress" par lot vérifié, puis "done" ou "error"
+        self.send_response(200)
+        self.send_header('Content-Type', 'text/event-stream')
+        self.send_header('Cache-Control', 'no-cache')
+        self.send_header('Access-Control-Allow-Origin', '*')
+        self.end_headers()
+        version = -1
+        try:
+            while True:
+                new_version, snapshot = job.wait_change(version, SSE_HEARTBEAT)
+                if new_version == version:
+                    self.wfile.write(b": keep-alive\n\n")
+                else:
+                    version = new_version
+                    event = snapshot["status"] if snapshot["status"] != "running" else "progress"
+                    self.wfile.write(f"event: {event}\ndata: {json.dumps(snapshot)}\n\n".encode('utf-8'))
+                self.wfile.flush()
+                if snapshot["status"] != "running":
+                    return
+        except (BrokenPipeError, ConnectionResetError):
+            # Onglet fermé : le screening continue sans ce client
+            return
+
+    def send_cache_headers(self, etag, last_modified):
+        self.send_header('Access-Control-Allow-Origin', '*') # Pour éviter les soucis CORS
+        self.send_header('ETag', etag)
+        self.send_header('Last-Modified', last_modified)
+        # Le navigateur garde la réponse mais la revalide (If-None-Match) à chaque appel
+        self.send_header('Cache-Control', 'no-cache')
+
+    def not_modified(self, etag, created):
+        if_none_match = self.headers.get('If-None-Match')
+        if if_none_match is not None:
+            return etag in [tag.strip() for tag in if_none_match.split(',')] or if_none_match.strip() == '*'
+        if_modified_since = self.headers.get('If-Modified-Since')
+        if if_modified_since:
+            try:
+                return int(created) <= parsedate_to_datetime(if_modified_since).timestamp()
+            except (TypeError, ValueError):
+                return False
+        return False
+
+    def send_json(self, status, data, headers=None):
+        with METRICS.timer("json_serialize_seconds", "Sérialisation JSON des résultats", payload="api"):
+            body = json.dumps(data).encode('utf-8')
+        self.send_response(status)
+        self.send_header('Content-type', 'application/json')
+        self.send_header('Content-Length', str(len(body)))
+        self.send_header('Access-Control-Allow-Origin', '*')
+        self.send_header('Cache-Control', 'no-store')
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        self.end_headers()
+        self.wfile.write(body)
+
+    def send_json_error(self, status, message):
+        self.send_json(status, {"error": message})
+
+
+# Garde indispensable : les processus de backtest réimportent ce module (macOS, Windows)
+if __name__ == "__main__":
+    print(f"🚀 Serveur PWA intelligent démarré sur http://localhost:{PORT}")
+    print("   Prêt à exécuter le screener et les backtests à la demande.")
+    print(f"   Résultats du screening conservés {SCREENER_TTL} s.")
+
+    if SCREENER_WATCH:
+        # Chaque passe republie le résultat : il reste frais entre deux passes
+        screener_cache.ttl = max(SCREENER_TTL, 2 * SCREENER_WATCH)
+        threading.Thread(target=ScreenerWatch().run, args=(SCREENER_WATCH, watch_changes.record), daemon=True).start()
+        print(f"   👀 Surveillance de la séance : une passe toutes les {SCREENER_WATCH} s.")
 
-# Configuration du serveur pour permettre le redémarrage rapide (reuse address)
-socketserver.TCPServer.allow_reuse_address = True
+    # Serveur multi-thread : les fichiers statiques et l'état des jobs restent servis
+    # pendant qu'un screening tourne
+    http.server.ThreadingHTTPServer.allow_reuse_address = True
+    http.server.ThreadingHTTPServer.daemon_threads = True
+    # Des centaines de clients simultanés : sans file d'attente plus longue, les
+    # connexions au-delà de la 5e sont refusées ou retardées par le noyau
+    http.server.ThreadingHTTPServer.request_queue_size = LISTEN_BACKLOG
 
-with socketserver.TCPServer(("", PORT), ScreenerRequestHandler) as httpd:
-    try:
-        httpd.serve_forever()
-    except KeyboardInterrupt:
-        print("\n🛑 Arrêt du serveur.")
-        httpd.server_close()
+    with http.server.ThreadingHTTPServer(("", PORT), ScreenerRequestHandler) as httpd:
+        try:
+            httpd.serve_forever()
+        except KeyboardInterrupt:
+            print("\n🛑 Arrêt du serveur.")
+            httpd.server_close()
@@ -1,4 +1,7 @@
-const CACHE_NAME = 'stock-screener-v1';
+const CACHE_NAME = 'stock-screener-v3';
+// Instantanés du screener : gardés d'une version de l'application à l'autre
+const SNAPSHOT_CACHE = 'screener-snapshots';
+const SNAPSHOT_MANIFEST = '/snapshots/latest.json';
 const urlsToCache = [
     '/',
     '/index.html',
@@ -20,8 +23,70 @@ self.addEventListener('install', event => {
     );
 });
 
+// Manifeste des instantanés : réponse immédiate depuis le cache (stale-while-revalidate),
+// la version du serveur est chargée en arrière-plan ; si elle a changé, les pages
+// ouvertes sont prévenues (message 'snapshot') et rechargent le nouvel instantané
+async function revalidateManifest(request, cached) {
+    const response = await fetch(request);
+    if (!response.ok) {
+        return response;
+    }
+    const cache = await caches.open(SNAPSHOT_CACHE);
+    await cache.put(request, response.clone());
+    const manifest = await response.clone().json();
+    const previous = cached ? await cached.json() : null;
+
+    // Seuls les instantanés encore dans l'historique restent en cache
+    const kept = new Set(manifest.history.map(entry => `/snapshots/${entry.file}`));
+    const keys = await cache.keys();
+    await Promise.all(keys
+        .filter(key => new URL(key.url).pathname !== SNAPSHOT_MANIFEST && !kept.has(new URL(key.url).pathname))
+        .map(key => cache.delete(key)));
+
+    if (previous && previous.version !== manifest.version) {
+        const clients = await self.clients.matchAll();
+        clients.forEach(client => client.postMessage({ type: 'snapshot', manifest }));
+    }
+    return response;
+}
+
+function serveManifest(event) {
+    const cachedPromise = caches.open(SNAPSHOT_CACHE).then(cache => cache.match(SNAPSHOT_MANIFEST));
+    const networkPromise = cachedPromise.then(cached => revalidateManifest(event.request, cached && cached.clone()));
+    event.waitUntil(networkPromise.catch(error => console.log('Snapshot revalidation failed:', error)));
+    event.respondWith(cachedPromise.then(cached => cached || networkPromise));
+}
+
+// Instantané versionné : son contenu ne change jamais, le cache suffit
+function serveSnapshot(event) {
+    event.respondWith(
+        caches.open(SNAPSHOT_CACHE).then(cache =>
+            cache.match(event.request).then(cached => cached || fetch(event.request).then(response => {
+                if (response.ok) {
+                    cache.put(event.request, response.clone());
+                }
+                return response;
+            }))
+        )
+    );
+}
+
 // Fetch from cache
 self.addEventListener('fetch', event => {
+    const pathname = new URL(event.request.url).pathname;
+    // API calls always go to the server (HTTP cache + ETag revalidation handle freshness)
+    if (pathname.startsWith('/api/')) {
+        return;
+    }
+    if (pathname === SNAPSHOT_MANIFEST) {
+        serveManifest(event);
+        return;
+    }
+    if (pathname.startsWith('/snapshots/')) {
+        serveSnapshot(event);
+        return;
+    }
+
     event.respondWith(
         caches.match(event.request)
             .then(response => {
@@ -54,7 +119,7 @@ self.addEventListener('fetch', event => {
 
 // Update Service Worker
 self.addEventListener('activate', event => {
-    const cacheWhitelist = [CACHE_NAME];
+    const cacheWhitelist = [CACHE_NAME, SNAPSHOT_CACHE];
 
     event.waitUntil(
         caches.keys().then(cacheNames => {
@@ -0,0 +1,98 @@
+# Instantanés versionnés du screener, servis à l'ouverture de l'application
+#
+# Chaque résultat publié est écrit une fois en JSON compact, avec ses versions
+# pré-compressées (.gz, et .br si le module brotli est installé) : le serveur envoie le
+# fichier déjà compressé, sans recompresser à chaque requête. Le nom du fichier contient
+# l'empreinte du contenu, il ne change jamais : il peut être gardé en cache indéfiniment.
+# latest.json (toujours revalidé) désigne le dernier instantané et l'historique conservé.
+
+import gzip
+import hashlib
+import json
+import os
+import re
+import time
+from datetime import datetime, timezone
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+SNAPSHOT_DIR = os.environ.get("SCREENER_SNAPSHOTS", os.path.join(os.path.dirname(os.path.abspath(__file__)), "snapshots"))
+SNAPSHOT_HISTORY = 48   # instantanés conservés (une journée de passes de surveillance toutes les 5 min et plus)
+MANIFEST = "latest.json"
+SNAPSHOT_NAME = re.compile(r"^screener-[0-9TZ]+-[0-9a-f]{12}\.json$")
+# Extensions pré-compressées par ordre de préférence : (Content-Encoding, extension)
+ENCODINGS = [("br", ".br"), ("gzip", ".gz")]
+
+
+def compact_json(data):
+    return json.dumps(data, separators=(",", ":"), ensure_ascii=False).encode("utf-8")
+
+
+def _write(path, body):
+    # Écriture atomique : un lecteur ne voit jamais un fichier à moitié écrit
+    tmp = f"{path}.tmp"
+    with open(tmp, "wb") as f:
+        f.write(body)
+    os.replace(tmp, path)
+
+
+def read_manifest(directory=SNAPSHOT_DIR):
+    try:
+        with open(os.path.join(directory, MANIFEST), "rb") as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None
+
+
+def publish_snapshot(results, extra=None, directory=SNAPSHOT_DIR, history=SNAPSHOT_HISTORY, now=None):
+    # Écrit un nouvel instantané si les résultats ont changé ; renvoie le manifeste
+    version = hashlib.sha1(compact_json(results)).hexdigest()[:12]
+    manifest = read_manifest(directory)
+    if manifest is not None and manifest["version"] == version:
+        return manifest
+
+    os.makedirs(directory, exist_ok=True)
+    created = datetime.fromtimestamp(now or time.time(), tz=timezone.utc)
+    name = f"screener-{created.strftime('%Y%m%dT%H%M%SZ')}-{version}.json"
+    body = compact_json({"version": version, "created": created.isoformat(), "count": len(results),
+                         **(extra or {}), "results": results})
+    path = os.path.join(directory, name)
+    _write(path + ".gz", gzip.compress(body, 9, mtime=0))
+    if brotli is not None:
+        _write(path + ".br", brotli.compress(body))
+    _write(path, body)
+
+    entry = {"version": version, "file": name, "created": created.isoformat(), "count": len(results),
+             "bytes": len(body)}
+    previous = manifest["history"] if manifest is not None else []
+    kept = [entry] + previous[:history - 1]
+    manifest = {**entry, "history": kept}
+    _write(os.path.join(directory, MANIFEST), compact_json(manifest))
+
+    # Suppression des instantanés sortis de l'historique (et des fichiers orphelins)
+    keep = {e["file"] for e in kept}
+    for filename in os.listdir(directory):
+        base = filename
+        for _, ext in ENCODINGS:
+            base = base[:-len(ext)] if base.endswith(ext) else base
+        if SNAPSHOT_NAME.match(base) and base not in keep:
+            os.remove(os.path.join(directory, filename))
+    return manifest
+
+
+def snapshot_file(name, accept_encoding="", directory=SNAPSHOT_DIR):
+    # (chemin, Content-Encoding ou None) de la meilleure variante acceptée par le client ;
+    # None si le nom n'est pas celui d'un instantané existant
+    if name != MANIFEST and not SNAPSHOT_NAME.match(name):
+        return None
+    path = os.path.join(directory, name)
+    if not os.path.isfile(path):
+        return None
+    accepted = {token.split(";")[0].strip() for token in accept_encoding.split(",")}
+    for encoding, ext in ENCODINGS:
+        if encoding in accepted and os.path.isfile(path + ext):
+            return path + ext, encoding
+    return path, None
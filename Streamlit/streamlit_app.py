@@ -1,13 +1,33 @@
 # app.py
 
 import streamlit as st
-from tradingview_screener import Query, col
 import pandas as pd
 import numpy as np
-import yfinance as yf
 import matplotlib.pyplot as plt
 from datetime import datetime, timedelta
 import mplfinance as mpf
+import hashlib
+import json
+import os
+import sys
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from engine.backtest import load_benchmark, thin_series
+from engine.indicator_cache import INDICATOR_CACHE
+from engine.panel import run_panel_backtest
+from engine.portfolio import simulate_portfolio
+from engine.providers import provider_bar_cache, provider_from_env
+from engine.rules import RuleError, parse_rule
+from engine.signals import EXIT_RULE
+from engine.vwap import vwap_series
+
+# Durée de vie (s) des données de marché gardées entre les reruns
+SCREEN_TTL = 300
+BARS_TTL = 600
 
 # ========================
 # Config Streamlit
@@ -18,205 +38,136 @@ st.title("🚀 Stock Market Screener & Backtest")
 # ========================
 # Fonctions techniques
 # ========================
-def fetch_5m_data(tickers, start, end):
-    df = yf.download(tickers, start=start, end=end, interval="5m",
-                     group_by="ticker", threads=True, auto_adjust=False)
-    if not isinstance(df.columns, pd.MultiIndex):
-        df = pd.concat({tickers[0]: df}, axis=1)
-    return df
-
-def split_by_ticker(df_multi):
-    return {t: df_multi[t].rename(columns=str.lower) for t in df_multi.columns.levels[0]}
-
-def get_df5(ticker, start, end):
-    df5_all = fetch_5m_data([ticker], start, end)
-    df5 = split_by_ticker(df5_all)[ticker]
-    df5.index = pd.to_datetime(df5.index)
-    return df5.dropna(subset=["open", "high", "low", "close", "volume"])
-
-def ema(series, period): return series.ewm(span=period, adjust=False).mean()
-
-def atr(df, period=14):
-    high_low = df["high"] - df["low"]
-    high_close = (df["high"] - df["close"].shift()).abs()
-    low_close = (df["low"] - df["close"].shift()).abs()
-    ranges = pd.concat([high_low, high_close, low_close], axis=1)
-    return ranges.max(axis=1).rolling(period, min_periods=period).mean()
-
-def detect_keybars(df, atr_length, atr_mult, vol_avg_length, min_body_pct):
-    atr_val = atr(df, atr_length)
-    vol_ma = df["volume"].rolling(vol_avg_length).mean()
-    range_candle = df["high"] - df["low"]
-    body_size = (df["close"] - df["open"]).abs()
-    body_pct = body_size / range_candle * 100
-    return (
-        (range_candle > atr_mult * atr_val) &
-        (df["volume"] > 1.5 * vol_ma) &
-        (body_pct > min_body_pct)
-    )
+@st.cache_resource
+def get_provider():
+    # TradingView + Yahoo, ou le fournisseur choisi par MARKET_DATA (voir engine/providers.py)
+    return provider_from_env()
+
+@st.cache_resource
+def get_bar_cache():
+    # Cache disque partagé entre les reruns : seules les séances absentes sont téléchargées
+    return provider_bar_cache(get_provider())
+
+@st.cache_data(ttl=SCREEN_TTL, show_spinner=False)
+def screen_symbol(symbol):
+    # (dernier cours, dernier VWAP 5m) d'un symbole ; None sans barre du jour. Gardé
+    # SCREEN_TTL s : relancer le screening ne refait pas les requêtes au fournisseur
+    raw = get_provider().intraday([symbol])
+    if symbol not in raw.columns.get_level_values(0):
+        return None
+    intraday = raw[symbol].dropna(subset=['Close'])
+    if intraday.empty:
+        return None
+    return float(intraday['Close'].iloc[-1]), float(vwap_series(intraday['Close'], intraday['Volume']).iloc[-1])
 
-def compute_rrs(df, price_change_length, atr_length):
-    # Exemple simple : prix > plus bas sur price_change_length ET ATR > moyenne ATR_length
-    rrs_price = df["close"] > df["low"].rolling(price_change_length).min()
-    rrs_atr = atr(df, atr_length) > atr(df, atr_length).mean()
-    return rrs_price & rrs_atr
-
-def compute_relative_volume(df, n_day_avg, highlight_thres, soft_highlight_thres):
-    avg_vol = df["volume"].rolling(n_day_avg).mean()
-    rvol = df["volume"] / avg_vol
-    return (rvol > highlight_thres) | (rvol > soft_highlight_thres)
-
-def signal_checklist_long(df, checklist_long):
-    filters = []
-    if checklist_long["Aligned relative strength filter"]:
-        filters.append(df["close"] > ema(df["close"], 30))
-    if checklist_long["RRS 30m crossover 0"]:
-        filters.append(df["close"].diff(6) > 0)
-    if checklist_long["Keybar VWAP breakout"]:
-        vwap = (df["close"] * df["volume"]).cumsum() / df["volume"].cumsum()
-        filters.append(df["close"] > vwap)
-    if checklist_long["Red to green strike"]:
-        filters.append(df["close"] > df["open"])
-    if checklist_long["HA Bullish reversal"]:
-        filters.append(df["close"] > df["open"])
-    if checklist_long["Bullish thrust"]:
-        filters.append(df["close"].pct_change() > 0.01)
-    if checklist_long["ATR trailing stop bullish cross"]:
-        filters.append(df["close"] > ema(df["close"], 14))
-    if checklist_long["Breakout of HOD[1]"]:
-        filters.append(df["close"] > df["high"].shift(1))
-    # Combine tous les filtres cochés en logique OR
-    if filters:
-        return np.logical_or.reduce(filters)
-    else:
-        return pd.Series(False, index=df.index)
-    
-def compute_signals(
-    df,
-    keybar_atr_length,
-    keybar_atr_mult,
-    keybar_vol_avg_length,
-    keybar_min_body_pct,
-    rrs_price_change_length,
-    rrs_atr_length,
-    rvol_n_day_avg,
-    rvol_highlight_thres,
-    rvol_soft_highlight_thres,
-    checklist_long,
-    volume_sma_check,
-    volume_sma_length
-):
-    keybar = detect_keybars(df, keybar_atr_length, keybar_atr_mult, keybar_vol_avg_length, keybar_min_body_pct)
-    rrs_ok = compute_rrs(df, rrs_price_change_length, rrs_atr_length)
-    checklist_ok = signal_checklist_long(df, checklist_long)
-    # Volume logic : OR between volume SMA and relative volume
-    vol_sma = df["volume"].rolling(volume_sma_length).mean() if volume_sma_check else pd.Series(0, index=df.index)
-    volume_ok = (df["volume"] > vol_sma)
-    rvol_ok = compute_relative_volume(df, rvol_n_day_avg, rvol_highlight_thres, rvol_soft_highlight_thres)
-    # Combine volume_ok OR rvol_ok
-    volume_final = volume_ok | rvol_ok
-    # Final entry logic: keybar AND rrs_ok AND (volume_ok OR rvol_ok) AND checklist_ok
-    long_entry = keybar & rrs_ok & volume_final & checklist_ok
-    # Bearish reversal: close < open (simplified, adapt if you want Heikin Ashi or other)
-    long_exit = df["close"] < df["open"]
-    return long_entry.fillna(False), long_exit.fillna(False)
-
-def build_trade_log(
-    df, long_entry, long_exit, ticker,
-    profit_pct, profit_amount,
-    nATRPeriod, nATRMultip,
-    enable_profit_target
-):
-    trades = []
-    in_pos = False
-    entry_time = None
-    entry_price = None
-    atr_stop = None
-    atr_custom = atr(df, nATRPeriod)
-    for i, ts in enumerate(df.index):
-        price = df["close"].iloc[i]
-        if not in_pos and long_entry.iloc[i]:
-            in_pos = True
-            entry_time = ts
-            entry_price = price
-            atr_stop = price - nATRMultip * atr_custom.iloc[i]
-        elif in_pos:
-            atr_stop = max(atr_stop, price - nATRMultip * atr_custom.iloc[i])
-            reached_profit_pct = (price / entry_price - 1.0) * 100.0 >= profit_pct if enable_profit_target else False
-            reached_profit_amount = (price - entry_price) >= profit_amount if enable_profit_target else False
-            if long_exit.iloc[i] or price < atr_stop or reached_profit_pct or reached_profit_amount:
-                exit_time = ts
-                exit_price = price
-                pnl_pct = (exit_price / entry_price - 1.0) * 100.0
-                trades.append({
-                    "ticker": ticker,
-                    "entry_time": entry_time,
-                    "entry_price": entry_price,
-                    "exit_time": exit_time,
-                    "exit_price": exit_price,
-                    "pnl_%": pnl_pct,
-                    "duration": exit_time - entry_time
-                })
-                in_pos = False
-    return pd.DataFrame(trades)
-
-def equity_curve(df, trades_df):
-    equity = pd.Series(initial_capital, index=df.index, dtype=float)
-    cash = initial_capital
-    in_pos = False
-    entry_price = None
-    alloc_value = 0.0
-    entries_idx = set(trades_df["entry_time"]) if not trades_df.empty else set()
-    exits_idx = set(trades_df["exit_time"]) if not trades_df.empty else set()
-    for ts in df.index:
-        price = df.at[ts, "close"]
-        if (ts in entries_idx) and not in_pos:
-            in_pos = True
-            entry_price = price
-            alloc_value = cash * (alloc_pct / 100.0) * leverage
-        unrealized = alloc_value * (price / entry_price - 1.0) if in_pos else 0.0
-        if (ts in exits_idx) and in_pos:
-            realized = alloc_value * (price / entry_price - 1.0)
-            cash += realized
-            in_pos = False
-            entry_price = None
-            alloc_value = 0.0
-            unrealized = 0.0
-        equity.at[ts] = cash + unrealized
-    return equity
-
-def compute_metrics(trades_df, equity):
-    if trades_df.empty:
-        return {"trades": 0, "winrate_%": 0, "avg_win_%": 0,
-                "avg_loss_%": 0, "total_pnl_%": 0, "max_drawdown_%": 0}
-    wins = trades_df["pnl_%"] > 0
-    alloc_value = initial_capital * (alloc_pct / 100.0) * leverage
-
-    return {
-        "trades": len(trades_df),
-        "winrate_%": round(wins.mean() * 100, 2),
-        "avg_win_$": round(trades_df.loc[wins, "pnl_%"].mean() / 100 * alloc_value if wins.any() else 0, 2),
-        # "avg_win_%": round(trades_df.loc[wins, "pnl_%"].mean() if wins.any() else 0, 2),
-        "avg_loss_$": round(trades_df.loc[~wins, "pnl_%"].mean() / 100 * alloc_value if (~wins).any() else 0, 2),
-        # "avg_loss_%": round(trades_df.loc[~wins, "pnl_%"].mean() if (~wins).any() else 0, 2),
-        "total_pnl_$": round(equity.iloc[-1] - equity.iloc[0], 2),
-        "total_pnl_%": round((equity.iloc[-1] / equity.iloc[0] - 1.0) * 100, 2),
-        "max_drawdown_%": round((equity / equity.cummax() - 1.0).min() * 100, 2)
-    }
+
+# ========================
+# Backtests en arrière-plan
+# ========================
+class BacktestJob:
+    def __init__(self, key, tickers, start, end, params):
+        self.key = key
+        self.tickers = tickers
+        self.start = start
+        self.end = end
+        self.params = params
+        self.stage = "En attente"
+        self.progress = 0.0
+        self.future = None
+
+
+class BacktestRunner:
+    # Un backtest à la fois dans un thread : chaque rerun de Streamlit reste immédiat et
+    # l'application affiche la progression. Les barres compactes (et SPY) de chaque
+    # (tickers, début, fin) restent en mémoire BARS_TTL s avec leurs panels et signaux
+    # (engine.panel) : changer nATRMultip ne relance que la simulation des trades
+    def __init__(self, bar_cache, max_entries=4):
+        self.bar_cache = bar_cache
+        self.max_entries = max_entries
+        self.executor = ThreadPoolExecutor(max_workers=1)
+        self.bars = OrderedDict()   # (tickers, début, fin) -> (heure de chargement, barres, SPY)
+        self._lock = threading.Lock()
+
+    def load_bars(self, tickers, start, end):
+        key = (tuple(tickers), start, end)
+        with self._lock:
+            entry = self.bars.get(key)
+            if entry is not None and time.time() - entry[0] < BARS_TTL:
+                self.bars.move_to_end(key)
+                return entry[1], entry[2]
+        bars = self.bar_cache.get_compact(list(tickers), start, end)
+        # SPY lu une fois pour les RRS réelles de tous les tickers (approximations si indisponible)
+        benchmark = load_benchmark(self.bar_cache, start, end)
+        with self._lock:
+            self.bars[key] = (time.time(), bars, benchmark)
+            self.bars.move_to_end(key)
+            while len(self.bars) > self.max_entries:
+                self.bars.popitem(last=False)
+        return bars, benchmark
+
+    def submit(self, key, tickers, start, end, params):
+        job = BacktestJob(key, tickers, start, end, params)
+        job.future = self.executor.submit(self._run, job)
+        return job
+
+    def _run(self, job):
+        job.stage = "Barres 5m"
+        bars, benchmark = self.load_bars(job.tickers, job.start, job.end)
+
+        # Mode panel : signaux et trades de tous les tickers calculés ensemble. Pour
+        # l'affichage, seuls un aperçu des chandeliers et une courbe de capital réduite
+        # sont conservés par ticker
+        job.stage, job.progress = "Signaux et trades", 0.2
+        all_metrics = {}
+        all_trades = {}
+        results = run_panel_backtest(bars, job.params, benchmark,
+                                     progress=lambda done, total: setattr(job, "progress", 0.2 + 0.6 * done / total))
+        for ticker, (trades_df, equity, metrics) in results.items():
+            if trades_df.empty:
+                continue
+            all_metrics[ticker] = metrics
+            all_trades[ticker] = (bars.preview(ticker), trades_df, thin_series(equity))
+
+        # Compte unique : capital partagé, positions simultanées limitées par alloc_pct et leverage
+        portfolio = None
+        if all_metrics:
+            job.stage, job.progress = "Portefeuille", 0.8
+            _, pf_equity, _, pf_metrics = simulate_portfolio(bars, job.params, benchmark)
+            portfolio = (pf_metrics, pf_equity)
+        job.progress = 1.0
+        return {
+            "metrics": all_metrics,
+            "trades": all_trades,
+            "portfolio": portfolio,
+            "bar_cache": self.bar_cache.stats(),
+            "indicators": INDICATOR_CACHE.stats(),
+        }
+
+
+@st.cache_resource
+def get_backtest_runner():
+    return BacktestRunner(get_bar_cache())
+
+
+def params_key(*values):
+    # Empreinte d'une demande de backtest (tickers, dates, paramètres)
+    return hashlib.sha1(json.dumps(values, sort_keys=True, default=str).encode()).hexdigest()
 
 def plot_trades_and_equity(df, trades_df, equity, ticker):
     if trades_df.empty:
         st.write(f"{ticker}: Aucun trade à afficher.")
         return
 
-    # Préparation des signaux d'achat/vente
+    # Préparation des signaux d'achat/vente, placés sur le chandelier qui contient la barre
+    # (df peut être un aperçu regroupé, voir CompactBars.preview)
     buys = pd.Series(np.nan, index=df.index)
     sells = pd.Series(np.nan, index=df.index)
-    for _, r in trades_df.iterrows():
-        if r["entry_time"] in df.index:
-            buys[r["entry_time"]] = df.at[r["entry_time"], "low"] * 0.995
-        if r["exit_time"] in df.index:
-            sells[r["exit_time"]] = df.at[r["exit_time"], "high"] * 1.005
+    entries = df.index.searchsorted(trades_df["entry_time"], side="right") - 1
+    exits = df.index.searchsorted(trades_df["exit_time"], side="right") - 1
+    for i in entries[entries >= 0]:
+        buys.iloc[i] = df["low"].iloc[i] * 0.995
+    for i in exits[exits >= 0]:
+        sells.iloc[i] = df["high"].iloc[i] * 1.005
 
     # Création des sous-colonnes pour afficher les deux graphiques côte à côte
     col1, col2 = st.columns(2)
@@ -271,33 +222,20 @@ with st.sidebar.expander("Paramètres screening", expanded=False):
 # ========================
 # Fonction de récupération des tickers
 # ========================
-@st.cache_data
+@st.cache_data(ttl=SCREEN_TTL)
 def get_tickers(
     price_min, price_max, market_cap_min, avg_volume_min,
     volume_min, change_min, relative_volume_min,
     use_sma50, use_sma100, use_sma200
 ):
-    query = Query().select('name', 'close', 'volume', 'relative_volume_10d_calc').where(
-        col('type') == 'stock',
-        col('exchange').isin(['NASDAQ', 'NYSE']),
-        col('close').between(price_min, price_max),
-        col('market_cap_basic') >= market_cap_min,
-        col('average_volume_30d_calc') > avg_volume_min,
-        col('volume') > volume_min,
-        col('change') > change_min,
-        col('relative_volume') > relative_volume_min,
-    )
-
-    # Conditions SMA activées selon les checkboxes
-    if use_sma50:
-        query = query.where(col('SMA50') < col('close'))
-    if use_sma100:
-        query = query.where(col('SMA100') < col('close'))
-    if use_sma200:
-        query = query.where(col('SMA200') < col('close'))
-
-    tickers = query.order_by('volume', ascending=False).limit(100).get_scanner_data()
-    df = tickers[1]
+    # Critères du screener envoyés au fournisseur (TradingView, ou appliqués hors ligne)
+    sma = [length for length, used in ((50, use_sma50), (100, use_sma100), (200, use_sma200)) if used]
+    criteria = {
+        "price_min": price_min, "price_max": price_max, "market_cap_min": market_cap_min,
+        "avg_volume_min": avg_volume_min, "volume_min": volume_min, "change_min": change_min,
+        "relative_volume_min": relative_volume_min, "sma": sma,
+    }
+    df = get_provider().scan(['name', 'close', 'volume', 'relative_volume_10d_calc'], limit=100, criteria=criteria)
     return df['name'].tolist()
 
 # ========================
@@ -311,24 +249,22 @@ if st.button("🔍 Lancer le screening LONG"):
         use_sma50, use_sma100, use_sma200
     )
     results = []
+    progress = st.progress(0.0)
 
-    for symbol in tickers_list:
+    for i, symbol in enumerate(tickers_list):
+        progress.progress((i + 1) / len(tickers_list), text=f"{symbol} ({i + 1}/{len(tickers_list)})")
         try:
-            ticker = yf.Ticker(symbol)
-            price = ticker.info.get('currentPrice', 0)
-            intraday = ticker.history(period='1d', interval='5m')
-            if intraday.empty:
-                continue
-            vwap = (intraday['Close'] * intraday['Volume']).cumsum() / intraday['Volume'].cumsum()
-           # Filtre VWAP activé ou désactivé
-            if use_vwap_filter:
-                if price >= vwap.iloc[-1]:
-                    results.append({'ticker': symbol})
-            else:
-                results.append({'ticker': symbol})
+            screened = screen_symbol(symbol)
         except Exception:
             continue
+        if screened is None:
+            continue
+        price, vwap = screened
+        # Filtre VWAP activé ou désactivé
+        if not use_vwap_filter or price >= vwap:
+            results.append({'ticker': symbol})
 
+    progress.empty()
     st.session_state['df_screened'] = pd.DataFrame(results)
 
 # 🔹 Toujours afficher le screening s'il existe déjà
@@ -390,54 +326,116 @@ with st.sidebar.expander("Paramètres de la stratégie", expanded=False):
         "Breakout of HOD[1]": st.checkbox("Breakout of HOD[1]", value=True),
     }
 
+    st.subheader("Règles personnalisées")
+    entry_rule = st.text_input("Règle d'entrée (remplace la checklist)", value="",
+                               help="Ex. close > ema(30) and rvol(5) > 1.5 (langage : engine/rules.py)")
+    exit_rule = st.text_input("Règle de sortie", value=EXIT_RULE)
+    rules_ok = True
+    for label, rule in (("d'entrée", entry_rule), ("de sortie", exit_rule)):
+        try:
+            if rule:
+                parse_rule(rule)
+        except RuleError as e:
+            st.error(f"Règle {label} invalide : {e}")
+            rules_ok = False
+
 # ========================
 # Backtest multi-titres
 # ========================
-if 'df_screened' in st.session_state and not st.session_state['df_screened'].empty:
-    if st.button("Lancer le backtest LONG"):
-        df = st.session_state['df_screened']
-        start_date = (datetime.today() - timedelta(days=lookback_days)).strftime('%Y-%m-%d')
-        end_date = datetime.today().strftime('%Y-%m-%d')
-        all_metrics = {}
-        all_trades = {}
+@st.fragment(run_every=0.5)
+def backtest_progress():
+    # Seul ce bloc est réexécuté pendant le calcul ; à la fin, un rerun affiche les résultats
+    job = st.session_state.get('backtest_job')
+    if job is None:
+        return
+    if not job.future.done():
+        st.progress(job.progress, text=f"⏳ Backtest en cours : {job.stage}...")
+        return
+    try:
+        result, error = job.future.result(), None
+    except Exception as e:
+        result, error = None, f"{type(e).__name__}: {e}"
+    st.session_state['backtest_job'] = None
+    st.session_state['backtest'] = {"key": job.key, "result": result, "error": error}
+    st.rerun()
+
+
+@st.fragment
+def ticker_analysis(all_trades):
+    # Changer de ticker ne redessine que ce bloc
+    ticker = st.selectbox("Analyse d'un ticker", list(all_trades))
+    df_price, trades_df, equity = all_trades[ticker]
+    st.write(trades_df)
+    plot_trades_and_equity(df_price, trades_df, equity, ticker)
+
+
+def show_backtest(backtest, current_key):
+    if backtest["error"] is not None:
+        st.error(f"❌ Backtest impossible : {backtest['error']}")
+        return
+    if backtest["key"] != current_key:
+        st.caption("Résultats des paramètres précédents, nouveau calcul en cours.")
+    result = backtest["result"]
+    cache_stats, indicator_stats = result["bar_cache"], result["indicators"]
+    st.caption(f"Cache barres 5m : {cache_stats['hits']} séances lues sur disque, "
+               f"{cache_stats['misses']} téléchargées · Indicateurs : {indicator_stats['hits']} réutilisés, "
+               f"{indicator_stats['misses']} calculés")
+    if not result["metrics"]:
+        st.write("Aucun trade sur la période.")
+        return
 
-        for ticker in df['ticker'].tolist():
-            df_price = get_df5(ticker, start_date, end_date)
-            long_entry, long_exit = compute_signals(
-                df_price,
-                keybar_atr_length,
-                keybar_atr_mult,
-                keybar_vol_avg_length,
-                keybar_min_body_pct,
-                rrs_price_change_length,
-                rrs_atr_length,
-                rvol_n_day_avg,
-                rvol_highlight_thres,
-                rvol_soft_highlight_thres,
-                checklist_long,
-                volume_sma_check,
-                volume_sma_length
-            )
-            trades_df = build_trade_log(
-                df_price, long_entry, long_exit, ticker,
-                profit_pct, profit_amount,
-                nATRPeriod, nATRMultip,
-                enable_profit_target
-            )
-            if trades_df.empty:
-                continue
-            equity = equity_curve(df_price, trades_df)
-            metrics = compute_metrics(trades_df, equity)
-            all_metrics[ticker] = metrics
-            all_trades[ticker] = (df_price, trades_df, equity)
+    st.subheader("Récapitulatif global positions LONG")
+    st.dataframe(pd.DataFrame(result["metrics"]).T)
 
-        if all_metrics:
-            st.subheader("Récapitulatif global positions LONG")
-            st.dataframe(pd.DataFrame(all_metrics).T)
+    st.subheader("Portefeuille (capital partagé)")
+    pf_metrics, pf_equity = result["portfolio"]
+    st.dataframe(pd.DataFrame([pf_metrics]))
+    st.line_chart(pd.DataFrame({"Capital": pf_equity}))
+    st.area_chart(pd.DataFrame({"Drawdown (%)": (pf_equity / pf_equity.cummax() - 1.0) * 100}))
 
-        for ticker, (df_price, trades_df, equity) in all_trades.items():
-            with st.expander(f"Analyse : {ticker}", expanded=False):
-                st.write(trades_df)
-                plot_trades_and_equity(df_price, trades_df, equity, ticker)
+    ticker_analysis(result["trades"])
 
 
+if 'df_screened' in st.session_state and not st.session_state['df_screened'].empty:
+    tickers = st.session_state['df_screened']['ticker'].tolist()
+    start_date = (datetime.today() - timedelta(days=lookback_days)).strftime('%Y-%m-%d')
+    end_date = datetime.today().strftime('%Y-%m-%d')
+    params = {
+        "initial_capital": initial_capital,
+        "alloc_pct": alloc_pct,
+        "leverage": leverage,
+        "enable_profit_target": enable_profit_target,
+        "profit_pct": profit_pct,
+        "profit_amount": profit_amount,
+        "keybar_atr_length": keybar_atr_length,
+        "keybar_atr_mult": keybar_atr_mult,
+        "keybar_vol_avg_length": keybar_vol_avg_length,
+        "keybar_min_body_pct": keybar_min_body_pct,
+        "volume_sma_check": volume_sma_check,
+        "volume_sma_length": volume_sma_length,
+        "rrs_price_change_length": rrs_price_change_length,
+        "rrs_atr_length": rrs_atr_length,
+        "rvol_n_day_avg": rvol_n_day_avg,
+        "rvol_highlight_thres": rvol_highlight_thres,
+        "rvol_soft_highlight_thres": rvol_soft_highlight_thres,
+        "nATRPeriod": nATRPeriod,
+        "nATRMultip": nATRMultip,
+        "checklist_long": checklist_long,
+        "entry_rule": entry_rule,
+        "exit_rule": exit_rule,
+    }
+    key = params_key(tickers, start_date, end_date, params)
+    backtest = st.session_state.get('backtest')
+    job = st.session_state.get('backtest_job')
+
+    # Après un premier backtest, toute modification des paramètres relance le calcul :
+    # barres, panels et signaux déjà en mémoire sont réutilisés
+    launch = st.button("Lancer le backtest LONG")
+    if job is None and rules_ok and (launch or (backtest is not None and backtest["key"] != key)):
+        job = get_backtest_runner().submit(key, tickers, start_date, end_date, params)
+        st.session_state['backtest_job'] = job
+
+    if job is not None:
+        backtest_progress()
+    if backtest is not None:
+        show_backtest(backtest, key)
@@ -0,0 +1,90 @@
+# Parité et micro-benchmark de la courbe de capital : ancienne boucle (df.at / equity.at
+# par horodatage) contre engine/equity.py.
+#
+#   python benchmarks/bench_equity_curve.py [--days 30] [--repeat 20]
+
+import argparse
+import os
+import sys
+import time
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from engine import trades  # noqa: E402
+from engine.equity import equity_curve  # noqa: E402
+from engine.indicators import atr  # noqa: E402
+from bench_trade_log import synthetic_bars  # noqa: E402
+
+
+def legacy_equity_curve(df, trades_df, initial_capital, alloc_pct, leverage):
+    # Copie de l'ancienne boucle de Streamlit/streamlit_app.py (paramètres du compte passés
+    # explicitement au lieu d'être lus dans les globales du script)
+    equity = pd.Series(initial_capital, index=df.index, dtype=float)
+    cash = initial_capital
+    in_pos = False
+    entry_price = None
+    alloc_value = 0.0
+    entries_idx = set(trades_df["entry_time"]) if not trades_df.empty else set()
+    exits_idx = set(trades_df["exit_time"]) if not trades_df.empty else set()
+    for ts in df.index:
+        price = df.at[ts, "close"]
+        if (ts in entries_idx) and not in_pos:
+            in_pos = True
+            entry_price = price
+            alloc_value = cash * (alloc_pct / 100.0) * leverage
+        unrealized = alloc_value * (price / entry_price - 1.0) if in_pos else 0.0
+        if (ts in exits_idx) and in_pos:
+            realized = alloc_value * (price / entry_price - 1.0)
+            cash += realized
+            in_pos = False
+            entry_price = None
+            alloc_value = 0.0
+            unrealized = 0.0
+        equity.at[ts] = cash + unrealized
+    return equity
+
+
+def make_case(days, seed, entry_rate=0.05):
+    df = synthetic_bars(days, seed)
+    rng = np.random.default_rng(seed)
+    long_entry = pd.Series(rng.random(len(df)) < entry_rate, index=df.index)
+    long_exit = df["close"] < df["open"]
+    trades_df = trades.trades_from_signals(df, long_entry, long_exit, atr(df, 14), "SYN", 1.0, 50, 2.0, True)
+    return df, trades_df
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--days", type=int, default=30)
+    parser.add_argument("--repeat", type=int, default=20)
+    args = parser.parse_args()
+
+    for seed in range(20):
+        for entry_rate in (0.0, 0.01, 0.2):
+            df, trades_df = make_case(args.days, seed, entry_rate)
+            for account in ((10_000, 10, 1), (25_000, 100, 5)):
+                old = legacy_equity_curve(df, trades_df, *account)
+                new = equity_curve(df, trades_df, *account)
+                pd.testing.assert_series_equal(old, new, check_exact=True)
+    print("✅ Parité vérifiée (20 séries x 3 densités de trades x 2 comptes)")
+
+    df, trades_df = make_case(args.days, 0)
+    t0 = time.perf_counter()
+    for _ in range(args.repeat):
+        legacy_equity_curve(df, trades_df, 10_000, 10, 1)
+    t_old = (time.perf_counter() - t0) / args.repeat
+
+    t0 = time.perf_counter()
+    for _ in range(args.repeat):
+        equity_curve(df, trades_df, 10_000, 10, 1)
+    t_new = (time.perf_counter() - t0) / args.repeat
+
+    print(f"{len(df)} barres ({args.days} jours 5m), {len(trades_df)} trades")
+    print(f"  boucle .at : {t_old * 1000:8.2f} ms")
+    print(f"  moteur     : {t_new * 1000:8.2f} ms  ({t_old / t_new:.0f}x)")
+
+
+if __name__ == "__main__":
+    main()
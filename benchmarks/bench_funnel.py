@@ -0,0 +1,84 @@
+# Entonnoir du screener : pré-filtre TradingView (VWAP, plus bas du jour) avant Yahoo.
+#
+#   python benchmarks/bench_funnel.py [--symbols 3000] [--margins 0 0.005 0.01]
+#
+# Séances 5m synthétiques ; les colonnes TradingView sont calculées sur les mêmes barres
+# avec la définition de TradingView (VWAP du prix typique (H+B+C)/3), différente de celle
+# du screener (close 5m). Le fournisseur Yahoo est rejoué avec une latence par requête
+# comme dans bench_screener_vwap.py. Mesures : symboles restants et durée par étape, et
+# faux négatifs (actions écartées par le pré-filtre qui auraient passé le test Yahoo).
+
+import argparse
+import os
+import sys
+import time
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "PWA"))
+from generate_data import Funnel, prefilter, screen_vwap  # noqa: E402
+
+SESSION = pd.date_range("2024-01-02 09:30", periods=78, freq="5min", tz="America/New_York")
+
+
+class SessionProvider:
+    def __init__(self, n, latency, per_symbol_latency, seed=11):
+        rng = np.random.default_rng(seed)
+        self.latency = latency
+        self.per_symbol_latency = per_symbol_latency
+        self.sessions = {}
+        rows = []
+        for i in range(n):
+            symbol = f"S{i:04d}"
+            close = rng.uniform(25, 250) * np.exp(np.cumsum(rng.normal(0.0001, 0.003, len(SESSION))))
+            high = close * (1 + rng.uniform(0, 0.004, len(SESSION)))
+            low = close * (1 - rng.uniform(0, 0.004, len(SESSION)))
+            volume = rng.integers(1_000, 200_000, len(SESSION)).astype(float)
+            self.sessions[symbol] = pd.DataFrame({"Close": close, "Volume": volume}, index=SESSION)
+            typical = (high + low + close) / 3
+            rows.append({
+                "ticker": f"NASDAQ:{symbol}", "name": symbol, "close": close[-1], "volume": int(volume.sum()),
+                "change": rng.uniform(0, 8), "relative_volume_10d_calc": rng.uniform(1.2, 4),
+                "VWAP": (typical * volume).sum() / volume.sum(), "low": low.min(),
+            })
+        self.scan = pd.DataFrame(rows).sort_values("volume", ascending=False).reset_index(drop=True)
+
+    def download(self, symbols):
+        time.sleep(self.latency + self.per_symbol_latency * len(symbols))
+        return pd.concat({s: self.sessions[s] for s in symbols}, axis=1)
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--symbols", type=int, default=3000)
+    parser.add_argument("--margins", type=float, nargs="+", default=[0.0, 0.005, 0.01])
+    parser.add_argument("--latency", type=float, default=0.3, help="latence par requête Yahoo (s)")
+    parser.add_argument("--per-symbol-latency", type=float, default=0.002, help="coût par symbole (s)")
+    args = parser.parse_args()
+
+    provider = SessionProvider(args.symbols, args.latency, args.per_symbol_latency)
+    t0 = time.perf_counter()
+    exact = screen_vwap(provider.scan, download=provider.download)
+    t_full = time.perf_counter() - t0
+    passed = {row["ticker"] for row in exact}
+    print(f"Sans pré-filtre : {args.symbols} -> {len(exact)} actions, étape Yahoo {t_full:.2f} s")
+
+    print(f"{'marge':>6} {'pré-filtre':>11} {'VWAP TV':>8} {'plus bas':>9} {'Yahoo':>7} {'temps':>7} {'gain':>6} {'faux nég.':>10}")
+    for margin in args.margins:
+        funnel = Funnel(verbose=False)
+        funnel.record("TradingView", len(provider.scan))
+        df_tv, removed = prefilter(provider.scan, margin)
+        funnel.record("Pré-filtre", len(df_tv), removed)
+        results = screen_vwap(df_tv, download=provider.download)
+        funnel.record("VWAP Yahoo", len(results))
+        kept = {row["ticker"] for row in results}
+        assert kept <= passed
+        t_stage = funnel.stages[2]["seconds"] + funnel.stages[1]["seconds"]
+        reasons = list(removed.values())
+        print(f"{margin * 100:>5.1f}% {len(df_tv):>11} {reasons[0]:>8} {reasons[1]:>9} {len(results):>7} "
+              f"{t_stage:>6.2f}s {t_full / t_stage:>5.1f}x {len(passed - kept):>10}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,153 @@
+# Mémoire du backtest Streamlit : DataFrame float64 par ticker contre barres compactes
+# (engine/bars.py) et résultats réduits pour l'affichage.
+#
+#   python benchmarks/bench_memory.py [--tickers 500] [--days 30]
+#
+# Le cache de barres est d'abord rempli (séances synthétiques, cours arrondis en float32
+# comme ceux de Yahoo) ; chaque variante tourne ensuite dans son propre processus pour
+# mesurer son pic de mémoire résidente (ru_maxrss) :
+#   avant : get_many -> {ticker: DataFrame}, all_trades garde (barres, trades, capital)
+#   après : get_compact -> CompactBars, all_trades garde (aperçu, trades, capital réduit)
+#   après, sans cache : idem avec INDICATOR_CACHE_MAX_BYTES=0
+# Les métriques des variantes doivent être identiques.
+#
+# Le pic comprend le cache des indicateurs (engine/indicator_cache.py, 256 Mo par défaut) :
+# panels des groupes de tickers, signaux et valeurs intermédiaires des règles y restent
+# pour les reruns Streamlit et les balayages. La colonne « cache » donne sa taille en fin
+# de run ; la variante sans cache montre le pic du calcul seul.
+
+import argparse
+import json
+import os
+import resource
+import subprocess
+import sys
+import tempfile
+import time
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from bench_panel_backtest import PARAMS  # noqa: E402
+from engine.backtest import thin_series  # noqa: E402
+from engine.bar_cache import BarCache  # noqa: E402
+from engine.indicator_cache import INDICATOR_CACHE  # noqa: E402
+from engine.panel import run_panel_backtest  # noqa: E402
+from engine.portfolio import simulate_portfolio  # noqa: E402
+
+START = "2024-01-02"
+
+
+def synthetic_download(symbols, start, end, interval):
+    # Même format que yf.download(group_by='ticker') ; cours en simple précision
+    sessions = pd.bdate_range(start, pd.Timestamp(end) - pd.Timedelta(days=1))
+    frames = {}
+    for symbol in symbols:
+        rng = np.random.default_rng(int(symbol[1:]))
+        index = pd.DatetimeIndex(np.concatenate([
+            pd.date_range(d + pd.Timedelta(hours=9, minutes=30), periods=78, freq="5min").values for d in sessions
+        ])).tz_localize("America/New_York")
+        n = len(index)
+        close = rng.uniform(20, 300) * np.exp(np.cumsum(rng.normal(0, 0.003, n)))
+        open_ = np.r_[close[0], close[:-1]] * (1 + rng.normal(0, 0.001, n))
+        high = np.maximum(open_, close) * (1 + rng.uniform(0, 0.003, n))
+        low = np.minimum(open_, close) * (1 - rng.uniform(0, 0.003, n))
+        frames[symbol] = pd.DataFrame({
+            "Open": open_, "High": high, "Low": low, "Close": close,
+            "Volume": rng.integers(1_000, 2_000_000, n).astype(float),
+        }, index=index).astype({"Open": np.float32, "High": np.float32, "Low": np.float32, "Close": np.float32})
+    return pd.concat(frames, axis=1).astype(float)
+
+
+def rss_kb():
+    with open("/proc/self/status") as f:
+        for line in f:
+            if line.startswith("VmRSS:"):
+                return int(line.split()[1])
+    return 0
+
+
+def deep_size(value):
+    if isinstance(value, (pd.DataFrame, pd.Series)):
+        return int(np.sum(value.memory_usage(deep=True)))
+    if isinstance(value, (tuple, list)):
+        return sum(deep_size(v) for v in value)
+    return 0
+
+
+def child(mode, root, tickers, end):
+    baseline = rss_kb()
+    cache = BarCache(root, download=synthetic_download)
+    symbols = [f"T{k:03d}" for k in range(tickers)]
+    t0 = time.perf_counter()
+    if mode == "avant":
+        bars = cache.get_many(symbols, START, end)
+        bars_bytes = sum(deep_size(df) for df in bars.values())
+    else:
+        bars = cache.get_compact(symbols, START, end)
+        bars_bytes = bars.nbytes
+
+    all_metrics = {}
+    all_trades = {}
+    for ticker, (trades_df, equity, metrics) in run_panel_backtest(bars, PARAMS).items():
+        if trades_df.empty:
+            continue
+        all_metrics[ticker] = metrics
+        if mode == "avant":
+            all_trades[ticker] = (bars[ticker], trades_df, equity)
+        else:
+            all_trades[ticker] = (bars.preview(ticker), trades_df, thin_series(equity))
+    _, _, _, portfolio = simulate_portfolio(bars, PARAMS)
+    elapsed = time.perf_counter() - t0
+
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    print(json.dumps({
+        "baseline": baseline, "peak": peak, "elapsed": elapsed, "bars": bars_bytes,
+        "kept": deep_size(list(all_trades.values())), "cache": INDICATOR_CACHE.bytes,
+        "metrics": all_metrics, "portfolio": portfolio,
+    }, default=str))
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--tickers", type=int, default=500)
+    parser.add_argument("--days", type=int, default=30)
+    parser.add_argument("--child")
+    parser.add_argument("--root")
+    args = parser.parse_args()
+    end = (pd.bdate_range(START, periods=args.days)[-1] + pd.Timedelta(days=1)).date().isoformat()
+    if args.child:
+        child(args.child, args.root, args.tickers, end)
+        return
+
+    with tempfile.TemporaryDirectory() as root:
+        t0 = time.perf_counter()
+        BarCache(root, download=synthetic_download).get_records([f"T{k:03d}" for k in range(args.tickers)], START, end)
+        print(f"Cache rempli : {args.tickers} tickers × {args.days} séances ({time.perf_counter() - t0:.1f} s)")
+
+        runs = {}
+        for name, mode, cache_bytes in [("avant", "avant", None), ("après", "après", None),
+                                        ("après, sans cache", "après", "0")]:
+            env = dict(os.environ)
+            if cache_bytes is not None:
+                env["INDICATOR_CACHE_MAX_BYTES"] = cache_bytes
+            out = subprocess.run(
+                [sys.executable, __file__, "--child", mode, "--root", root,
+                 "--tickers", str(args.tickers), "--days", str(args.days)],
+                capture_output=True, text=True, check=True, env=env)
+            runs[name] = json.loads(out.stdout.strip().splitlines()[-1])
+
+    for run in runs.values():
+        assert run["metrics"] == runs["avant"]["metrics"]
+        assert run["portfolio"] == runs["avant"]["portfolio"]
+    print(f"✅ Métriques identiques ({len(runs['avant']['metrics'])} tickers avec trades, portefeuille inclus)")
+    print(f"{'':18} {'pic RSS':>10} {'dont calcul':>12} {'barres':>10} {'résultats gardés':>17} {'cache':>9} {'temps':>7}")
+    for name, run in runs.items():
+        print(f"{name:18} {run['peak'] / 1024:>8.0f} Mo {(run['peak'] - run['baseline']) / 1024:>9.0f} Mo "
+              f"{run['bars'] / 2**20:>7.1f} Mo {run['kept'] / 2**20:>14.1f} Mo {run['cache'] / 2**20:>6.0f} Mo "
+              f"{run['elapsed']:>6.1f}s")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,110 @@
+# Parité et benchmark du backtest panel (engine/panel.py) contre la boucle ticker par
+# ticker de Streamlit (un téléchargement + run_backtest par ticker).
+#
+#   python benchmarks/bench_panel_backtest.py [--days 30] [--tickers 5 20 100] [--latency 0.3]
+#
+# --latency simule le temps d'une requête Yahoo : la boucle en fait une par ticker,
+# le panel une seule pour tous les tickers.
+
+import argparse
+import os
+import sys
+import time
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from bench_trade_log import synthetic_bars  # noqa: E402
+from engine import trades  # noqa: E402
+from engine.backtest import DEFAULT_PARAMS, run_backtest  # noqa: E402
+from engine.indicator_cache import INDICATOR_CACHE  # noqa: E402
+from engine.panel import run_panel_backtest  # noqa: E402
+
+# Seuils assouplis pour que les séries synthétiques produisent des trades
+PARAMS = {
+    **DEFAULT_PARAMS,
+    "keybar_atr_length": 20,
+    "keybar_atr_mult": 0.5,
+    "keybar_vol_avg_length": 20,
+    "keybar_min_body_pct": 30.0,
+    "profit_pct": 0.5,
+    "nATRMultip": 1.0,
+}
+
+
+def make_bars(tickers, days):
+    bars = {f"T{k:03d}": synthetic_bars(days, k) for k in range(tickers)}
+    # Un ticker coté seulement depuis le milieu de la période (introduction en bourse)
+    late = bars["T001"]
+    bars["T001"] = late.iloc[len(late) // 2:]
+    return bars
+
+
+def with_gaps(bars):
+    # Un ticker avec des barres manquantes en cours de séance (suspension, trous de données) :
+    # ses indicateurs doivent ignorer ces lignes du panel, comme run_backtest sur ses barres
+    gappy = bars["T003"]
+    drop = [k for k in (len(gappy) // 3, len(gappy) // 3 + 1, len(gappy) // 3 + 2, len(gappy) // 2) if k < len(gappy)]
+    return {**bars, "T003": gappy.drop(gappy.index[drop])}
+
+
+def check_parity(days):
+    bars = with_gaps(make_bars(12, days))
+    total = 0
+    for checklist in [DEFAULT_PARAMS["checklist_long"], {k: False for k in DEFAULT_PARAMS["checklist_long"]}]:
+        for volume_sma_check in [False, True]:
+            params = {**PARAMS, "checklist_long": checklist, "volume_sma_check": volume_sma_check}
+            panel = run_panel_backtest(bars, params)
+            for ticker, df in bars.items():
+                trades_df, equity, metrics = run_backtest(df, ticker, params)
+                p_trades, p_equity, p_metrics = panel[ticker]
+                assert len(trades_df) == len(p_trades), (ticker, len(trades_df), len(p_trades))
+                if len(trades_df):
+                    pd.testing.assert_frame_equal(trades_df, p_trades, check_exact=True)
+                pd.testing.assert_series_equal(equity, p_equity, check_exact=True, check_names=False)
+                assert metrics == p_metrics, (ticker, metrics, p_metrics)
+                total += len(trades_df)
+    assert total > 0
+    print(f"✅ Parité panel / ticker par ticker vérifiée ({total} trades, 4 jeux de paramètres, ticker à trous compris)")
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--days", type=int, default=30)
+    parser.add_argument("--tickers", type=int, nargs="+", default=[5, 20, 100])
+    parser.add_argument("--latency", type=float, default=0.3, help="secondes simulées par requête Yahoo")
+    args = parser.parse_args()
+
+    check_parity(args.days)
+    # Première passe hors chronométrage (compilation numba le cas échéant)
+    run_panel_backtest(make_bars(2, 2), PARAMS)
+
+    kernel = "numba" if trades._scan_compiled is not None else "Python/NumPy"
+    print(f"{args.days} jours de barres 5m, latence simulée {args.latency} s par requête, noyau {kernel}")
+    print(f"{'tickers':>8} {'boucle':>10} {'panel':>10} {'gain':>6}   (calcul seul : boucle / panel)")
+    for n in args.tickers:
+        bars = make_bars(n, args.days)
+
+        INDICATOR_CACHE.clear()
+        t0 = time.perf_counter()
+        for ticker, df in bars.items():
+            time.sleep(args.latency)
+            run_backtest(df, ticker, PARAMS)
+        t_loop = time.perf_counter() - t0
+
+        INDICATOR_CACHE.clear()
+        t0 = time.perf_counter()
+        time.sleep(args.latency)
+        run_panel_backtest(bars, PARAMS)
+        t_panel = time.perf_counter() - t0
+
+        compute_loop = t_loop - n * args.latency
+        compute_panel = t_panel - args.latency
+        print(f"{n:>8} {t_loop:>9.2f}s {t_panel:>9.2f}s {t_loop / t_panel:>5.1f}x"
+              f"   ({compute_loop:.2f} s / {compute_panel:.2f} s)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,73 @@
+# Parité et passage à l'échelle du simulateur de portefeuille (engine/portfolio.py)
+#
+#   python benchmarks/bench_portfolio.py [--days 30] [--tickers 50 100 300]
+#
+# Parité : un seul ticker = equity_curve à l'identique ; capital non contraint
+# (alloc_pct × tickers <= 100) = mêmes trades que le backtest ticker par ticker, y compris
+# pour un ticker à barres manquantes ; un ticker sans aucun cours est ignoré.
+
+import argparse
+import os
+import sys
+import time
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from bench_panel_backtest import PARAMS, make_bars, with_gaps  # noqa: E402
+from engine import portfolio  # noqa: E402
+from engine.backtest import run_backtest  # noqa: E402
+from engine.indicator_cache import INDICATOR_CACHE  # noqa: E402
+
+
+def check_parity(days):
+    bars = with_gaps(make_bars(12, days))
+    for ticker, df in list(bars.items())[:4]:   # T003 : barres manquantes en cours de séance
+        trades_df, equity, _, _ = portfolio.simulate_portfolio({ticker: df}, PARAMS)
+        ref_trades, ref_equity, _ = run_backtest(df, ticker, PARAMS)
+        pd.testing.assert_frame_equal(trades_df.drop(columns="notional"), ref_trades, check_exact=True)
+        pd.testing.assert_series_equal(equity, ref_equity, check_exact=True)
+
+    params = {**PARAMS, "alloc_pct": 100 / len(bars)}
+    trades_df, _, _, metrics = portfolio.simulate_portfolio(bars, params)
+    ref = pd.concat([run_backtest(df, t, params)[0] for t, df in bars.items()])
+    order = ["ticker", "entry_time"]
+    pd.testing.assert_frame_equal(
+        trades_df.drop(columns="notional").sort_values(order).reset_index(drop=True),
+        ref.sort_values(order).reset_index(drop=True), check_exact=True, check_dtype=False)
+    assert metrics["skipped_entries"] == 0
+
+    # Un ticker sans aucun cours (colonne vide du panel) ne change rien
+    quiet = bars["T000"].assign(**{f: np.nan for f in ("open", "high", "low", "close", "volume")})
+    with_quiet = portfolio.simulate_portfolio({**bars, "VIDE": quiet}, params)[0]
+    pd.testing.assert_frame_equal(with_quiet, trades_df, check_exact=True)
+    assert portfolio.simulate_portfolio({"VIDE": quiet}, params)[0].empty
+    print(f"✅ Parité vérifiée (un ticker = equity_curve, capital non contraint = {len(ref)} trades identiques, "
+          f"ticker à trous et ticker sans cours compris)")
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--days", type=int, default=30)
+    parser.add_argument("--tickers", type=int, nargs="+", default=[50, 100, 300])
+    args = parser.parse_args()
+
+    check_parity(20)
+    kernel = "numba" if portfolio._simulate_compiled is not None else "Python"
+    print(f"{args.days} jours de barres 5m, noyau {kernel}")
+    print(f"{'tickers':>8} {'barres':>9} {'total':>8} {'µs/barre':>9} {'trades':>7} {'refusés':>8} {'max pos.':>8}")
+    for n in args.tickers:
+        bars = make_bars(n, args.days)
+        INDICATOR_CACHE.clear()
+        t0 = time.perf_counter()
+        _, _, _, metrics = portfolio.simulate_portfolio(bars, PARAMS)
+        elapsed = time.perf_counter() - t0
+        count = sum(len(df) for df in bars.values())
+        print(f"{n:>8} {count:>9} {elapsed:>7.2f}s {elapsed / count * 1e6:>9.2f} {metrics['trades']:>7} "
+              f"{metrics['skipped_entries']:>8} {metrics['max_positions']:>8}")
+
+
+if __name__ == "__main__":
+    main()
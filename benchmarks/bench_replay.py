@@ -0,0 +1,154 @@
+# Charge de /api/screener contre le serveur de rejeu (engine/replay.py)
+#
+#   python benchmarks/bench_replay.py [--tickers 300] [--clients 200] [--latency 0.05]
+#                                     [--jitter 0.02] [--error-rate 0.02] [--rate-limit 100]
+#
+# Un marché synthétique est enregistré dans un dossier temporaire puis rejoué par un
+# serveur local (latence, erreurs 500 et limitation 429 configurables). Le serveur PWA
+# (PWA/server.py) est lancé dans ce processus avec MARKET_DATA=replay, un cache de barres
+# et un dossier d'instantanés temporaires, puis --clients requêtes GET /api/screener
+# simultanées sont envoyées à chaque phase :
+#   froid   : aucun résultat ni barre en cache, un seul screening doit être calculé
+#   chaud   : résultat encore frais (SCREENER_TTL), servi depuis le cache
+#   refresh : ?refresh=1, les demandes simultanées partagent un nouveau screening
+# Pour chaque phase : latences des clients (p50, p95, p99, max), statuts HTTP, requêtes
+# reçues par le service amont (scans, graphiques, 429, 500), nouvelles tentatives Yahoo
+# et succès / échecs du cache du screener.
+
+import argparse
+import contextlib
+import io
+import os
+import re
+import sys
+import tempfile
+import threading
+import time
+import urllib.error
+import urllib.request
+from concurrent.futures import ThreadPoolExecutor
+from datetime import timedelta
+
+import numpy as np
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+sys.path.insert(0, os.path.join(ROOT, "PWA"))
+from engine.replay import record, start_server  # noqa: E402
+from engine.synthetic import SyntheticProvider  # noqa: E402
+
+TODAY = "2024-03-15"   # dernière séance enregistrée (fixe : runs reproductibles)
+
+
+def counters(text, name):
+    # {étiquettes: valeur} du compteur `name` dans une page /metrics
+    values = {}
+    for labels, value in re.findall(rf"^{name}(\{{[^}}]*\}})? (\S+)$", text, re.M):
+        values[labels or ""] = float(value)
+    return values
+
+
+def upstream(replay):
+    text = replay.metrics.render()
+    totals = {"scan": 0, "chart": 0, "429": 0, "500": 0}
+    for labels, value in counters(text, "replay_requests_total").items():
+        route = re.search(r'route="(\w+)"', labels).group(1)
+        status = re.search(r'status="(\d+)"', labels).group(1)
+        totals[route] = totals.get(route, 0) + value
+        if status in ("429", "500"):
+            totals[status] += value
+    return totals
+
+
+def local(metrics):
+    text = metrics.render()
+    cache = counters(text, "screener_cache_total")
+    return {
+        "retries": sum(counters(text, "yahoo_retries_total").values()),
+        "hits": sum(v for k, v in cache.items() if 'result="hit"' in k),
+        "misses": sum(v for k, v in cache.items() if 'result="miss"' in k),
+    }
+
+
+def fire(url, clients):
+    # `clients` requêtes lancées ensemble (barrière) ; renvoie [(statut, secondes)]
+    barrier = threading.Barrier(clients)
+
+    def client(_):
+        barrier.wait()
+        started = time.perf_counter()
+        try:
+            with urllib.request.urlopen(url, timeout=600) as response:
+                response.read()
+                status = response.status
+        except urllib.error.HTTPError as e:
+            status = e.code
+        except OSError:
+            status = "connexion"
+        return status, time.perf_counter() - started
+
+    with ThreadPoolExecutor(max_workers=clients) as pool:
+        return list(pool.map(client, range(clients)))
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--tickers", type=int, default=300, help="taille du marché enregistré")
+    parser.add_argument("--clients", type=int, default=200, help="requêtes simultanées par phase")
+    parser.add_argument("--latency", type=float, default=0.05, help="latence moyenne du service amont (s)")
+    parser.add_argument("--jitter", type=float, default=0.02)
+    parser.add_argument("--error-rate", type=float, default=0.02, help="part des requêtes amont en erreur 500")
+    parser.add_argument("--rate-limit", type=float, default=100, help="requêtes amont par seconde avant 429")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        directory = os.path.join(tmp, "recording")
+        provider = SyntheticProvider(args.tickers, seed=args.seed, today=TODAY)
+        with contextlib.redirect_stdout(io.StringIO()):
+            record(provider, directory, provider.latest_session(), provider.latest_session() + timedelta(days=1))
+        replay, replay_url = start_server(directory, latency=args.latency, jitter=args.jitter,
+                                          error_rate=args.error_rate, rate_limit=args.rate_limit, seed=args.seed)
+
+        # Configuration lue à l'import de generate_data et de snapshots
+        os.environ.update(MARKET_DATA="replay", REPLAY_URL=replay_url, SCREENER_SNAPSHOTS=os.path.join(tmp, "snapshots"))
+        os.chdir(tmp)   # screener_results.json
+        import generate_data  # noqa: E402
+        import server  # noqa: E402
+        from engine.metrics import METRICS  # noqa: E402
+        from engine.providers import get_provider  # noqa: E402
+        # engine.bar_cache est déjà importé : dossier du cache de barres donné explicitement
+        generate_data.use_provider(get_provider("replay", url=replay_url), cache_root=os.path.join(tmp, "bars"))
+        server.http.server.ThreadingHTTPServer.daemon_threads = True
+        server.http.server.ThreadingHTTPServer.request_queue_size = server.LISTEN_BACKLOG
+        httpd = server.http.server.ThreadingHTTPServer(("127.0.0.1", 0), server.ScreenerRequestHandler)
+        threading.Thread(target=httpd.serve_forever, daemon=True).start()
+        url = f"http://127.0.0.1:{httpd.server_address[1]}/api/screener"
+
+        print(f"Amont : {args.tickers} symboles, latence {args.latency * 1000:.0f} ± {args.jitter * 1000:.0f} ms, "
+              f"{args.error_rate * 100:.0f} % d'erreurs, {args.rate_limit:.0f} req/s ; {args.clients} clients simultanés")
+        print(f"{'phase':<8} {'p50':>8} {'p95':>8} {'p99':>8} {'max':>8}  {'statuts':<18} {'scans':>5} "
+              f"{'graph.':>6} {'429':>5} {'500':>5} {'retries':>7} {'hits':>5} {'misses':>6}")
+        for phase, query in (("froid", ""), ("chaud", ""), ("refresh", "?refresh=1")):
+            before_up, before_local = upstream(replay), local(METRICS)
+            with contextlib.redirect_stdout(io.StringIO()), contextlib.redirect_stderr(io.StringIO()):
+                results = fire(url + query, args.clients)
+            after_up, after_local = upstream(replay), local(METRICS)
+            up = {k: after_up[k] - before_up.get(k, 0) for k in ("scan", "chart", "429", "500")}
+            here = {k: after_local[k] - before_local[k] for k in after_local}
+            latencies = np.array([seconds for _, seconds in results]) * 1000
+            statuses = {}
+            for status, _ in results:
+                statuses[status] = statuses.get(status, 0) + 1
+            print(f"{phase:<8} " + " ".join(f"{np.percentile(latencies, q):>6.0f}ms" for q in (50, 95, 99))
+                  + f" {latencies.max():>6.0f}ms  {' '.join(f'{s}×{n}' for s, n in sorted(statuses.items(), key=str)):<18} "
+                  f"{up['scan']:>5.0f} {up['chart']:>6.0f} {up['429']:>5.0f} {up['500']:>5.0f} "
+                  f"{here['retries']:>7.0f} {here['hits']:>5.0f} {here['misses']:>6.0f}")
+
+        httpd.shutdown()
+        replay.shutdown()
+        os.chdir(ROOT)
+
+
+if __name__ == "__main__":
+    main()
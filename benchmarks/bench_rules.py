@@ -0,0 +1,168 @@
+# Règles de signaux compilées (engine/rules.py)
+#
+#   python benchmarks/bench_rules.py [--tickers 100] [--days 30]
+#
+# Parité : checklist compilée = anciennes formules pandas de signal_checklist_long (un
+# filtre par case cochée, OU logique), sur un ticker et sur un panel, avec et sans
+# benchmark, pour des checklists tirées au hasard. Règles invalides (périodes non entières
+# ou non finies, constante au lieu d'une série) rejetées par RuleError ; une barre NaN ne
+# vérifie aucune comparaison, != compris.
+# Débit : variantes d'une règle (close > ema(p) and rvol(n) > seuil, comme une grille de
+# balayage) évaluées sur un panel en pandas (Series reconstruites à chaque fois), avec un
+# plan compilé par variante (indicateurs et valeurs partagés par INDICATOR_CACHE) et avec
+# un seul plan pour toutes les variantes. Nombre de nœuds avant et après déduplication.
+
+import argparse
+import itertools
+import os
+import sys
+import time
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from bench_panel_backtest import PARAMS, make_bars  # noqa: E402
+from engine.backtest import CHECKLIST_LONG  # noqa: E402
+from engine.indicator_cache import INDICATOR_CACHE  # noqa: E402
+from engine.indicators import close_ema, session_vwap, volume_sma  # noqa: E402
+from engine.panel import build_panel  # noqa: E402
+from engine.rules import Parser, RuleError, compile_rule, compile_rules, parse_rule  # noqa: E402
+from engine.signals import checklist_rule, signal_checklist_long  # noqa: E402
+from engine.timeframes import crossover, relative_strength  # noqa: E402
+
+PC_LEN, ATR_LEN = PARAMS["rrs_price_change_length"], PARAMS["rrs_atr_length"]
+
+
+def legacy_checklist(df, checklist_long, rrs=None):
+    # Ancienne version de signal_checklist_long : une Series par filtre coché
+    filters = []
+    if checklist_long["Aligned relative strength filter"]:
+        if rrs is not None:
+            filters.append((rrs("15m") > 0) & (rrs("5m") > 0))
+        else:
+            filters.append(df["close"] > close_ema(df, 30))
+    if checklist_long["RRS 30m crossover 0"]:
+        if rrs is not None:
+            filters.append(crossover(rrs("30m")))
+        else:
+            filters.append(df["close"].diff(6) > 0)
+    if checklist_long["Keybar VWAP breakout"]:
+        filters.append(df["close"] > session_vwap(df))
+    if checklist_long["Red to green strike"]:
+        filters.append(df["close"] > df["open"])
+    if checklist_long["HA Bullish reversal"]:
+        filters.append(df["close"] > df["open"])
+    if checklist_long["Bullish thrust"]:
+        filters.append(df["close"].pct_change() > 0.01)
+    if checklist_long["ATR trailing stop bullish cross"]:
+        filters.append(df["close"] > close_ema(df, 14))
+    if checklist_long["Breakout of HOD[1]"]:
+        filters.append(df["close"] > df["high"].shift(1))
+    if filters:
+        return np.logical_or.reduce(filters)
+    return df["close"].notna() & False
+
+
+def check_parity(bars, benchmark):
+    names = list(CHECKLIST_LONG)
+    rng = np.random.default_rng(3)
+    checklists = [CHECKLIST_LONG, {k: False for k in names}] + [{k: k == n for k in names} for n in names]
+    checklists += [{k: bool(b) for k, b in zip(names, rng.integers(0, 2, len(names)))} for _ in range(8)]
+    frames = list(bars.values())[:3] + [build_panel(bars)]
+    checked = 0
+    for checklist, df, spy in itertools.product(checklists, frames, [None, benchmark]):
+        rrs = None if spy is None else (lambda tf, df=df, spy=spy: relative_strength(df, spy, tf, PC_LEN, ATR_LEN))
+        expected = np.asarray(legacy_checklist(df, checklist, rrs))
+        assert np.array_equal(np.asarray(signal_checklist_long(df, checklist, rrs)), expected), checklist
+        checked += expected.size
+    print(f"✅ Checklist compilée = anciennes formules pandas ({len(checklists)} checklists, "
+          f"ticker et panel, avec et sans benchmark, {checked} valeurs)")
+
+
+def check_errors():
+    # Périodes invalides : RuleError (message à l'utilisateur), jamais une autre exception
+    invalid = ["close > ema(1e999)", "close > ema(1e999 - 1e999)", "close > ema(0 * 1e999)",
+               "rvol(-1e999) > 1", "close > ema(2.5)", "close > ema(0)", "close > ema(true)", "close > ema('5m')",
+               # Constante là où une série est attendue
+               "ema(5, 3) > 1", "prev(2) > 1", "highest(1, 3) > 0", "crossover(1)", "sma(-(2 * 3), 4) > 0",
+               "change(2) > 0"]
+    for rule in invalid:
+        try:
+            parse_rule(rule)
+        except RuleError:
+            continue
+        raise AssertionError(f"{rule} : RuleError attendue")
+    print(f"✅ Règles invalides rejetées par RuleError ({len(invalid)} règles : périodes non finies, "
+          f"constantes au lieu d'une série)")
+
+
+def check_nan(df):
+    # Début d'historique : prev(close) vaut NaN, aucune comparaison n'est vraie
+    close, previous = df["close"].to_numpy(), df["close"].shift(1).to_numpy()
+    for rule, expected in [("close != prev(close)", close != previous), ("close == prev(close)", close == previous),
+                           ("close > prev(close)", close > previous)]:
+        expected = expected & ~np.isnan(previous)
+        assert np.array_equal(compile_rule(rule).evaluate(df)[0], expected), rule
+    print("✅ Barres NaN : aucune comparaison vraie (!= compris)")
+
+
+def tree_size(node):
+    # Nœuds de l'arbre analysé, avant déduplication
+    return 1 + sum(tree_size(child) for child in node[1:] if isinstance(child, tuple))
+
+
+def variants():
+    grid = itertools.product([10, 20, 30, 50], [3, 5, 10], np.round(np.arange(1.2, 2.05, 0.1), 1))
+    return [f"close > ema({p}) and rvol({n}) > {t}" for p, n, t in grid]
+
+
+def pandas_variant(df, p, n, t):
+    # Écriture pandas directe d'une variante (sans cache : nouvelles Series à chaque appel)
+    close, volume = df["close"], df["volume"]
+    return (close > close.ewm(span=p, adjust=False).mean()) & (volume / volume.rolling(n).mean() > t)
+
+
+def timed(func):
+    INDICATOR_CACHE.clear()
+    compile_rules.cache_clear()
+    t0 = time.perf_counter()
+    result = func()
+    return time.perf_counter() - t0, result
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--tickers", type=int, default=100)
+    parser.add_argument("--days", type=int, default=30)
+    args = parser.parse_args()
+
+    bars = make_bars(args.tickers + 1, args.days)
+    benchmark = bars.pop(list(bars)[-1])
+    check_parity(dict(list(bars.items())[:6]), benchmark)
+    check_errors()
+    check_nan(next(iter(bars.values())))
+
+    panel = build_panel(bars)
+    rules = variants()
+    grid = list(itertools.product([10, 20, 30, 50], [3, 5, 10], np.round(np.arange(1.2, 2.05, 0.1), 1)))
+    t_pandas, expected = timed(lambda: [pandas_variant(panel, *combo).to_numpy() for combo in grid])
+    t_plans, separate = timed(lambda: [compile_rule(rule).evaluate(panel)[0] for rule in rules])
+    t_shared, shared = timed(lambda: compile_rules(tuple(rules)).evaluate(panel))
+    for a, b, c in zip(expected, separate, shared):
+        assert np.array_equal(a, b) and np.array_equal(a, c)
+
+    parsed = sum(tree_size(Parser(rule).parse()) for rule in rules)
+    plan = compile_rules(tuple(rules))
+    checklist = checklist_rule(CHECKLIST_LONG, benchmark=True)
+    print(f"{len(bars)} tickers × {args.days} jours, panel de {len(panel)} barres ; {len(rules)} variantes de "
+          f"« close > ema(p) and rvol(n) > seuil »")
+    print(f"  nœuds : {parsed} analysés, {len(plan)} après déduplication "
+          f"(checklist complète : {tree_size(Parser(checklist).parse())} → {len(compile_rule(checklist))})")
+    print(f"  pandas, variante par variante   : {t_pandas * 1000:8.1f} ms  ({t_pandas / len(rules) * 1000:.2f} ms / variante)")
+    print(f"  un plan compilé par variante    : {t_plans * 1000:8.1f} ms  ({t_pandas / t_plans:.1f}x)")
+    print(f"  un seul plan pour les variantes : {t_shared * 1000:8.1f} ms  ({t_pandas / t_shared:.1f}x)")
+
+
+if __name__ == "__main__":
+    main()
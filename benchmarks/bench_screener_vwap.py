@@ -0,0 +1,123 @@
+# Benchmark de l'étape VWAP du screener : boucle historique symbole par symbole
+# contre téléchargement par lots + filtre vectorisé.
+#
+# Les réponses Yahoo sont remplacées par un fournisseur enregistré : les séances 5m
+# sont générées une fois (graine fixe) puis rejouées avec une latence simulée par
+# requête, ce qui reproduit le coût dominant (aller-retour réseau) sans accès Internet.
+#
+#   python benchmarks/bench_screener_vwap.py [--sizes 100 1000 3000] [--latency 0.01]
+
+import argparse
+import os
+import sys
+import time
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "PWA"))
+from generate_data import iter_vwap_results, screen_vwap  # noqa: E402
+
+
+class RecordedProvider:
+    def __init__(self, symbols, latency, per_symbol_latency, seed=42):
+        rng = np.random.default_rng(seed)
+        index = pd.date_range("2024-01-02 09:30", periods=78, freq="5min", tz="America/New_York")
+        self.latency = latency
+        self.per_symbol_latency = per_symbol_latency
+        self.requests = 0
+        self.sessions = {}
+        for symbol in symbols:
+            start = rng.uniform(25, 250)
+            close = start * np.exp(np.cumsum(rng.normal(0, 0.002, len(index))))
+            volume = rng.integers(1_000, 200_000, len(index)).astype(float)
+            self.sessions[symbol] = pd.DataFrame({"Close": close, "Volume": volume}, index=index)
+
+    def history(self, symbol):
+        # Équivalent de yf.Ticker(symbol).history(period='1d', interval='5m')
+        self.requests += 1
+        time.sleep(self.latency + self.per_symbol_latency)
+        return self.sessions[symbol]
+
+    def download(self, symbols):
+        # Équivalent de yf.download(symbols, ..., group_by='ticker')
+        self.requests += 1
+        time.sleep(self.latency + self.per_symbol_latency * len(symbols))
+        return pd.concat({s: self.sessions[s] for s in symbols}, axis=1)
+
+
+def legacy_screen_vwap(df_tv, provider):
+    # Reproduction de l'ancienne boucle de generate_screener_data
+    final_results = []
+    for index, row in df_tv.iterrows():
+        symbol = row['name']
+        try:
+            intraday = provider.history(symbol)
+            if len(intraday) < 1:
+                continue
+            vwap_series = (intraday['Close'] * intraday['Volume']).cumsum() / intraday['Volume'].cumsum()
+            vwap_last = vwap_series.iloc[-1]
+            current_price = intraday['Close'].iloc[-1]
+            if vwap_last <= current_price:
+                final_results.append({
+                    "ticker": symbol,
+                    "price": round(current_price, 2),
+                    "volume": int(row['volume']),
+                    "change": round(row['change'], 2),
+                    "relativeVolume": round(row['relative_volume_10d_calc'], 2),
+                    "vwap": round(vwap_last, 2)
+                })
+        except Exception:
+            continue
+    return final_results
+
+
+def fake_scan(n, seed=7):
+    rng = np.random.default_rng(seed)
+    return pd.DataFrame({
+        "ticker": [f"NASDAQ:S{i:04d}" for i in range(n)],
+        "name": [f"S{i:04d}" for i in range(n)],
+        "close": rng.uniform(25, 250, n),
+        "volume": rng.integers(1_000_000, 50_000_000, n),
+        "change": rng.uniform(0, 8, n),
+        "relative_volume_10d_calc": rng.uniform(1.2, 4, n),
+    })
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--sizes", type=int, nargs="+", default=[100, 1000, 3000])
+    parser.add_argument("--latency", type=float, default=0.01, help="latence par requête (s)")
+    parser.add_argument("--per-symbol-latency", type=float, default=0.0002, help="coût par symbole (s)")
+    args = parser.parse_args()
+
+    print(f"{'symboles':>9} {'ancien (s)':>11} {'lots (s)':>9} {'gain':>7} {'1er résultat (s)':>17} {'requêtes':>14}")
+    for n in args.sizes:
+        df_tv = fake_scan(n)
+        provider = RecordedProvider(df_tv["name"], args.latency, args.per_symbol_latency)
+
+        t0 = time.perf_counter()
+        old = legacy_screen_vwap(df_tv, provider)
+        t_old = time.perf_counter() - t0
+        old_requests, provider.requests = provider.requests, 0
+
+        t0 = time.perf_counter()
+        new = screen_vwap(df_tv, download=provider.download)
+        t_new = time.perf_counter() - t0
+
+        assert old == new, "les deux chemins ne retiennent pas les mêmes symboles"
+        new_requests = provider.requests
+
+        # Temps jusqu'au premier résultat en mode flux (l'ancien chemin ne rend rien avant la fin)
+        t0 = time.perf_counter()
+        stream = iter_vwap_results(df_tv, download=provider.download)
+        next(stream, None)
+        t_first = time.perf_counter() - t0
+        stream.close()
+
+        print(f"{n:>9} {t_old:>11.2f} {t_new:>9.2f} {t_old / t_new:>6.1f}x {t_first:>17.2f} "
+              f"{old_requests:>6} -> {new_requests:<4}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,54 @@
+# Instantanés du screener (PWA/snapshots.py) : taille transférée à l'ouverture de l'application
+#
+#   python benchmarks/bench_snapshot.py [--rows 50 300 1500]
+#
+# Lignes de résultats synthétiques au format de format_results. Comparaison de l'ancien
+# screener_results.json (indent=4), du JSON compact et de ses versions pré-compressées,
+# et coût de publication d'un instantané (écriture des fichiers, une fois par screening).
+
+import argparse
+import gzip
+import json
+import os
+import sys
+import tempfile
+import time
+
+import numpy as np
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "PWA"))
+from snapshots import brotli, compact_json, publish_snapshot  # noqa: E402
+
+
+def make_rows(n, seed=5):
+    rng = np.random.default_rng(seed)
+    return [{
+        "ticker": f"NASDAQ:S{i:04d}", "price": round(float(rng.uniform(25, 250)), 2),
+        "volume": int(rng.integers(1_000_000, 80_000_000)), "change": round(float(rng.uniform(0, 9)), 2),
+        "relativeVolume": round(float(rng.uniform(1.2, 5)), 2), "vwap": round(float(rng.uniform(25, 250)), 2),
+    } for i in range(n)]
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--rows", type=int, nargs="+", default=[50, 300, 1500])
+    args = parser.parse_args()
+
+    print(f"{'lignes':>7} {'indent=4':>10} {'compact':>10} {'gzip':>9} {'brotli':>9} {'publication':>12}")
+    for n in args.rows:
+        rows = make_rows(n)
+        pretty = len(json.dumps(rows, indent=4).encode("utf-8"))
+        compact = len(compact_json(rows))
+        gz = len(gzip.compress(compact_json(rows), 9, mtime=0))
+        br = f"{len(brotli.compress(compact_json(rows))) / 1024:7.1f}Ko" if brotli is not None else f"{'-':>9}"
+        with tempfile.TemporaryDirectory() as directory:
+            t0 = time.perf_counter()
+            manifest = publish_snapshot(rows, directory=directory)
+            elapsed = time.perf_counter() - t0
+            with open(os.path.join(directory, manifest["file"]), "rb") as f:
+                assert json.load(f)["results"] == rows
+        print(f"{n:>7} {pretty / 1024:8.1f}Ko {compact / 1024:8.1f}Ko {gz / 1024:7.1f}Ko {br} {elapsed * 1000:9.1f} ms")
+
+
+if __name__ == "__main__":
+    main()
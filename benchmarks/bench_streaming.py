@@ -0,0 +1,116 @@
+# Parité et débit des indicateurs incrémentaux (engine/streaming.py)
+#
+#   python benchmarks/bench_streaming.py [--symbols 500] [--days 5]
+#
+# Parité : chaque indicateur incrémental = fonction de engine/indicators.py à l'identique,
+# et le signal d'une barre = compute_signals relancé sur les barres reçues jusque-là.
+# Débit : une nouvelle barre pour tous les symboles, incrémental contre recalcul complet.
+
+import argparse
+import os
+import sys
+import time
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from bench_panel_backtest import PARAMS, make_bars  # noqa: E402
+from bench_trade_log import synthetic_bars  # noqa: E402
+from engine import streaming  # noqa: E402
+from engine.backtest import DEFAULT_PARAMS, SIGNAL_PARAMS  # noqa: E402
+from engine.indicators import atr, ema  # noqa: E402
+from engine.panel import build_panel  # noqa: E402
+from engine.signals import compute_signals  # noqa: E402
+from engine.vwap import session_days  # noqa: E402
+
+FIELDS = ["open", "high", "low", "close", "volume"]
+
+
+def replay(indicator, *columns):
+    return np.array([indicator.update(*values) for values in zip(*columns)])
+
+
+def check_indicators():
+    for seed in range(5):
+        df = synthetic_bars(10, seed)
+        close, volume = df["close"], df["volume"]
+        days = session_days(df.index)
+        # Référence pandas : l'ancienne formule appliquée séance par séance
+        session_vwap = pd.concat([
+            (close[days == d] * volume[days == d]).cumsum() / volume[days == d].cumsum() for d in np.unique(days)
+        ])
+        cases = [
+            ("EMA", ema(close, 30), replay(streaming.Ema(30), close)),
+            ("SMA volume", volume.rolling(20).mean(), replay(streaming.RollingMean(20), volume)),
+            ("SMA close", close.rolling(50).mean(), replay(streaming.RollingMean(50), close)),
+            ("min", df["low"].rolling(12).min(), replay(streaming.RollingMin(12), df["low"])),
+            ("ATR", atr(df, 14), replay(streaming.Atr(14), df["high"], df["low"], close)),
+            ("VWAP", session_vwap, replay(streaming.Vwap(), close, volume, days)),
+        ]
+        for name, batch, incremental in cases:
+            assert np.array_equal(batch.to_numpy(), incremental, equal_nan=True), (name, seed)
+    print("✅ Indicateurs incrémentaux identiques aux calculs complets (EMA, SMA, min, ATR, VWAP)")
+
+
+def check_signals(samples=40):
+    checked = entries = 0
+    for seed in range(3):
+        df = synthetic_bars(8, seed)
+        for checklist in [DEFAULT_PARAMS["checklist_long"], {k: False for k in DEFAULT_PARAMS["checklist_long"]}]:
+            params = {**PARAMS, "checklist_long": checklist, "volume_sma_check": seed == 1}
+            state = streaming.StreamingSignals(params)
+            live = [state.update(*bar) for bar in zip(*[df[f].tolist() for f in FIELDS], session_days(df.index))]
+            rng = np.random.default_rng(seed)
+            for t in sorted(rng.choice(np.arange(30, len(df)), samples, replace=False)):
+                long_entry, long_exit = compute_signals(df.iloc[:t + 1], *[params[k] for k in SIGNAL_PARAMS])
+                assert live[t] == (bool(long_entry.iloc[-1]), bool(long_exit.iloc[-1])), (seed, t)
+                checked += 1
+            entries += sum(e for e, _ in live)
+    assert entries > 0
+    print(f"✅ Signaux barre par barre = compute_signals sur l'historique reçu ({checked} barres, {entries} entrées)")
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--symbols", type=int, default=500)
+    parser.add_argument("--days", type=int, default=5)
+    parser.add_argument("--ticks", type=int, default=20)
+    args = parser.parse_args()
+
+    check_indicators()
+    check_signals()
+
+    bars = make_bars(args.symbols, args.days + 1)
+    split = {t: len(df) - args.ticks for t, df in bars.items()}
+    history = {t: df.iloc[:split[t]] for t, df in bars.items()}
+    times = bars["T000"].index[-args.ticks:]
+    ticks = [{t: tuple(df.iloc[split[t] + k][FIELDS]) for t, df in bars.items()} for k in range(args.ticks)]
+
+    stream = streaming.SignalStream(PARAMS)
+    t0 = time.perf_counter()
+    stream.warm_up(history)
+    t_warm = time.perf_counter() - t0
+
+    t0 = time.perf_counter()
+    for time_, tick in zip(times, ticks):
+        stream.update(tick, time_)
+    t_stream = (time.perf_counter() - t0) / args.ticks
+
+    # Recalcul complet à chaque barre : compute_signals sur le panel de tout l'historique
+    t0 = time.perf_counter()
+    for k in range(3):
+        panel = build_panel({t: df.iloc[:split[t] + k + 1] for t, df in bars.items()})
+        compute_signals(panel, *[PARAMS[p] for p in SIGNAL_PARAMS])
+    t_batch = (time.perf_counter() - t0) / 3
+
+    total = sum(len(df) for df in history.values())
+    print(f"{args.symbols} symboles, {args.days} jours d'historique ({total} barres)")
+    print(f"  préchauffage incrémental : {t_warm:7.2f} s ({t_warm / total * 1e6:.1f} µs/barre)")
+    print(f"  nouvelle barre, incrémental : {t_stream * 1000:8.1f} ms")
+    print(f"  nouvelle barre, recalcul panel : {t_batch * 1000:8.1f} ms  ({t_batch / t_stream:.1f}x)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,201 @@
+# Suite de performance hors ligne sur le marché synthétique (engine/synthetic.py)
+#
+#   python benchmarks/bench_suite.py [--tickers 10 100 1000] [--days 5] [--repeat 3]
+#                                    [--json suite.json] [--baseline ancien.json] [--tolerance 0.2]
+#
+# Étapes mesurées pour chaque taille d'univers :
+#   screening : generate_screener_data complet (scan TradingView synthétique, pré-filtre,
+#               barres du jour par lots, VWAP), cache de barres vide à chaque run
+#   signaux   : compute_signals ticker par ticker
+#   trades    : build_trade_log ticker par ticker
+#   capital   : equity_curve ticker par ticker
+#   panel     : run_panel_backtest de tous les tickers
+# Latences : par run pour screening et panel, par ticker pour les trois autres (p50, p95,
+# p99). Débits en barres et en tickers par seconde, pic de mémoire Python (tracemalloc,
+# allocations NumPy comprises) mesuré sur un run séparé. Le marché synthétique est généré
+# avant les mesures : seul le traitement est chronométré.
+#
+# --json enregistre les résultats ; --baseline compare les débits à un fichier précédent
+# et sort en erreur si l'un d'eux baisse de plus de --tolerance.
+
+import argparse
+import contextlib
+import io
+import json
+import os
+import sys
+import tempfile
+import time
+import tracemalloc
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "PWA"))
+import generate_data  # noqa: E402
+from bench_panel_backtest import PARAMS  # noqa: E402
+from engine.backtest import SIGNAL_PARAMS, TRADE_PARAMS, ACCOUNT_PARAMS, build_trade_log  # noqa: E402
+from engine.bar_cache import BarCache  # noqa: E402
+from engine.equity import equity_curve  # noqa: E402
+from engine.indicator_cache import INDICATOR_CACHE  # noqa: E402
+from engine.panel import run_panel_backtest  # noqa: E402
+from engine.signals import compute_signals  # noqa: E402
+from engine.synthetic import SyntheticProvider  # noqa: E402
+
+TODAY = "2024-03-15"   # séance du screening (fixe : runs reproductibles)
+
+
+def percentiles(samples):
+    samples = np.asarray(samples)
+    return {f"p{q}": float(np.percentile(samples, q)) for q in (50, 95, 99)}
+
+
+def peak_memory(func):
+    # Pic des allocations pendant func (Mo)
+    INDICATOR_CACHE.clear()
+    tracemalloc.start()
+    try:
+        func()
+        return tracemalloc.get_traced_memory()[1] / 2**20
+    finally:
+        tracemalloc.stop()
+
+
+def screening(provider, repeat):
+    # Un cache de barres vide par run : barres « téléchargées » puis écrites sur disque,
+    # comme le premier screening après la clôture
+    bars = 0
+    samples = []
+
+    def run():
+        nonlocal bars
+        with tempfile.TemporaryDirectory() as root:
+            generate_data.use_provider(provider, cache_root=root)
+            with contextlib.redirect_stdout(io.StringIO()):
+                generate_data.generate_screener_data(funnel=generate_data.Funnel(verbose=False))
+            bars = sum(len(f) for f in generate_data.BAR_CACHE.get_many(
+                list(provider.scan()["name"]), provider.today, provider.today + pd.Timedelta(days=1)).values())
+
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        run()
+        samples.append(time.perf_counter() - t0)
+    return samples, bars, len(provider.symbols), peak_memory(run)
+
+
+def per_ticker(bars, step):
+    # step(ticker, df) chronométré ticker par ticker
+    samples = []
+    INDICATOR_CACHE.clear()
+    for ticker, df in bars.items():
+        t0 = time.perf_counter()
+        step(ticker, df)
+        samples.append(time.perf_counter() - t0)
+    total = sum(len(df) for df in bars.values())
+
+    def run():
+        for ticker, df in bars.items():
+            step(ticker, df)
+    return samples, total, len(bars), peak_memory(run)
+
+
+def backtest_stages(bars, repeat):
+    signal_args = [PARAMS[k] for k in SIGNAL_PARAMS]
+    trade_args = [PARAMS[k] for k in TRADE_PARAMS]
+    account = [PARAMS[k] for k in ACCOUNT_PARAMS]
+    signals = {t: compute_signals(df, *signal_args) for t, df in bars.items()}
+    logs = {t: build_trade_log(df, *signals[t], t, *trade_args) for t, df in bars.items()}
+    total = sum(len(df) for df in bars.values())
+
+    panel_samples = []
+    for _ in range(repeat):
+        INDICATOR_CACHE.clear()
+        t0 = time.perf_counter()
+        run_panel_backtest(bars, PARAMS)
+        panel_samples.append(time.perf_counter() - t0)
+
+    return {
+        "signaux": per_ticker(bars, lambda t, df: compute_signals(df, *signal_args)),
+        "trades": per_ticker(bars, lambda t, df: build_trade_log(df, *signals[t], t, *trade_args)),
+        "capital": per_ticker(bars, lambda t, df: equity_curve(df, logs[t], *account)),
+        "panel": (panel_samples, total, len(bars), peak_memory(lambda: run_panel_backtest(bars, PARAMS))),
+    }
+
+
+def summarize(samples, bars, tickers, memory, per_run):
+    # per_run : une latence par run (débit = médiane) ; sinon une latence par ticker (débit = somme)
+    elapsed = float(np.median(samples)) if per_run else float(np.sum(samples))
+    return {
+        "unit": "run" if per_run else "ticker", "bars": bars, "tickers": tickers, "seconds": elapsed,
+        "bars_per_s": bars / elapsed, "tickers_per_s": tickers / elapsed,
+        "latency_s": percentiles(samples), "peak_mb": memory,
+    }
+
+
+def compare(results, baseline, tolerance):
+    # Débits (tickers/s) en baisse de plus de `tolerance` par rapport à la référence
+    regressions = []
+    for size, stages in results.items():
+        for stage, current in stages.items():
+            before = baseline.get(size, {}).get(stage)
+            if before is None:
+                continue
+            ratio = current["tickers_per_s"] / before["tickers_per_s"]
+            if ratio < 1 - tolerance:
+                regressions.append((size, stage, ratio))
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--tickers", type=int, nargs="+", default=[10, 100, 1000])
+    parser.add_argument("--days", type=int, default=5, help="séances backtestées")
+    parser.add_argument("--repeat", type=int, default=3, help="runs des étapes mesurées par run")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--json", help="fichier où enregistrer les résultats")
+    parser.add_argument("--baseline", help="résultats précédents (--json) à comparer")
+    parser.add_argument("--tolerance", type=float, default=0.2, help="baisse de débit tolérée (0.2 = 20 %%)")
+    args = parser.parse_args()
+
+    end = (pd.Timestamp(TODAY) + pd.Timedelta(days=1)).date()
+    start = pd.bdate_range(end=TODAY, periods=args.days)[0].date()
+    results = {}
+    print(f"{'étape':<10} {'tickers':>7} {'barres':>8} {'unité':>6} {'p50':>9} {'p95':>9} {'p99':>9} "
+          f"{'barres/s':>10} {'tickers/s':>10} {'mémoire':>9}")
+    for n in args.tickers:
+        provider = SyntheticProvider(n, seed=args.seed, today=TODAY)
+        # Génération hors mesure : séances du screening et du backtest gardées en mémoire
+        provider.scan()
+        with tempfile.TemporaryDirectory() as root:
+            bars = BarCache(root, download=provider.history).get_many(provider.symbols, start, end)
+        bars = {t: df for t, df in bars.items() if len(df) > 0}
+
+        stages = {"screening": summarize(*screening(provider, args.repeat), per_run=True)}
+        for stage, measured in backtest_stages(bars, args.repeat).items():
+            stages[stage] = summarize(*measured, per_run=stage == "panel")
+        results[str(n)] = stages
+        for stage, r in stages.items():
+            latency = r["latency_s"]
+            print(f"{stage:<10} {n:>7} {r['bars']:>8} {r['unit']:>6} "
+                  + " ".join(f"{latency[p] * 1000:>7.1f}ms" for p in ("p50", "p95", "p99"))
+                  + f" {r['bars_per_s']:>10.0f} {r['tickers_per_s']:>10.1f} {r['peak_mb']:>6.1f} Mo")
+
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump({"days": args.days, "seed": args.seed, "results": results}, f, indent=4)
+        print(f"💾 Résultats enregistrés dans {args.json}")
+    if args.baseline:
+        with open(args.baseline) as f:
+            baseline = json.load(f)["results"]
+        regressions = compare(results, baseline, args.tolerance)
+        for size, stage, ratio in regressions:
+            print(f"⚠️  {stage} à {size} tickers : débit à {ratio * 100:.0f} % de la référence")
+        if regressions:
+            sys.exit(1)
+        print(f"✅ Aucun débit en baisse de plus de {args.tolerance * 100:.0f} % par rapport à {args.baseline}")
+
+
+if __name__ == "__main__":
+    main()
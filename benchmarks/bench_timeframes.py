@@ -0,0 +1,129 @@
+# RRS multi-unités de temps (engine/timeframes.py) : barres 15m / 30m / jour dérivées des
+# barres 5m, power index de SPY calculé une fois par run.
+#
+#   python benchmarks/bench_timeframes.py [--tickers 100] [--days 30]
+#
+# Parité : à la dernière barre 5m de chaque paquet, valeur = calcPowerIndex de la barre
+# complète (regroupement pandas + ta.rma en boucle, comme le Pine) ; calcul sur un préfixe
+# des barres = calcul complet (pas de lookahead) ; panel = ticker par ticker.
+# Coût : compute_signals sans benchmark (approximations) et avec les RRS réelles.
+
+import argparse
+import os
+import sys
+import time
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from bench_panel_backtest import PARAMS, make_bars  # noqa: E402
+from bench_trade_log import synthetic_bars  # noqa: E402
+from engine import timeframes  # noqa: E402
+from engine.backtest import SIGNAL_PARAMS, run_backtest  # noqa: E402
+from engine.indicator_cache import INDICATOR_CACHE  # noqa: E402
+from engine.panel import build_panel  # noqa: E402
+from engine.signals import compute_signals  # noqa: E402
+from engine.timeframes import TIMEFRAMES, bucket_ids, power_index  # noqa: E402
+
+PC_LEN, ATR_LEN = PARAMS["rrs_price_change_length"], PARAMS["rrs_atr_length"]
+
+
+def reference_power_index(df, timeframe):
+    # Barres complètes regroupées par pandas, puis calcPowerIndex barre par barre
+    bars = df.groupby(bucket_ids(df.index, TIMEFRAMES[timeframe])).agg({"high": "max", "low": "min", "close": "last"})
+    values = []
+    rma = None
+    seed = []
+    prev_close = None
+    for high, low, close in bars.itertuples(index=False):
+        tr = high - low if prev_close is None else max(high - low, abs(high - prev_close), abs(low - prev_close))
+        if rma is not None:
+            rma = 1.0 / ATR_LEN * tr + (1 - 1.0 / ATR_LEN) * rma
+        else:
+            seed.append(tr)
+            if len(seed) == ATR_LEN:
+                rma = sum(seed) / ATR_LEN
+        values.append(rma)
+        prev_close = close
+    closes = bars["close"].to_numpy()
+    # Historique plus court que PC_LEN (barres jour sur quelques séances) : tout en NaN
+    pc = closes - np.r_[np.full(min(PC_LEN, len(closes)), np.nan), closes[:max(len(closes) - PC_LEN, 0)]]
+    atr = np.array([np.nan if v is None else v for v in values])
+    return pc / atr
+
+
+def check_parity(bars):
+    df = next(iter(bars.values()))
+    for timeframe, minutes in TIMEFRAMES.items():
+        ids = bucket_ids(df.index, minutes)
+        last = np.r_[ids[1:] != ids[:-1], True]
+        values = power_index(df, timeframe, PC_LEN, ATR_LEN).to_numpy()
+        reference = reference_power_index(df, timeframe)
+        assert np.allclose(values[last], reference, rtol=1e-12, atol=0, equal_nan=True), timeframe
+        # Préfixe coupé au milieu d'un paquet : mêmes valeurs que le calcul complet
+        for cut in np.random.default_rng(1).integers(100, len(df), 5):
+            prefix = power_index(df.iloc[:cut].copy(), timeframe, PC_LEN, ATR_LEN).to_numpy()
+            assert np.array_equal(prefix, values[:cut], equal_nan=True), (timeframe, cut)
+
+    panel = build_panel(bars)
+    for timeframe in TIMEFRAMES:
+        values = power_index(panel, timeframe, PC_LEN, ATR_LEN)
+        for ticker, frame in bars.items():
+            expected = power_index(frame, timeframe, PC_LEN, ATR_LEN)
+            got = values[ticker].reindex(frame.index)
+            assert np.allclose(got.to_numpy(), expected.to_numpy(), rtol=1e-12, atol=0, equal_nan=True), ticker
+    print(f"✅ Power index {', '.join(TIMEFRAMES)} : barres complètes = calcul Pine, préfixe = complet, "
+          f"panel = ticker par ticker")
+
+
+def timed(func, repeat=3):
+    best = float("inf")
+    for _ in range(repeat):
+        INDICATOR_CACHE.clear()
+        t0 = time.perf_counter()
+        result = func()
+        best = min(best, time.perf_counter() - t0)
+    return best, result
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--tickers", type=int, default=100)
+    parser.add_argument("--days", type=int, default=30)
+    args = parser.parse_args()
+
+    bars = make_bars(args.tickers, args.days)
+    spy = synthetic_bars(args.days, 10_000)
+    check_parity(dict(list(bars.items())[:12]))
+
+    # Nombre de calculs du power index (le benchmark ne doit être calculé qu'une fois)
+    calls = []
+    compute = timeframes.power_index_values
+    spy_close = spy["close"].to_numpy(dtype=np.float64)
+    timeframes.power_index_values = lambda *a: calls.append(
+        a[2].shape == (len(spy), 1) and np.array_equal(a[2][:, 0], spy_close)) or compute(*a)
+
+    panel = build_panel(bars)
+    signal_args = [PARAMS[k] for k in SIGNAL_PARAMS]
+    t_plain, plain = timed(lambda: compute_signals(panel, *signal_args))
+    t_rrs, real = timed(lambda: compute_signals(panel, *signal_args, benchmark=spy))
+    calls.clear()
+    INDICATOR_CACHE.clear()
+    t0 = time.perf_counter()
+    for ticker, df in bars.items():
+        run_backtest(df, ticker, PARAMS, benchmark=spy)
+    t_loop = time.perf_counter() - t0
+    spy_calls = sum(calls)
+    timeframes.power_index_values = compute
+
+    print(f"{args.tickers} tickers × {args.days} jours, panel")
+    print(f"  compute_signals, RRS approchées : {t_plain * 1000:8.1f} ms  ({plain[0].to_numpy().sum()} entrées)")
+    print(f"  compute_signals, RRS réelles    : {t_rrs * 1000:8.1f} ms  ({real[0].to_numpy().sum()} entrées)")
+    print(f"  run_backtest ticker par ticker avec RRS : {t_loop:.2f} s, "
+          f"power index de SPY calculé {spy_calls} fois (5m, 15m, 30m), {len(calls) - spy_calls} pour les tickers")
+
+
+if __name__ == "__main__":
+    main()
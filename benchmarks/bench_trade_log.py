@@ -0,0 +1,137 @@
+# Parité et micro-benchmark du moteur de trades : ancienne boucle pandas (iloc barre par
+# barre) contre la machine à états NumPy de engine/trades.py.
+#
+#   python benchmarks/bench_trade_log.py [--days 30] [--tickers 100]
+
+import argparse
+import os
+import sys
+import time
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from engine import trades  # noqa: E402
+from engine.indicators import atr  # noqa: E402
+
+
+def legacy_build_trade_log(
+    df, long_entry, long_exit, ticker,
+    profit_pct, profit_amount,
+    nATRPeriod, nATRMultip,
+    enable_profit_target
+):
+    # Copie de la boucle historique de Streamlit/streamlit_app.py
+    trades_list = []
+    in_pos = False
+    entry_time = None
+    entry_price = None
+    atr_stop = None
+    atr_custom = atr(df, nATRPeriod)
+    for i, ts in enumerate(df.index):
+        price = df["close"].iloc[i]
+        if not in_pos and long_entry.iloc[i]:
+            in_pos = True
+            entry_time = ts
+            entry_price = price
+            atr_stop = price - nATRMultip * atr_custom.iloc[i]
+        elif in_pos:
+            atr_stop = max(atr_stop, price - nATRMultip * atr_custom.iloc[i])
+            reached_profit_pct = (price / entry_price - 1.0) * 100.0 >= profit_pct if enable_profit_target else False
+            reached_profit_amount = (price - entry_price) >= profit_amount if enable_profit_target else False
+            if long_exit.iloc[i] or price < atr_stop or reached_profit_pct or reached_profit_amount:
+                exit_time = ts
+                exit_price = price
+                pnl_pct = (exit_price / entry_price - 1.0) * 100.0
+                trades_list.append({
+                    "ticker": ticker,
+                    "entry_time": entry_time,
+                    "entry_price": entry_price,
+                    "exit_time": exit_time,
+                    "exit_price": exit_price,
+                    "pnl_%": pnl_pct,
+                    "duration": exit_time - entry_time
+                })
+                in_pos = False
+    return pd.DataFrame(trades_list)
+
+
+def synthetic_bars(days, seed):
+    rng = np.random.default_rng(seed)
+    sessions = pd.bdate_range("2024-01-02", periods=days)
+    index = pd.DatetimeIndex(np.concatenate([
+        pd.date_range(d + pd.Timedelta(hours=9, minutes=30), periods=78, freq="5min").values for d in sessions
+    ])).tz_localize("America/New_York")
+    n = len(index)
+    close = 100 * np.exp(np.cumsum(rng.normal(0, 0.003, n)))
+    open_ = np.r_[close[0], close[:-1]] * (1 + rng.normal(0, 0.001, n))
+    high = np.maximum(open_, close) * (1 + rng.uniform(0, 0.003, n))
+    low = np.minimum(open_, close) * (1 - rng.uniform(0, 0.003, n))
+    volume = rng.integers(1_000, 100_000, n).astype(float)
+    return pd.DataFrame({"open": open_, "high": high, "low": low, "close": close, "volume": volume}, index=index)
+
+
+PARAM_SETS = [
+    dict(profit_pct=1.0, profit_amount=50, nATRPeriod=14, nATRMultip=2.0, enable_profit_target=True),
+    dict(profit_pct=0.3, profit_amount=0.5, nATRPeriod=5, nATRMultip=0.5, enable_profit_target=True),
+    dict(profit_pct=1.0, profit_amount=50, nATRPeriod=14, nATRMultip=1.0, enable_profit_target=False),
+]
+
+
+def check_parity(days, seeds=20):
+    for seed in range(seeds):
+        df = synthetic_bars(days, seed)
+        rng = np.random.default_rng(1000 + seed)
+        long_entry = pd.Series(rng.random(len(df)) < 0.05, index=df.index)
+        long_exit = df["close"] < df["open"]
+        for params in PARAM_SETS:
+            old = legacy_build_trade_log(df, long_entry, long_exit, "SYN", **params)
+            new = trades.trades_from_signals(
+                df, long_entry, long_exit, atr(df, params["nATRPeriod"]), "SYN",
+                params["profit_pct"], params["profit_amount"], params["nATRMultip"],
+                params["enable_profit_target"])
+            assert len(old) == len(new), (seed, params)
+            if len(old):
+                pd.testing.assert_frame_equal(old, new, check_exact=True)
+    print(f"✅ Parité vérifiée sur {seeds} séries x {len(PARAM_SETS)} jeux de paramètres")
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--days", type=int, default=30)
+    parser.add_argument("--tickers", type=int, default=100)
+    args = parser.parse_args()
+
+    check_parity(args.days)
+
+    frames = [synthetic_bars(args.days, seed) for seed in range(args.tickers)]
+    signals = []
+    for seed, df in enumerate(frames):
+        rng = np.random.default_rng(seed)
+        signals.append((pd.Series(rng.random(len(df)) < 0.05, index=df.index), df["close"] < df["open"]))
+    params = PARAM_SETS[0]
+    atrs = [atr(df, params["nATRPeriod"]) for df in frames]
+
+    # Première passe hors chronométrage (compilation numba le cas échéant)
+    trades.trades_from_signals(frames[0], *signals[0], atrs[0], "W", 1.0, 50, 2.0, True)
+
+    t0 = time.perf_counter()
+    for df, (entry, exit_) in zip(frames, signals):
+        legacy_build_trade_log(df, entry, exit_, "T", **params)
+    t_old = time.perf_counter() - t0
+
+    t0 = time.perf_counter()
+    for df, (entry, exit_), atr_values in zip(frames, signals, atrs):
+        trades.trades_from_signals(df, entry, exit_, atr_values, "T", 1.0, 50, 2.0, True)
+    t_new = time.perf_counter() - t0
+
+    bars = sum(len(df) for df in frames)
+    kernel = "numba" if trades._scan_compiled is not None else "Python/NumPy"
+    print(f"{args.tickers} tickers x {args.days} jours ({bars} barres), noyau {kernel}")
+    print(f"  boucle iloc : {t_old:8.3f} s")
+    print(f"  moteur      : {t_new:8.3f} s  ({t_old / t_new:.0f}x)")
+
+
+if __name__ == "__main__":
+    main()
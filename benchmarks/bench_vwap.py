@@ -0,0 +1,107 @@
+# VWAP de séance (engine/vwap.py) sur un panel barres × tickers
+#
+#   python benchmarks/bench_vwap.py [--days 30] [--tickers 500]
+#
+# Parité : noyau = formule pandas appliquée séance par séance, et calcul
+# incrémental (état repris d'un appel à l'autre) = calcul complet, au bit près.
+# Débit : ancienne formule pandas (cumul sur tout l'historique, jamais remis à zéro),
+# formule pandas par séance (groupby), noyau (numba ou NumPy), puis ajout d'une barre.
+
+import argparse
+import os
+import sys
+import time
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from bench_panel_backtest import make_bars  # noqa: E402
+from engine import vwap  # noqa: E402
+from engine.panel import build_panel  # noqa: E402
+from engine.vwap import session_days, session_vwap, vwap_series  # noqa: E402
+
+
+def timed(func, repeat=3):
+    best = float("inf")
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        result = func()
+        best = min(best, time.perf_counter() - t0)
+    return best, result
+
+
+def legacy_vwap(close, volume):
+    # Ancienne formule de signal_checklist_long : cumul sur tout l'historique
+    return (close * volume).cumsum() / volume.cumsum()
+
+
+def grouped_vwap(close, volume, days):
+    # Même définition que engine.vwap en pandas (groupby par séance)
+    return (close * volume).groupby(days).cumsum() / volume.groupby(days).cumsum()
+
+
+def check_parity(panel, days):
+    close, volume = panel["close"], panel["volume"]
+    reference = pd.concat([
+        (close[days == d] * volume[days == d]).cumsum() / volume[days == d].cumsum() for d in np.unique(days)
+    ])
+    batch = vwap_series(close, volume)
+    assert np.array_equal(reference.to_numpy(), batch.to_numpy(), equal_nan=True)
+
+    # Par morceaux de taille variable (dont des coupures en milieu de séance)
+    values = []
+    state = None
+    bounds = np.r_[0, np.cumsum(np.random.default_rng(0).integers(1, 60, len(days))), len(days)]
+    bounds = bounds[bounds <= len(days)]
+    for a, b in zip(bounds[:-1], bounds[1:]):
+        chunk, state = session_vwap(close.to_numpy()[a:b], volume.to_numpy()[a:b], days[a:b], state)
+        values.append(chunk)
+    assert np.array_equal(np.concatenate(values), batch.to_numpy(), equal_nan=True)
+
+    # L'ancienne formule ne repart pas de zéro à l'ouverture : écart dès la 2e séance
+    legacy = legacy_vwap(close, volume).to_numpy()
+    first = days == days[0]
+    differs = ~np.isclose(legacy[~first], batch.to_numpy()[~first], equal_nan=True)
+    print(f"✅ Noyau = pandas séance par séance, incrémental ({len(bounds) - 1} morceaux) = complet ; "
+          f"ancienne formule fausse sur {differs.mean() * 100:.0f} % des barres après la 1re séance")
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--days", type=int, default=30)
+    parser.add_argument("--tickers", type=int, default=500)
+    args = parser.parse_args()
+
+    panel = build_panel(make_bars(args.tickers, args.days))
+    days = session_days(panel.index)
+    check_parity(panel, days)
+
+    close, volume = panel["close"], panel["volume"]
+    close_np, volume_np = close.to_numpy(), volume.to_numpy()
+    t_legacy, _ = timed(lambda: legacy_vwap(close, volume))
+    t_grouped, _ = timed(lambda: grouped_vwap(close, volume, days))
+    t_kernel, _ = timed(lambda: session_vwap(close_np, volume_np, days))
+    compiled, vwap._accumulate_compiled = vwap._accumulate_compiled, None
+    t_numpy, numpy_result = timed(lambda: session_vwap(close_np, volume_np, days))
+    vwap._accumulate_compiled = compiled
+    assert np.array_equal(numpy_result[0], session_vwap(close_np, volume_np, days)[0], equal_nan=True)
+    t_series, _ = timed(lambda: vwap_series(close, volume))
+
+    # Nouvelle barre : état repris contre recalcul de tout l'historique
+    _, state = session_vwap(close_np[:-1], volume_np[:-1], days[:-1])
+    t_update, _ = timed(lambda: session_vwap(close_np[-1:], volume_np[-1:], days[-1:], state), repeat=20)
+
+    print(f"{args.tickers} tickers × {args.days} jours ({len(panel)} horodatages, {close_np.size} cellules)")
+    print(f"  pandas, cumul global (ancien, faux)  : {t_legacy * 1000:8.1f} ms")
+    print(f"  pandas, groupby par séance           : {t_grouped * 1000:8.1f} ms")
+    kernel = "numba" if compiled is not None else "NumPy"
+    print(f"  noyau par séance ({kernel:5s})             : {t_kernel * 1000:8.1f} ms  ({t_grouped / t_kernel:.1f}x groupby)")
+    print(f"  noyau par séance sans numba          : {t_numpy * 1000:8.1f} ms")
+    print(f"  noyau + Series / DataFrame pandas    : {t_series * 1000:8.1f} ms")
+    print(f"  nouvelle barre, incrémental          : {t_update * 1000:8.3f} ms  ({t_kernel / t_update:.0f}x recalcul)")
+
+
+if __name__ == "__main__":
+    main()
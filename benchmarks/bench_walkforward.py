@@ -0,0 +1,114 @@
+# Walk-forward (engine/walkforward.py) : signaux causaux calculés une fois et découpés
+# par fenêtre, contre un backtest recalculé sur chaque période de chaque fenêtre.
+#
+#   python benchmarks/bench_walkforward.py [--tickers 20] [--days 40] [--train 10] [--test 2]
+#
+# Parité : signaux de l'historique complet = signaux recalculés sur les seules barres
+# connues à la fin de la fenêtre (aucune barre future n'est lue), donc mêmes trades.
+# Débit : calcul naïf (compute_signals sur chaque période, un processus), réutilisation
+# (un processus), puis run_walkforward sur tous les cœurs.
+
+import argparse
+import os
+import sys
+import time
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from bench_panel_backtest import PARAMS, make_bars  # noqa: E402
+from engine import walkforward  # noqa: E402
+from engine.indicator_cache import INDICATOR_CACHE  # noqa: E402
+from engine.backtest import SIGNAL_PARAMS, TRADE_PARAMS, build_trade_log  # noqa: E402
+from engine.signals import compute_signals  # noqa: E402
+from engine.sweep import expand_grid  # noqa: E402
+from engine.vwap import session_days  # noqa: E402
+
+GRID = {"keybar_atr_mult": [0.5, 0.75, 1.0], "nATRMultip": [1.0, 1.5, 2.0], "profit_pct": [0.5, 1.0]}
+
+
+def check_parity(bars, windows, combos):
+    # Fenêtres et combinaisons prises au hasard : signaux du préfixe = tranche des signaux complets
+    rng = np.random.default_rng(0)
+    checked = 0
+    for number in rng.choice(len(windows), min(4, len(windows)), replace=False):
+        _, _, (_, stop) = windows[number]
+        params = {**PARAMS, **combos[rng.integers(len(combos))]}
+        for ticker, df in bars.items():
+            b = np.searchsorted(walkforward._days[ticker], stop)
+            prefix = compute_signals(df.iloc[:b].copy(), *[params[k] for k in SIGNAL_PARAMS], causal=True)
+            full = walkforward._signals(ticker, params)
+            for p, f in zip(prefix, full):
+                assert np.array_equal(p.to_numpy(dtype=bool), f[:b]), (ticker, number)
+            checked += b
+    print(f"✅ Signaux causaux : historique complet = recalcul sur les barres connues ({checked} barres)")
+
+
+def naive_window(bars, window, combos, rank_by):
+    # Un backtest complet (signaux compris) par période, ticker et combinaison
+    def period(params, first, stop):
+        pnl = 0.0
+        for ticker, df in bars.items():
+            days = session_days(df.index)
+            piece = df.iloc[np.searchsorted(days, first):np.searchsorted(days, stop)].copy()
+            if piece.empty:
+                continue
+            long_entry, long_exit = compute_signals(piece, *[params[k] for k in SIGNAL_PARAMS], causal=True)
+            trades_df = build_trade_log(piece, long_entry, long_exit, ticker, *[params[k] for k in TRADE_PARAMS])
+            pnl += trades_df["pnl_%"].sum() if len(trades_df) else 0.0
+        return pnl
+
+    _, (train_start, train_stop), (test_start, test_stop) = window
+    best = max(combos, key=lambda combo: period({**PARAMS, **combo}, train_start, train_stop))
+    return period({**PARAMS, **best}, test_start, test_stop)
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--tickers", type=int, default=20)
+    parser.add_argument("--days", type=int, default=40)
+    parser.add_argument("--train", type=int, default=10)
+    parser.add_argument("--test", type=int, default=2)
+    parser.add_argument("--workers", type=int, default=None)
+    args = parser.parse_args()
+
+    bars = make_bars(args.tickers, args.days)
+    combos = list(expand_grid(GRID))
+    sessions = np.unique(np.concatenate([session_days(df.index) for df in bars.values()]))
+    windows = walkforward.session_windows(sessions, args.train, args.test)
+    walkforward._init_worker(bars, PARAMS, combos)
+    check_parity(bars, windows, combos)
+    # Caches vidés : la réutilisation part à froid, comme un processus de run_walkforward
+    walkforward._cache.clear()
+    INDICATOR_CACHE.clear()
+
+    t0 = time.perf_counter()
+    for window in windows:
+        naive_window(bars, window, combos, "total_pnl_$")
+    t_naive = time.perf_counter() - t0
+
+    t0 = time.perf_counter()
+    sequential = [walkforward._run_window(window, "total_pnl_$") for window in windows]
+    t_reuse = time.perf_counter() - t0
+
+    config = {"grid": GRID, "train_days": args.train, "test_days": args.test, "base": {
+        k: v for k, v in PARAMS.items() if k not in GRID}}
+    t0 = time.perf_counter()
+    records, summary = walkforward.run_walkforward(config, bars=bars, workers=args.workers)
+    t_parallel = time.perf_counter() - t0
+    assert records == [r[0] for r in sequential]
+    assert summary["test"] == walkforward.aggregate(sequential, PARAMS, len(bars))
+
+    walkforward.print_report(records, summary)
+    print(f"\n{args.tickers} tickers × {args.days} séances, {len(windows)} fenêtres × {len(combos)} combinaisons")
+    print(f"  recalcul par période (1 processus)     : {t_naive:7.1f} s")
+    print(f"  signaux réutilisés (1 processus)       : {t_reuse:7.1f} s  ({t_naive / t_reuse:.1f}x)")
+    workers = min(args.workers or os.cpu_count() or 1, len(windows))
+    label = f"run_walkforward ({workers} processus)"
+    print(f"  {label:<39}: {t_parallel:7.1f} s  ({t_naive / t_parallel:.1f}x)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,123 @@
+# Mode surveillance du screener (ScreenerWatch) contre un screening complet à chaque passe.
+#
+# Une séance 5m est rejouée barre par barre par un fournisseur simulé : la dernière barre
+# renvoyée est incomplète (volume partiel) et se complète à la passe suivante, et la
+# pré-sélection TradingView perd / gagne quelques symboles à chaque passe. Le coût d'une
+# requête = latence fixe + coût par barre renvoyée (transfert + décodage, 0,1 ms par
+# défaut : hypothèse à ajuster avec --per-bar). La colonne "barres" ne dépend d'aucune
+# hypothèse : barres téléchargées par le screening complet / par la surveillance.
+#
+#   python benchmarks/bench_watch.py [--symbols 300] [--passes 12] [--latency 0.05]
+
+import argparse
+import os
+import sys
+import time
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "PWA"))
+from generate_data import ScreenerWatch, screen_vwap  # noqa: E402
+
+SESSION = pd.date_range("2024-01-02 09:30", periods=78, freq="5min", tz="America/New_York")
+
+
+class ReplayProvider:
+    def __init__(self, symbols, latency, per_bar, seed=3):
+        rng = np.random.default_rng(seed)
+        self.latency = latency
+        self.per_bar = per_bar
+        self.cursor = 0
+        self.bars = 0
+        self.requests = 0
+        self.sessions = {}
+        for symbol in symbols:
+            close = rng.uniform(25, 250) * np.exp(np.cumsum(rng.normal(0, 0.002, len(SESSION))))
+            volume = rng.integers(1_000, 200_000, len(SESSION)).astype(float)
+            self.sessions[symbol] = (close, volume)
+
+    def now(self):
+        # Milieu de la barre en cours
+        return SESSION[self.cursor] + pd.Timedelta(minutes=2)
+
+    def _serve(self, symbols, start=None):
+        # Barres jusqu'à la barre en cours (volume partiel, cours provisoire), à partir de start
+        first = 0 if start is None else SESSION.searchsorted(start)
+        end = self.cursor + 1
+        data = {}
+        for symbol in symbols:
+            close, volume = self.sessions[symbol]
+            close, volume = close[first:end].copy(), volume[first:end].copy()
+            close[-1] *= 0.999
+            volume[-1] *= 0.4
+            data[(symbol, "Close")] = close
+            data[(symbol, "Volume")] = volume
+        rows = len(symbols) * (end - first)
+        self.requests += 1
+        self.bars += rows
+        time.sleep(self.latency + self.per_bar * rows)
+        return pd.DataFrame(data, index=SESSION[first:end])
+
+    def download(self, symbols):
+        return self._serve(symbols)
+
+    def download_since(self, symbols, start):
+        return self._serve(symbols, start)
+
+
+def universe(symbols, step, seed=11):
+    # Pré-sélection TradingView : environ 5 % des symboles entrent / sortent à chaque passe
+    rng = np.random.default_rng(seed + step)
+    kept = [s for s in symbols if rng.random() > 0.05]
+    return pd.DataFrame({
+        "name": kept,
+        "volume": rng.integers(1_000_000, 50_000_000, len(kept)),
+        "change": rng.uniform(0, 8, len(kept)),
+        "relative_volume_10d_calc": rng.uniform(1.2, 4, len(kept)),
+    }).sort_values("volume", ascending=False).reset_index(drop=True)
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--symbols", type=int, default=300)
+    parser.add_argument("--passes", type=int, default=12)
+    parser.add_argument("--latency", type=float, default=0.05, help="secondes par requête")
+    parser.add_argument("--per-bar", type=float, default=0.0001, help="secondes par barre renvoyée")
+    args = parser.parse_args()
+
+    symbols = [f"S{i:04d}" for i in range(args.symbols)]
+    watched = ReplayProvider(symbols, args.latency, args.per_bar)
+    full = ReplayProvider(symbols, args.latency, args.per_bar)
+    step = {"n": 0}
+    watch = ScreenerWatch(query=lambda: universe(symbols, step["n"]),
+                          download=watched.download, download_since=watched.download_since)
+
+    print(f"{args.symbols} symboles, {args.passes} passes de 5 min, {args.latency} s par requête")
+    print(f"{'passe':>5} {'complet':>9} {'surveillance':>13} {'barres':>14} {'+':>4} {'-':>4}")
+    t_full = t_watch = 0.0
+    for n in range(args.passes):
+        step["n"] = n
+        watched.cursor = full.cursor = 20 + n
+        full.bars = watched.bars = 0
+
+        t0 = time.perf_counter()
+        expected = screen_vwap(universe(symbols, n), download=full.download)
+        elapsed_full = time.perf_counter() - t0
+
+        t0 = time.perf_counter()
+        delta = watch.step(now=watched.now())
+        elapsed_watch = time.perf_counter() - t0
+
+        # Parité : mêmes actions, mêmes valeurs qu'un screening complet
+        assert watch.results() == sorted(expected, key=lambda r: r["volume"], reverse=True), n
+        t_full += elapsed_full
+        t_watch += elapsed_watch
+        print(f"{n + 1:>5} {elapsed_full:>8.2f}s {elapsed_watch:>12.2f}s {full.bars:>6} / {watched.bars:<6}"
+              f" {len(delta['added']):>4} {len(delta['removed']):>4}")
+    print(f"✅ Résultats identiques au screening complet à chaque passe ; "
+          f"surveillance {t_full / t_watch:.1f}x plus rapide en moyenne")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1 @@
+# Moteur commun (données, indicateurs, backtest) partagé par la PWA et l'application Streamlit
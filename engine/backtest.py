@@ -0,0 +1,210 @@
+# Pipeline de backtest LONG d'un ticker : signaux -> trades -> capital -> métriques
+
+import numpy as np
+import pandas as pd
+
+from engine import trades
+from engine.equity import equity_curve
+from engine.indicators import atr
+from engine.metrics import METRICS
+from engine.providers import provider_bar_cache
+from engine.signals import EXIT_RULE, compute_signals
+from engine.timeframes import BENCHMARK
+
+# Valeurs par défaut de la barre latérale Streamlit
+CHECKLIST_LONG = {
+    "Aligned relative strength filter": True,
+    "RRS 30m crossover 0": True,
+    "Keybar VWAP breakout": True,
+    "Red to green strike": True,
+    "HA Bullish reversal": True,
+    "Bullish thrust": True,
+    "ATR trailing stop bullish cross": True,
+    "Breakout of HOD[1]": True,
+}
+
+ACCOUNT_PARAMS = ["initial_capital", "alloc_pct", "leverage"]
+SIGNAL_PARAMS = [
+    "keybar_atr_length", "keybar_atr_mult", "keybar_vol_avg_length", "keybar_min_body_pct",
+    "rrs_price_change_length", "rrs_atr_length",
+    "rvol_n_day_avg", "rvol_highlight_thres", "rvol_soft_highlight_thres",
+    "checklist_long", "volume_sma_check", "volume_sma_length",
+    "entry_rule", "exit_rule",
+]
+EQUITY_POINTS = 500  # points max d'une courbe de capital renvoyée à l'application
+TRADE_PARAMS = ["profit_pct", "profit_amount", "nATRPeriod", "nATRMultip", "enable_profit_target"]
+
+DEFAULT_PARAMS = {
+    "initial_capital": 10_000,
+    "alloc_pct": 10,
+    "leverage": 1,
+    "enable_profit_target": True,
+    "profit_pct": 1.0,
+    "profit_amount": 50,
+    "keybar_atr_length": 390,
+    "keybar_atr_mult": 1.0,
+    "keybar_vol_avg_length": 390,
+    "keybar_min_body_pct": 75.0,
+    "volume_sma_check": False,
+    "volume_sma_length": 50,
+    "rrs_price_change_length": 12,
+    "rrs_atr_length": 12,
+    "rvol_n_day_avg": 5,
+    "rvol_highlight_thres": 1.5,
+    "rvol_soft_highlight_thres": 1.2,
+    "nATRPeriod": 14,
+    "nATRMultip": 2.0,
+    "checklist_long": CHECKLIST_LONG,
+    "entry_rule": "",             # règle engine.rules à la place de la checklist ("" : checklist)
+    "exit_rule": EXIT_RULE,
+}
+
+
+def build_trade_log(
+    df, long_entry, long_exit, ticker,
+    profit_pct, profit_amount,
+    nATRPeriod, nATRMultip,
+    enable_profit_target
+):
+    return trades.trades_from_signals(
+        df, long_entry, long_exit, atr(df, nATRPeriod), ticker,
+        profit_pct, profit_amount,
+        nATRMultip,
+        enable_profit_target
+    )
+
+
+def compute_metrics(trades_df, equity, initial_capital, alloc_pct, leverage):
+    if trades_df.empty:
+        return {"trades": 0, "winrate_%": 0, "avg_win_%": 0,
+                "avg_loss_%": 0, "total_pnl_%": 0, "max_drawdown_%": 0}
+    wins = trades_df["pnl_%"] > 0
+    alloc_value = initial_capital * (alloc_pct / 100.0) * leverage
+
+    return {
+        "trades": len(trades_df),
+        "winrate_%": round(wins.mean() * 100, 2),
+        "avg_win_$": round(trades_df.loc[wins, "pnl_%"].mean() / 100 * alloc_value if wins.any() else 0, 2),
+        # "avg_win_%": round(trades_df.loc[wins, "pnl_%"].mean() if wins.any() else 0, 2),
+        "avg_loss_$": round(trades_df.loc[~wins, "pnl_%"].mean() / 100 * alloc_value if (~wins).any() else 0, 2),
+        # "avg_loss_%": round(trades_df.loc[~wins, "pnl_%"].mean() if (~wins).any() else 0, 2),
+        "total_pnl_$": round(equity.iloc[-1] - equity.iloc[0], 2),
+        "total_pnl_%": round((equity.iloc[-1] / equity.iloc[0] - 1.0) * 100, 2),
+        "max_drawdown_%": round((equity / equity.cummax() - 1.0).min() * 100, 2)
+    }
+
+
+def stage_timer(stage):
+    # Durée d'une étape du backtest dans engine.metrics
+    return METRICS.timer("backtest_stage_seconds", "Durée de chaque étape du backtest", stage=stage)
+
+
+def run_backtest(df, ticker, params, benchmark=None):
+    # params : dictionnaire complet (voir DEFAULT_PARAMS) ; benchmark : barres 5m de SPY
+    # pour les RRS réelles (engine.timeframes), approximations si None
+    with stage_timer("signaux"):
+        long_entry, long_exit = compute_signals(df, *[params[k] for k in SIGNAL_PARAMS], benchmark=benchmark)
+    with stage_timer("trades"):
+        trades_df = build_trade_log(df, long_entry, long_exit, ticker, *[params[k] for k in TRADE_PARAMS])
+    account = [params[k] for k in ACCOUNT_PARAMS]
+    with stage_timer("capital"):
+        equity = equity_curve(df, trades_df, *account)
+    with stage_timer("métriques"):
+        metrics = compute_metrics(trades_df, equity, *account)
+    return trades_df, equity, metrics
+
+
+def combine_equity(pnl, initial_capital):
+    # Somme des sous-comptes, chaque courbe prolongée à sa dernière valeur. initial_capital :
+    # capital total des sous-comptes (pas celui d'un seul), base de total_pnl_%
+    return pd.concat(pnl, axis=1).sort_index().ffill().fillna(0.0).sum(axis=1) + initial_capital
+
+
+def thin_series(series, max_points=EQUITY_POINTS):
+    # Points régulièrement espacés, le dernier toujours conservé
+    if len(series) > max_points:
+        series = series.iloc[np.unique(np.linspace(0, len(series) - 1, max_points).round().astype(int))]
+    return series
+
+
+def downsample(series, max_points=EQUITY_POINTS):
+    # thin_series au format JSON de l'API : {"t": [ISO], "v": [valeurs]}
+    series = thin_series(series, max_points)
+    return {"t": [ts.isoformat() for ts in series.index], "v": [round(float(v), 2) for v in series.to_numpy()]}
+
+
+# ========================
+# Backtest d'un ticker (processus de travail de l'API)
+# ========================
+_bar_cache = None
+_benchmark = {}   # (début, fin) -> barres de SPY, lues une fois par processus
+
+
+def load_benchmark(cache, start, end):
+    # Barres 5m de SPY (même cache disque que les tickers) ; None si indisponibles
+    df = cache.get(BENCHMARK, start, end)
+    return df if len(df) > 0 else None
+
+
+def backtest_ticker(ticker, start, end, params):
+    # Cache de barres créé une fois par processus (fichiers .npy partagés sur disque),
+    # alimenté par le fournisseur de MARKET_DATA
+    global _bar_cache
+    if _bar_cache is None:
+        _bar_cache = provider_bar_cache()
+    with stage_timer("barres"):
+        df = _bar_cache.get(ticker, start, end)
+        if (start, end) not in _benchmark:
+            _benchmark.clear()
+            _benchmark[(start, end)] = load_benchmark(_bar_cache, start, end)
+    if df.empty:
+        raise ValueError(f"Aucune donnée pour {ticker}")
+    return run_backtest(df, ticker, params, _benchmark[(start, end)])
+
+
+def _backtest_task(ticker, start, end, params):
+    # Tâche du pool : résultat (ou exception) + métriques du processus de travail pour
+    # cette tâche, fusionnées ensuite dans le registre du serveur
+    METRICS.reset()
+    try:
+        return backtest_ticker(ticker, start, end, params), None, METRICS.snapshot()
+    except Exception as e:
+        return None, e, METRICS.snapshot()
+
+
+def backtest_tickers(tickers, start, end, params, pool, max_points=EQUITY_POINTS):
+    # Un ticker par tâche dans le pool de processus, puis agrégation des sous-comptes
+    # comme le récapitulatif Streamlit
+    futures = {t: pool.submit(_backtest_task, t, start, end, params) for t in tickers}
+    account = [params[k] for k in ACCOUNT_PARAMS]
+    result = {"tickers": {}, "errors": {}}
+    trade_frames = []
+    pnl = []
+
+    for ticker, future in futures.items():
+        try:
+            outcome, error, worker_metrics = future.result()
+        except Exception as e:
+            # Processus de travail perdu ou résultat non transmissible
+            outcome, error, worker_metrics = None, e, None
+        if worker_metrics is not None:
+            METRICS.merge(worker_metrics)
+        if error is not None:
+            METRICS.inc("backtest_failures_total", help="Tickers en échec par type d'erreur", type=type(error).__name__)
+            result["errors"][ticker] = str(error)
+            continue
+        trades_df, equity, metrics = outcome
+        result["tickers"][ticker] = {"metrics": metrics, "equity": downsample(equity, max_points)}
+        if not trades_df.empty:
+            trade_frames.append(trades_df)
+            pnl.append(equity - params["initial_capital"])
+
+    if trade_frames:
+        # Un sous-compte de initial_capital par ticker backtesté
+        equity = combine_equity(pnl, params["initial_capital"] * len(result["tickers"]))
+        result["summary"] = compute_metrics(pd.concat(trade_frames, ignore_index=True), equity, *account)
+        result["equity"] = downsample(equity, max_points)
+    else:
+        result["summary"] = compute_metrics(pd.DataFrame(), None, *account)
+        result["equity"] = {"t": [], "v": []}
+    return result
@@ -0,0 +1,266 @@
+# Cache disque des barres OHLCV intraday
+#
+# Une séance = un fichier NumPy (.npy) par (intervalle, symbole, date), relu en mémoire
+# mappée. Les séances terminées sont immuables : une fois écrites elles ne sont plus
+# jamais retéléchargées. La séance en cours n'est jamais stockée.
+
+import os
+import threading
+from datetime import date, datetime, time, timedelta
+
+import numpy as np
+import pandas as pd
+
+MARKET_TZ = "America/New_York"
+SESSION_OPEN = time(9, 30)
+SESSION_CLOSE = time(16, 5)   # barres 5m définitives quelques minutes après la clôture
+FIELDS = ["open", "high", "low", "close", "volume"]
+BAR_DTYPE = np.dtype([("time", "<i8")] + [(f, "<f8") for f in FIELDS])
+
+DEFAULT_ROOT = os.environ.get(
+    "BAR_CACHE_DIR", os.path.join(os.path.expanduser("~"), ".cache", "stock-market", "bars"))
+DEFAULT_MAX_BYTES = int(os.environ.get("BAR_CACHE_MAX_BYTES", 512 * 1024 * 1024))
+
+
+def yahoo_download(symbols, start, end, interval="5m"):
+    import yfinance as yf
+    return yf.download(symbols, start=start, end=end, interval=interval,
+                       group_by="ticker", threads=True, auto_adjust=False, progress=False)
+
+
+def to_date(value):
+    if isinstance(value, datetime):
+        return value.date()
+    if isinstance(value, date):
+        return value
+    return datetime.strptime(str(value)[:10], "%Y-%m-%d").date()
+
+
+def session_dates(start, end):
+    # Jours ouvrés de [start, end[ (les jours fériés sont mémorisés comme séances vides)
+    return [d.date() for d in pd.bdate_range(to_date(start), to_date(end) - timedelta(days=1))]
+
+
+def contiguous_spans(missing, sessions):
+    # Regroupe les séances manquantes en plages consécutives (premier, dernier)
+    position = {session: i for i, session in enumerate(sessions)}
+    spans = []
+    for session in missing:
+        if spans and position[session] == position[spans[-1][1]] + 1:
+            spans[-1] = (spans[-1][0], session)
+        else:
+            spans.append((session, session))
+    return spans
+
+
+def is_finished(session, now=None):
+    now = now or pd.Timestamp.now(tz=MARKET_TZ)
+    today = now.date()
+    return session < today or (session == today and now.time() >= SESSION_CLOSE)
+
+
+def latest_session(now=None):
+    # Dernière séance ouverte (celle que renvoie period='1d'), hors jours fériés
+    now = now or pd.Timestamp.now(tz=MARKET_TZ)
+    session = now.date() if now.time() >= SESSION_OPEN else now.date() - timedelta(days=1)
+    while session.weekday() >= 5:
+        session -= timedelta(days=1)
+    return session
+
+
+def bars_to_frame(records):
+    index = pd.to_datetime(records["time"], utc=True).tz_convert(MARKET_TZ)
+    frame = pd.DataFrame({f: records[f] for f in FIELDS}, index=pd.DatetimeIndex(index, name="Datetime"))
+    return frame
+
+
+def frame_to_bars(frame):
+    records = np.empty(len(frame), dtype=BAR_DTYPE)
+    records["time"] = frame.index.tz_convert("UTC").as_unit("ns").asi8
+    for f in FIELDS:
+        records[f] = frame[f].to_numpy(dtype=float)
+    return records
+
+
+class BarCache:
+    def __init__(self, root=DEFAULT_ROOT, max_bytes=DEFAULT_MAX_BYTES, download=yahoo_download):
+        self.root = root
+        self.max_bytes = max_bytes
+        self.download = download
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._lock = threading.RLock()
+        self._scanned = None   # chemin -> [taille, dernier accès], parcours du disque au premier usage
+
+    # ------------------------------------------------------------------
+    # Stockage
+    # ------------------------------------------------------------------
+    @property
+    def _index(self):
+        # Parcours du dossier différé : créer le cache (import de generate_data, du
+        # serveur...) ne lit pas le disque
+        if self._scanned is None:
+            with self._lock:
+                if self._scanned is None:
+                    self._scanned = self._scan()
+        return self._scanned
+
+    def _scan(self):
+        index = {}
+        for dirpath, _, filenames in os.walk(self.root):
+            for name in filenames:
+                if name.endswith(".npy"):
+                    path = os.path.join(dirpath, name)
+                    st = os.stat(path)
+                    index[path] = [st.st_size, st.st_mtime]
+        return index
+
+    def _path(self, symbol, interval, session):
+        return os.path.join(self.root, interval, symbol.replace("/", "_"), f"{session.isoformat()}.npy")
+
+    def _read(self, path):
+        try:
+            records = np.load(path, mmap_mode="r")
+        except (OSError, ValueError):
+            return None
+        with self._lock:
+            if path in self._index:
+                self._index[path][1] = datetime.now().timestamp()
+        return records
+
+    def _write(self, path, records):
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        tmp = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        with open(tmp, "wb") as f:
+            np.save(f, records)
+        os.replace(tmp, path)
+        with self._lock:
+            self._index[path] = [os.path.getsize(path), datetime.now().timestamp()]
+        self._evict()
+
+    def _evict(self):
+        # Politique LRU : on supprime les séances les moins récemment lues
+        with self._lock:
+            total = sum(size for size, _ in self._index.values())
+            if total <= self.max_bytes:
+                return
+            for path, (size, _) in sorted(self._index.items(), key=lambda item: item[1][1]):
+                if total <= self.max_bytes:
+                    break
+                try:
+                    os.remove(path)
+                except OSError:
+                    pass
+                del self._index[path]
+                total -= size
+                self.evictions += 1
+
+    def mark_empty(self, symbols, session, interval="5m"):
+        # Séance terminée sans barre constatée ailleurs (jour férié : period='1d' renvoie la
+        # séance précédente) : mémorisée vide, comme un jour férié au milieu d'une plage
+        if is_finished(session):
+            for symbol in symbols:
+                self._write(self._path(symbol, interval, session), np.empty(0, dtype=BAR_DTYPE))
+
+    def is_empty(self, symbols, session, interval="5m"):
+        # Séance mémorisée vide pour tous les symboles (sans téléchargement)
+        for symbol in symbols:
+            records = self._read(self._path(symbol, interval, session))
+            if records is None or len(records):
+                return False
+        return True
+
+    def stats(self):
+        with self._lock:
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "files": len(self._index),
+                "bytes": sum(size for size, _ in self._index.values()),
+            }
+
+    def clear(self):
+        with self._lock:
+            paths = list(self._index)
+            self._index.clear()
+        for path in paths:
+            try:
+                os.remove(path)
+            except OSError:
+                pass
+
+    # ------------------------------------------------------------------
+    # Lecture
+    # ------------------------------------------------------------------
+    def get(self, symbol, start, end, interval="5m"):
+        return self.get_many([symbol], start, end, interval)[symbol]
+
+    def get_many(self, symbols, start, end, interval="5m"):
+        return {symbol: bars_to_frame(records) for symbol, records in self.get_records(symbols, start, end, interval).items()}
+
+    def get_compact(self, symbols, start, end, interval="5m"):
+        # Toutes les barres dans un seul conteneur compact (engine.bars), sans DataFrame par symbole
+        from engine.bars import CompactBars
+        return CompactBars.from_records(self.get_records(symbols, start, end, interval))
+
+    def get_records(self, symbols, start, end, interval="5m"):
+        # {symbole: tableau BAR_DTYPE} de toutes les séances de [start, end[
+        sessions = session_dates(start, end)
+        now = pd.Timestamp.now(tz=MARKET_TZ)
+        cached = {s: {} for s in symbols}
+        spans = {}   # plage contiguë de séances manquantes (premier, dernier) -> symboles
+
+        for symbol in symbols:
+            missing = []
+            for session in sessions:
+                records = self._read(self._path(symbol, interval, session)) if is_finished(session, now) else None
+                if records is None:
+                    missing.append(session)
+                else:
+                    cached[symbol][session] = records
+            with self._lock:
+                self.hits += len(sessions) - len(missing)
+                self.misses += len(missing)
+            for span in contiguous_spans(missing, sessions):
+                spans.setdefault(span, []).append(symbol)
+
+        # Un téléchargement par plage manquante, partagé par tous les symboles concernés
+        for (first, last), group in spans.items():
+            fetched = self._fetch(group, first, last + timedelta(days=1), interval)
+            for symbol in group:
+                frame = fetched.get(symbol)
+                if frame is None:
+                    continue
+                days = frame.index.tz_convert(MARKET_TZ).date
+                for session in session_dates(first, last + timedelta(days=1)):
+                    if session in cached[symbol]:
+                        continue
+                    records = frame_to_bars(frame[days == session])
+                    cached[symbol][session] = records
+                    # Un jour sans barre n'est mémorisé que si la réponse contenait d'autres
+                    # séances (jour férié), jamais après un échec complet du téléchargement
+                    if is_finished(session, now) and (len(records) or len(frame)):
+                        self._write(self._path(symbol, interval, session), records)
+
+        result = {}
+        for symbol in symbols:
+            parts = [cached[symbol][s] for s in sessions if s in cached[symbol]]
+            result[symbol] = np.concatenate(parts) if parts else np.empty(0, dtype=BAR_DTYPE)
+        return result
+
+    def _fetch(self, symbols, start, end, interval):
+        raw = self.download(symbols, start.isoformat(), end.isoformat(), interval)
+        if raw is None or raw.empty:
+            return {}
+        if not isinstance(raw.columns, pd.MultiIndex):
+            raw = pd.concat({symbols[0]: raw}, axis=1)
+        frames = {}
+        for symbol in raw.columns.get_level_values(0).unique():
+            frame = raw[symbol].rename(columns=str.lower).dropna(subset=FIELDS)
+            frame.index = pd.to_datetime(frame.index)
+            if frame.index.tz is None:
+                frame.index = frame.index.tz_localize(MARKET_TZ)
+            frames[symbol] = frame[FIELDS]
+        return frames
@@ -0,0 +1,153 @@
+# Barres OHLCV compactes d'un ensemble de tickers (panel)
+#
+# Un seul jeu d'horodatages partagé par tous les tickers (union de leurs barres), codé
+# en jour de séance (int32) + minutes depuis l'ouverture 9h30 (int32). Un tableau
+# barres × tickers par champ, en ordre colonne : la série d'un ticker est une vue
+# contiguë, sans copie. Prix en float32 et volume en uint32, soit 20 octets par barre
+# au lieu de 48 (float64 + index datetime par ticker).
+#
+# Les cours Yahoo sont publiés en simple précision : la conversion est exacte. Elle est
+# vérifiée champ par champ ; un champ non représentable (données d'une autre source)
+# reste en float64. Le moteur calcule en float64 : to_panel élargit les barres en un
+# bloc le temps du calcul (par groupes de tickers, voir chunks), avec le même résultat
+# qu'un panel construit depuis des DataFrame.
+
+import numpy as np
+import pandas as pd
+
+from engine.bar_cache import FIELDS, MARKET_TZ
+from engine.vwap import NS_PER_DAY
+
+PRICE_FIELDS = ["open", "high", "low", "close"]
+NS_PER_MINUTE = 60 * 10**9
+SESSION_OPEN_MINUTES = 9 * 60 + 30
+DISPLAY_BARS = 300   # chandeliers conservés par ticker pour l'affichage
+
+
+def _compact(values, dtype):
+    # Conversion sans perte ou tableau float64 inchangé
+    compact = values.astype(dtype)
+    if np.array_equal(compact.astype(np.float64), values, equal_nan=True):
+        return compact
+    return values
+
+
+def _compact_volume(values, listed):
+    # Volumes entiers positifs : uint32 (0 là où le ticker n'a pas coté)
+    volume = np.where(listed, values, 0.0)
+    if np.all(volume >= 0) and np.all(volume < 2**32) and np.array_equal(volume, np.floor(volume)):
+        return np.asfortranarray(volume.astype(np.uint32))
+    return np.where(listed, values, np.nan)
+
+
+class CompactBars:
+    def __init__(self, tickers, times, values):
+        # tickers : liste ; times : horodatages UTC en ns (croissants, partagés) ;
+        # values : {champ: tableau float64 barres × tickers, NaN si pas de barre}
+        self.tickers = list(tickers)
+        self._columns = {ticker: j for j, ticker in enumerate(self.tickers)}
+        local = pd.DatetimeIndex(pd.to_datetime(times, utc=True)).tz_convert(MARKET_TZ).tz_localize(None)
+        local = local.as_unit("ns").asi8
+        if np.any(local % NS_PER_MINUTE):
+            raise ValueError("Barres intraday alignées sur la minute attendues")
+        self.days = (local // NS_PER_DAY).astype(np.int32)
+        self.minutes = ((local % NS_PER_DAY) // NS_PER_MINUTE - SESSION_OPEN_MINUTES).astype(np.int32)
+        self.listed = np.asfortranarray(~np.isnan(values["close"]))
+        self.prices = {f: np.asfortranarray(_compact(values[f], np.float32)) for f in PRICE_FIELDS}
+        self.volume = _compact_volume(values["volume"], self.listed)
+        self._index = None
+
+    @classmethod
+    def from_records(cls, records):
+        # records : {ticker: tableau BAR_DTYPE} (cache disque), sans passer par des DataFrame
+        records = {ticker: r for ticker, r in records.items() if len(r) > 0}
+        times = np.unique(np.concatenate([r["time"] for r in records.values()])) if records else np.empty(0, np.int64)
+        values = {f: np.full((len(times), len(records)), np.nan) for f in FIELDS}
+        for j, r in enumerate(records.values()):
+            rows = np.searchsorted(times, r["time"])
+            for f in FIELDS:
+                values[f][rows, j] = r[f]
+        return cls(records, times, values)
+
+    @classmethod
+    def from_frames(cls, bars):
+        # bars : {ticker: DataFrame OHLCV à index horaire}, tickers sans données exclus
+        bars = {ticker: df for ticker, df in bars.items() if len(df) > 0}
+        times = {t: df.index.tz_convert("UTC").as_unit("ns").asi8 if df.index.tz is not None
+                 else df.index.tz_localize(MARKET_TZ).tz_convert("UTC").as_unit("ns").asi8
+                 for t, df in bars.items()}
+        records = {}
+        for ticker, df in bars.items():
+            r = np.empty(len(df), dtype=[("time", "<i8")] + [(f, "<f8") for f in FIELDS])
+            r["time"] = times[ticker]
+            for f in FIELDS:
+                r[f] = df[f].to_numpy(dtype=np.float64)
+            records[ticker] = r
+        return cls.from_records(records)
+
+    def __len__(self):
+        return len(self.tickers)
+
+    def __contains__(self, ticker):
+        return ticker in self._columns
+
+    @property
+    def index(self):
+        # DatetimeIndex (heure de New York) reconstruit une fois, partagé par tous les tickers
+        if self._index is None:
+            local = (self.days.astype(np.int64) * NS_PER_DAY +
+                     (self.minutes.astype(np.int64) + SESSION_OPEN_MINUTES) * NS_PER_MINUTE)
+            self._index = pd.DatetimeIndex(local.view("datetime64[ns]"), name="Datetime").tz_localize(MARKET_TZ)
+        return self._index
+
+    @property
+    def nbytes(self):
+        arrays = [self.days, self.minutes, self.listed, self.volume, *self.prices.values()]
+        return sum(a.nbytes for a in arrays)
+
+    def column(self, field, ticker):
+        # Vue (sans copie) sur toutes les barres du panel ; NaN / 0 là où le ticker n'a pas coté
+        values = self.volume if field == "volume" else self.prices[field]
+        return values[:, self._columns[ticker]]
+
+    def frame(self, ticker):
+        # DataFrame float64 des barres du ticker (même contenu que BarCache.get)
+        listed = self.listed[:, self._columns[ticker]]
+        return pd.DataFrame({f: self.column(f, ticker)[listed].astype(np.float64) for f in FIELDS},
+                            index=self.index[listed])
+
+    def to_panel(self, tickers=None):
+        # Panel float64 (colonnes (champ, ticker)) identique à engine.panel.build_panel ;
+        # tickers : sous-ensemble, sur le même index horaire que le panel complet
+        tickers = self.tickers if tickers is None else list(tickers)
+        columns = [self._columns[ticker] for ticker in tickers]
+        m = len(tickers)
+        values = np.empty((len(self.days), len(FIELDS) * m))
+        for k, f in enumerate(FIELDS):
+            source = self.volume if f == "volume" else self.prices[f]
+            values[:, k * m:(k + 1) * m] = source[:, columns]
+        volume = values[:, FIELDS.index("volume") * m:(FIELDS.index("volume") + 1) * m]
+        volume[~self.listed[:, columns]] = np.nan
+        return pd.DataFrame(values, index=self.index, columns=pd.MultiIndex.from_product([FIELDS, tickers]))
+
+    def chunks(self, size):
+        # Tickers par groupes de `size` : un panel float64 à la fois au lieu de tout le panel
+        return [self.tickers[i:i + size] for i in range(0, len(self.tickers), size)]
+
+    def preview(self, ticker, max_bars=DISPLAY_BARS):
+        # Chandeliers regroupés par paquets de barres consécutives pour l'affichage :
+        # ouverture du premier, plus haut / plus bas du paquet, clôture du dernier
+        listed = np.flatnonzero(self.listed[:, self._columns[ticker]])
+        values = {f: self.column(f, ticker)[listed].astype(np.float64) for f in FIELDS}
+        if len(listed) == 0:
+            return pd.DataFrame(values, index=self.index[listed])
+        step = -(-len(listed) // max_bars)
+        starts = np.arange(0, len(listed), step)
+        ends = np.r_[starts[1:], len(listed)] - 1
+        return pd.DataFrame({
+            "open": values["open"][starts],
+            "high": np.maximum.reduceat(values["high"], starts),
+            "low": np.minimum.reduceat(values["low"], starts),
+            "close": values["close"][ends],
+            "volume": np.add.reduceat(values["volume"], starts),
+        }, index=self.index[listed[starts]])
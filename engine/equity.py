@@ -0,0 +1,36 @@
+# Courbe de capital d'un ticker à partir de sa liste de trades
+#
+# Le capital disponible n'évolue qu'aux sorties : on le calcule trade par trade, puis la
+# courbe barre par barre s'obtient par indexation (searchsorted) sans boucle sur les barres.
+
+import numpy as np
+import pandas as pd
+
+
+def equity_curve(df, trades_df, initial_capital, alloc_pct, leverage):
+    close = df["close"].to_numpy(dtype=np.float64)
+    n = len(close)
+    if trades_df.empty:
+        return pd.Series(np.full(n, float(initial_capital)), index=df.index)
+
+    entries = df.index.get_indexer(trades_df["entry_time"])
+    exits = df.index.get_indexer(trades_df["exit_time"])
+    entry_price = close[entries]
+
+    # Capital avant chaque trade et montant engagé (même ordre d'opérations que l'ancienne boucle)
+    cash_levels = np.empty(len(entries) + 1)
+    alloc_values = np.empty(len(entries))
+    cash = float(initial_capital)
+    cash_levels[0] = cash
+    for k, (ep, xp) in enumerate(zip(entry_price.tolist(), close[exits].tolist())):
+        alloc_values[k] = cash * (alloc_pct / 100.0) * leverage
+        cash += alloc_values[k] * (xp / ep - 1.0)
+        cash_levels[k + 1] = cash
+
+    bars = np.arange(n)
+    cash_at_bar = cash_levels[np.searchsorted(exits, bars, side="right")]
+    trade = np.searchsorted(entries, bars, side="right") - 1
+    in_pos = (trade >= 0) & (bars < exits[np.maximum(trade, 0)])
+    trade = np.where(in_pos, trade, 0)
+    unrealized = np.where(in_pos, alloc_values[trade] * (close / entry_price[trade] - 1.0), 0.0)
+    return pd.Series(cash_at_bar + unrealized, index=df.index)
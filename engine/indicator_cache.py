@@ -0,0 +1,125 @@
+# Cache des indicateurs par DataFrame
+#
+# Clé : (identité du DataFrame, nom de l'indicateur, paramètres). Chaque indicateur
+# distinct n'est donc calculé qu'une fois par ticker, quel que soit le nombre de
+# fonctions de signal qui le demandent. Les entrées d'un DataFrame disparaissent quand
+# celui-ci est libéré ; le total est borné en octets (LRU).
+#
+# L'identité ne voit pas une modification en place (barre ajoutée ou corrigée) : chaque
+# DataFrame garde aussi une empreinte (nombre de lignes, dernier horodatage, dernière
+# ligne), vérifiée à chaque appel. Si elle a changé, ses entrées sont recalculées.
+# Seules les barres ajoutées et les corrections de la dernière barre (barre en cours du
+# flux temps réel) sont détectées : après une correction plus ancienne, appeler clear()
+# ou passer une copie.
+#
+# Les séries renvoyées sont partagées : ne pas les modifier en place.
+
+import os
+import threading
+import weakref
+from collections import OrderedDict
+
+import numpy as np
+import pandas as pd
+
+DEFAULT_MAX_BYTES = int(os.environ.get("INDICATOR_CACHE_MAX_BYTES", 256 * 1024 * 1024))
+
+
+def _nbytes(value):
+    # Series : un entier ; DataFrame (panel multi-tickers) : une taille par colonne ;
+    # tuple : somme de ses éléments (entrées et sorties d'un jeu de signaux)
+    if isinstance(value, tuple):
+        return sum(_nbytes(v) for v in value)
+    return int(np.sum(value.memory_usage(index=False))) if hasattr(value, "memory_usage") else value.nbytes
+
+
+def _fingerprint(df):
+    # Empreinte bon marché, indépendante du nombre de barres : seule la dernière ligne est
+    # lue (iloc[-1:], sans copier tout le DataFrame quand les colonnes ont des types
+    # différents). Autres objets (barres compactes, non modifiables) : leur longueur
+    if not isinstance(df, (pd.DataFrame, pd.Series)) or len(df) == 0:
+        return len(df)
+    last = df.iloc[-1:].to_numpy()
+    last = last.tobytes() if last.dtype != object else None
+    index = df.index.asi8[-1] if isinstance(df.index, pd.DatetimeIndex) else df.index[-1]
+    return len(df), index, last
+
+
+class IndicatorCache:
+    def __init__(self, max_bytes=DEFAULT_MAX_BYTES):
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.bytes = 0
+        self._entries = OrderedDict()   # clé -> (valeur, taille)
+        self._frames = {}               # id(df) -> (weakref, clés, empreinte)
+        self._lock = threading.RLock()
+
+    def get(self, df, name, params, compute):
+        key = (id(df), name, params)
+        fingerprint = _fingerprint(df)
+        with self._lock:
+            if self._owner(key[0]) is df and self._frames[key[0]][2] != fingerprint:
+                self._forget(key[0])   # DataFrame modifié en place : entrées périmées
+            entry = self._entries.get(key)
+            if entry is not None and self._owner(key[0]) is df:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return entry[0]
+            self.misses += 1
+
+        value = compute()
+        size = _nbytes(value)
+
+        with self._lock:
+            if self._owner(id(df)) is not df or self._frames[id(df)][2] != fingerprint:
+                self._forget(id(df))
+                self._frames[id(df)] = (weakref.ref(df, lambda _, frame_id=id(df): self._forget(frame_id)),
+                                        set(), fingerprint)
+            if key not in self._entries:
+                self._entries[key] = (value, size)
+                self._frames[id(df)][1].add(key)
+                self.bytes += size
+                self._evict()
+        return value
+
+    def _owner(self, frame_id):
+        frame = self._frames.get(frame_id)
+        return frame[0]() if frame is not None else None
+
+    def _forget(self, frame_id):
+        with self._lock:
+            frame = self._frames.pop(frame_id, None)
+            if frame is None:
+                return
+            for key in frame[1]:
+                entry = self._entries.pop(key, None)
+                if entry is not None:
+                    self.bytes -= entry[1]
+
+    def _evict(self):
+        while self.bytes > self.max_bytes and len(self._entries) > 1:
+            key, (_, size) = self._entries.popitem(last=False)
+            self._frames[key[0]][1].discard(key)
+            self.bytes -= size
+            self.evictions += 1
+
+    def stats(self):
+        with self._lock:
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "entries": len(self._entries),
+                "bytes": self.bytes,
+            }
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._frames.clear()
+            self.bytes = 0
+
+
+INDICATOR_CACHE = IndicatorCache()
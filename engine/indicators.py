@@ -0,0 +1,66 @@
+# Indicateurs techniques de la stratégie (calcul sur l'historique complet)
+#
+# Chaque fonction accepte un DataFrame d'un ticker (colonnes open, high, low, close,
+# volume) ou un panel multi-tickers (colonnes (champ, ticker), voir engine.panel) :
+# df["close"] est alors un tableau barres × tickers et le calcul porte sur toutes les
+# colonnes à la fois.
+#
+# Les indicateurs partagés par plusieurs signaux (ATR, EMA du close, moyenne mobile du
+# volume) passent par INDICATOR_CACHE : un seul calcul par ticker et par paramètre.
+
+import numpy as np
+
+from engine.indicator_cache import INDICATOR_CACHE
+from engine.vwap import vwap_series
+
+
+def ema(series, period): return series.ewm(span=period, adjust=False).mean()
+
+def true_range(df):
+    high_low = df["high"] - df["low"]
+    high_close = (df["high"] - df["close"].shift()).abs()
+    low_close = (df["low"] - df["close"].shift()).abs()
+    # fmax ignore les NaN (première barre sans close précédent) comme max(axis=1)
+    return np.fmax(np.fmax(high_low, high_close), low_close)
+
+def atr(df, period=14):
+    return INDICATOR_CACHE.get(df, "atr", (period,), lambda: (
+        INDICATOR_CACHE.get(df, "true_range", (), lambda: true_range(df))
+        .rolling(period, min_periods=period).mean()
+    ))
+
+def close_ema(df, period):
+    return INDICATOR_CACHE.get(df, "close_ema", (period,), lambda: ema(df["close"], period))
+
+def volume_sma(df, length):
+    return INDICATOR_CACHE.get(df, "volume_sma", (length,), lambda: df["volume"].rolling(length).mean())
+
+def session_vwap(df):
+    # VWAP remis à zéro à chaque séance (engine.vwap)
+    return INDICATOR_CACHE.get(df, "session_vwap", (), lambda: vwap_series(df["close"], df["volume"]))
+
+def detect_keybars(df, atr_length, atr_mult, vol_avg_length, min_body_pct):
+    atr_val = atr(df, atr_length)
+    vol_ma = volume_sma(df, vol_avg_length)
+    range_candle = df["high"] - df["low"]
+    body_size = (df["close"] - df["open"]).abs()
+    body_pct = body_size / range_candle * 100
+    return (
+        (range_candle > atr_mult * atr_val) &
+        (df["volume"] > 1.5 * vol_ma) &
+        (body_pct > min_body_pct)
+    )
+
+def compute_rrs(df, price_change_length, atr_length, causal=False):
+    # Exemple simple : prix > plus bas sur price_change_length ET ATR > moyenne ATR_length.
+    # causal : moyenne de l'ATR jusqu'à la barre courante au lieu de tout l'historique
+    # (ce que verrait la stratégie en direct, voir engine.streaming)
+    rrs_price = df["close"] > df["low"].rolling(price_change_length).min()
+    atr_val = atr(df, atr_length)
+    rrs_atr = atr_val > (atr_val.expanding().mean() if causal else atr_val.mean())
+    return rrs_price & rrs_atr
+
+def compute_relative_volume(df, n_day_avg, highlight_thres, soft_highlight_thres):
+    avg_vol = volume_sma(df, n_day_avg)
+    rvol = df["volume"] / avg_vol
+    return (rvol > highlight_thres) | (rvol > soft_highlight_thres)
@@ -0,0 +1,144 @@
+# Métriques du pipeline (screening, API, backtest) au format texte Prometheus
+#
+# Registre en mémoire, sans dépendance : compteurs (`inc`), jauges (`set`) et
+# histogrammes de durées (`observe`, `timer`), chacun avec des étiquettes. Un seul
+# registre par processus (METRICS) ; les processus de backtest renvoient le leur
+# (snapshot) avec leurs résultats et le serveur le fusionne (merge). `render` produit
+# le format d'exposition texte 0.0.4 servi par /api/metrics.
+
+import threading
+import time
+from contextlib import contextmanager
+
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+# Bornes (s) des histogrammes : de la milliseconde (JSON, VWAP) à la minute (screening complet)
+DEFAULT_BUCKETS = (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60)
+
+
+def _labels(labels):
+    # Clé hashable et triée : {"stage": "vwap"} -> (("stage", "vwap"),)
+    return tuple(sorted((k, str(v)) for k, v in labels.items()))
+
+
+def _escape(value):
+    return value.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _format_labels(labels, extra=()):
+    pairs = list(labels) + list(extra)
+    if not pairs:
+        return ""
+    return "{" + ",".join(f'{k}="{_escape(v)}"' for k, v in pairs) + "}"
+
+
+def _format_value(value):
+    if value == float("inf"):
+        return "+Inf"
+    return repr(float(value)) if isinstance(value, float) and not value.is_integer() else str(int(value))
+
+
+class Metrics:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.kinds = {}        # nom -> (type, aide)
+        self.values = {}       # (nom, étiquettes) -> valeur (compteurs, jauges)
+        self.histograms = {}   # (nom, étiquettes) -> [bornes, effectifs par borne, somme, nombre]
+
+    def _declare(self, name, kind, help):
+        known = self.kinds.get(name)
+        if known is None:
+            self.kinds[name] = (kind, help)
+        elif known[0] != kind:
+            raise ValueError(f"Métrique {name} déjà déclarée comme {known[0]}")
+
+    def inc(self, name, value=1, help="", **labels):
+        key = (name, _labels(labels))
+        with self._lock:
+            self._declare(name, "counter", help)
+            self.values[key] = self.values.get(key, 0) + value
+
+    def set(self, name, value, help="", **labels):
+        with self._lock:
+            self._declare(name, "gauge", help)
+            self.values[(name, _labels(labels))] = value
+
+    def observe(self, name, seconds, help="", buckets=DEFAULT_BUCKETS, **labels):
+        key = (name, _labels(labels))
+        with self._lock:
+            self._declare(name, "histogram", help)
+            histogram = self.histograms.get(key)
+            if histogram is None:
+                histogram = self.histograms[key] = [tuple(buckets), [0] * len(buckets), 0.0, 0]
+            for i, bound in enumerate(histogram[0]):
+                if seconds <= bound:
+                    histogram[1][i] += 1
+            histogram[2] += seconds
+            histogram[3] += 1
+
+    @contextmanager
+    def timer(self, name, help="", **labels):
+        # Durée du bloc, enregistrée même s'il lève une exception
+        t0 = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(name, time.perf_counter() - t0, help, **labels)
+
+    def snapshot(self):
+        # Copie picklable (renvoyée par les processus de backtest)
+        with self._lock:
+            return {
+                "kinds": dict(self.kinds),
+                "values": dict(self.values),
+                "histograms": {k: [h[0], list(h[1]), h[2], h[3]] for k, h in self.histograms.items()},
+            }
+
+    def merge(self, snapshot):
+        # Ajoute les compteurs et histogrammes d'un autre registre ; ses jauges remplacent les nôtres
+        with self._lock:
+            for name, (kind, help) in snapshot["kinds"].items():
+                self._declare(name, kind, help)
+            for key, value in snapshot["values"].items():
+                counter = self.kinds[key[0]][0] == "counter"
+                self.values[key] = self.values.get(key, 0) + value if counter else value
+            for key, (buckets, counts, total, count) in snapshot["histograms"].items():
+                histogram = self.histograms.get(key)
+                if histogram is None:
+                    self.histograms[key] = [buckets, list(counts), total, count]
+                    continue
+                if histogram[0] != buckets:
+                    raise ValueError(f"Bornes différentes pour {key[0]}")
+                histogram[1] = [a + b for a, b in zip(histogram[1], counts)]
+                histogram[2] += total
+                histogram[3] += count
+
+    def reset(self):
+        with self._lock:
+            self.values.clear()
+            self.histograms.clear()
+
+    def render(self):
+        snapshot = self.snapshot()
+        lines = []
+        for name in sorted(snapshot["kinds"]):
+            kind, help = snapshot["kinds"][name]
+            if help:
+                lines.append(f"# HELP {name} {_escape(help)}")
+            lines.append(f"# TYPE {name} {kind}")
+            if kind != "histogram":
+                for (key_name, labels), value in sorted(snapshot["values"].items()):
+                    if key_name == name:
+                        lines.append(f"{name}{_format_labels(labels)} {_format_value(value)}")
+                continue
+            for (key_name, labels), (buckets, counts, total, count) in sorted(snapshot["histograms"].items()):
+                if key_name != name:
+                    continue
+                for bound, n in zip(buckets, counts):
+                    lines.append(f"{name}_bucket{_format_labels(labels, [('le', _format_value(bound))])} {n}")
+                lines.append(f"{name}_bucket{_format_labels(labels, [('le', '+Inf')])} {count}")
+                lines.append(f"{name}_sum{_format_labels(labels)} {_format_value(total)}")
+                lines.append(f"{name}_count{_format_labels(labels)} {count}")
+        return "\n".join(lines) + "\n"
+
+
+METRICS = Metrics()
@@ -0,0 +1,187 @@
+# Backtest LONG multi-tickers sur un panel (barres × tickers)
+#
+# Les barres de tous les tickers sont alignées dans un seul DataFrame à colonnes
+# (champ, ticker) : panel["close"] est un tableau barres × tickers. Indicateurs et
+# signaux sont calculés pour toutes les colonnes à la fois, puis la machine à états
+# des positions parcourt toutes les colonnes en un seul appel (trades.scan_panel).
+# Un ticker sans barre à un horodatage y a des NaN : la barre est ignorée pour lui.
+# Les indicateurs d'un ticker ne doivent pas voir ces NaN (fenêtres glissantes, EMA) :
+# les tickers sont regroupés par lignes cotées identiques et chaque groupe est calculé
+# sur ses seules lignes (listing_groups), comme le ferait le ticker seul. Les tickers
+# cotés sur toutes les lignes forment un seul groupe, calculé sur le panel lui-même.
+#
+# Avec des barres compactes, les panels de chaque groupe de tickers et leurs signaux
+# restent dans INDICATOR_CACHE tant que les barres vivent : relancer le backtest avec
+# d'autres paramètres de trade (nATRMultip, profit target...) ne refait que la simulation.
+
+import numpy as np
+import pandas as pd
+
+from engine import trades
+from engine.backtest import ACCOUNT_PARAMS, SIGNAL_PARAMS, compute_metrics, stage_timer
+from engine.bar_cache import FIELDS
+from engine.bars import CompactBars
+from engine.equity import equity_curve
+from engine.indicator_cache import INDICATOR_CACHE
+from engine.indicators import atr
+from engine.signals import compute_signals
+from engine.sweep import _freeze
+
+PANEL_CHUNK = 100   # tickers par panel float64 pour les barres compactes
+
+
+def build_panel(bars):
+    # bars : {ticker: DataFrame open/high/low/close/volume} ou CompactBars (engine.bars),
+    # tickers sans données exclus
+    if isinstance(bars, CompactBars):
+        return bars.to_panel() if len(bars) else build_panel({})
+    bars = {ticker: df for ticker, df in bars.items() if len(df) > 0}
+    if not bars:
+        return pd.DataFrame(columns=pd.MultiIndex.from_arrays([[], []]))
+    frames = list(bars.values())
+    index = frames[0].index
+    for df in frames[1:]:
+        if not index.equals(df.index):
+            index = index.union(df.index)
+    m = len(bars)
+    # Un seul bloc (barres × champs·tickers) rempli par position, sans alignement pandas
+    values = np.full((len(index), len(FIELDS) * m), np.nan)
+    for j, df in enumerate(frames):
+        rows = index.get_indexer(df.index)
+        for k, f in enumerate(FIELDS):
+            values[rows, k * m + j] = df[f].to_numpy(dtype=np.float64)
+    columns = pd.MultiIndex.from_product([FIELDS, list(bars)])
+    return pd.DataFrame(values, index=index, columns=columns)
+
+
+def chunk_panel(bars, tickers):
+    # Panel float64 d'un groupe de tickers de barres compactes, mis en cache avec elles
+    return INDICATOR_CACHE.get(bars, "panel", tuple(tickers), lambda: bars.to_panel(tickers))
+
+
+def listing_groups(panel):
+    # Tickers regroupés par lignes cotées identiques : ((lignes, colonnes, sous-panel), ...),
+    # sous-panel limité à ces lignes et colonnes. () : tous les tickers sont cotés sur
+    # toutes les lignes, le panel se calcule tel quel. Ticker seul de son groupe : ses
+    # barres (comme ticker_frame), calculées par le chemin d'un ticker, bien moins coûteux
+    # qu'un panel d'une colonne
+    def compute():
+        listed = ~np.isnan(panel["close"].to_numpy(dtype=np.float64))
+        if listed.all():
+            return ()
+        masks = {}
+        for j in range(listed.shape[1]):
+            masks.setdefault(np.packbits(listed[:, j]).tobytes(), []).append(j)
+        tickers = panel_tickers(panel)
+        fields = list(panel.columns.get_level_values(0).unique())
+        values = panel.to_numpy()
+        # positions[k, j] : colonne (champ k, ticker j) du panel
+        positions = panel.columns.get_indexer(pd.MultiIndex.from_product([fields, tickers])).reshape(len(fields), -1)
+        groups = []
+        for cols in masks.values():
+            rows = np.flatnonzero(listed[:, cols[0]])
+            if len(cols) == 1:
+                columns = fields
+            else:
+                columns = pd.MultiIndex.from_product([fields, [tickers[j] for j in cols]])
+            sub = pd.DataFrame(values[np.ix_(rows, positions[:, cols].ravel())], index=panel.index[rows], columns=columns)
+            groups.append((rows, np.array(cols), sub))
+        return tuple(groups)
+    return INDICATOR_CACHE.get(panel, "listing_groups", (), compute)
+
+
+def by_listing(panel, compute, fills):
+    # compute(panel) -> tableaux barres × tickers, évalués groupe par groupe (listing_groups)
+    # et replacés dans le panel complet ; fills : valeur là où un ticker n'a pas de barre
+    groups = listing_groups(panel)
+    if not groups:
+        return tuple(np.asarray(v) for v in compute(panel))
+    shape = np.shape(panel["close"])
+    values = tuple(np.full(shape, fill) for fill in fills)
+    for rows, cols, sub in groups:
+        for target, v in zip(values, compute(sub)):
+            target[np.ix_(rows, cols)] = np.asarray(v).reshape(len(rows), len(cols))
+    return values
+
+
+def panel_atr(panel, period):
+    # ATR de chaque ticker sur ses barres, NaN là où il n'a pas coté
+    return INDICATOR_CACHE.get(panel, "panel_atr", (period,), lambda: by_listing(
+        panel, lambda df: (atr(df, period).to_numpy(dtype=np.float64),), (np.nan,))[0])
+
+
+def panel_signals(panel, params, benchmark=None):
+    # (entrées, sorties) du panel, en cache par jeu de paramètres de signaux. Le benchmark
+    # est identifié par son objet : il est chargé avec les barres et vit aussi longtemps
+    signal_args = [params[k] for k in SIGNAL_PARAMS]
+    key = (tuple(_freeze(v) for v in signal_args), None if benchmark is None else id(benchmark))
+    return INDICATOR_CACHE.get(panel, "signals", key, lambda: by_listing(
+        panel, lambda df: tuple(s.to_numpy(dtype=bool) for s in compute_signals(df, *signal_args, benchmark=benchmark)),
+        (False, False)))
+
+
+def panel_tickers(panel):
+    return list(panel["close"].columns)
+
+
+def ticker_frame(panel, ticker):
+    # Barres d'un ticker, sans les horodatages où il n'a pas coté
+    close = panel["close"][ticker].to_numpy()
+    listed = ~np.isnan(close)
+    return pd.DataFrame({f: panel[f][ticker].to_numpy()[listed] for f in FIELDS}, index=panel.index[listed])
+
+
+def panel_trades(panel, long_entry, long_exit, atr_values, profit_pct, profit_amount, nATRMultip, enable_profit_target):
+    close = panel["close"].to_numpy(dtype=np.float64)
+    columns, entries, exits = trades.scan_panel(
+        close, atr_values, long_entry, long_exit,
+        profit_pct, profit_amount, nATRMultip, enable_profit_target
+    )
+    result = {}
+    for j, ticker in enumerate(panel_tickers(panel)):
+        mine = columns == j
+        result[ticker] = trades.trades_frame(panel.index, close[:, j], entries[mine], exits[mine], ticker)
+    return result
+
+
+def run_panel_backtest(bars, params, benchmark=None, progress=None):
+    # Même résultat que run_backtest ticker par ticker : {ticker: (trades_df, equity, metrics)}.
+    # Barres compactes : calcul par groupes de PANEL_CHUNK tickers sur l'index partagé,
+    # identique au panel complet (chaque colonne est calculée indépendamment).
+    # progress(tickers traités, total) est appelé après chaque groupe
+    if isinstance(bars, CompactBars):
+        results = {}
+        for tickers in bars.chunks(PANEL_CHUNK):
+            with stage_timer("barres"):
+                panel = chunk_panel(bars, tickers)
+            results.update(panel_backtest(panel, params, benchmark))
+            if progress is not None:
+                progress(len(results), len(bars))
+        return results
+    with stage_timer("barres"):
+        panel = build_panel(bars)
+    return panel_backtest(panel, params, benchmark)
+
+
+def panel_backtest(panel, params, benchmark=None):
+    # benchmark : barres 5m de SPY, power index calculé une fois et diffusé à tout le panel
+    if panel.empty:
+        return {}
+    with stage_timer("signaux"):
+        long_entry, long_exit = panel_signals(panel, params, benchmark)
+    with stage_timer("trades"):
+        trade_logs = panel_trades(
+            panel, long_entry, long_exit, panel_atr(panel, params["nATRPeriod"]),
+            params["profit_pct"], params["profit_amount"], params["nATRMultip"], params["enable_profit_target"]
+        )
+    account = [params[k] for k in ACCOUNT_PARAMS]
+    close = panel["close"].to_numpy()
+    results = {}
+    with stage_timer("capital"):   # métriques comprises
+        for j, (ticker, trades_df) in enumerate(trade_logs.items()):
+            # La courbe de capital ne lit que les cours : pas besoin de tout ticker_frame
+            listed = ~np.isnan(close[:, j])
+            df = pd.DataFrame({"close": close[listed, j]}, index=panel.index[listed])
+            equity = equity_curve(df, trades_df, *account)
+            results[ticker] = (trades_df, equity, compute_metrics(trades_df, equity, *account))
+    return results
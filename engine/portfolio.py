@@ -0,0 +1,213 @@
+# Backtest d'un compte unique sur tous les tickers (capital partagé)
+#
+# Contrairement à equity_curve (un sous-compte par ticker), les barres de tous les
+# tickers sont fusionnées dans une file de priorité (heap) ordonnée par horodatage :
+# chaque événement est la barre suivante d'un ticker, pour un coût O(barres · log tickers).
+# Une entrée engage alloc_pct % du capital réalisé × leverage ; elle est refusée si
+# l'ensemble des positions ouvertes dépasserait capital × leverage.
+
+import heapq
+
+import numpy as np
+import pandas as pd
+
+from engine.backtest import ACCOUNT_PARAMS, compute_metrics
+from engine.bars import CompactBars
+from engine.panel import PANEL_CHUNK, build_panel, chunk_panel, panel_atr, panel_signals, panel_tickers
+from engine.trades import TRADE_COLUMNS
+
+try:
+    from numba import njit
+except ImportError:
+    njit = None
+
+
+def _simulate(times, offsets, close, stop_candidate, entry, exit_,
+              initial_capital, alloc_pct, leverage, profit_pct, profit_amount, enable_profit_target):
+    # Barres concaténées ticker par ticker : ticker i = positions offsets[i]..offsets[i+1]
+    m = len(offsets) - 1
+    total = len(times)
+    in_pos = np.zeros(m, dtype=np.bool_)
+    entry_at = np.zeros(m, dtype=np.int64)
+    entry_price = np.zeros(m)
+    atr_stop = np.zeros(m)
+    notional = np.zeros(m)
+    unrealized = np.zeros(m)
+
+    trade_ticker = np.empty(total // 2 + 1, dtype=np.int64)
+    trade_entry = np.empty(total // 2 + 1, dtype=np.int64)
+    trade_exit = np.empty(total // 2 + 1, dtype=np.int64)
+    trade_notional = np.empty(total // 2 + 1)
+    eq_times = np.empty(total, dtype=np.int64)
+    eq_values = np.empty(total)
+    eq_positions = np.empty(total, dtype=np.int64)
+
+    cash = initial_capital      # capital réalisé
+    committed = 0.0             # montant engagé par les positions ouvertes
+    open_pnl = 0.0              # somme des plus/moins-values latentes
+    open_count = 0
+    count = 0
+    points = 0
+    skipped = 0
+
+    # Clé : (horodatage, phase, ticker, position) ; phase 0 = ticker en position, traité
+    # avant les entrées du même horodatage pour libérer le capital des sorties
+    heap = [(times[offsets[i]], 1, i, offsets[i]) for i in range(m) if offsets[i] < offsets[i + 1]]
+    heapq.heapify(heap)
+    current = heap[0][0] if len(heap) > 0 else 0
+
+    while len(heap) > 0:
+        t, _, i, k = heapq.heappop(heap)
+        if t != current:
+            eq_times[points] = current
+            eq_values[points] = cash + open_pnl
+            eq_positions[points] = open_count
+            points += 1
+            current = t
+        price = close[k]
+
+        if not in_pos[i]:
+            if entry[k]:
+                size = cash * (alloc_pct / 100.0) * leverage
+                if committed + size <= cash * leverage * (1.0 + 1e-12):
+                    in_pos[i] = True
+                    entry_at[i] = k
+                    entry_price[i] = price
+                    atr_stop[i] = stop_candidate[k]
+                    notional[i] = size
+                    unrealized[i] = 0.0
+                    committed += size
+                    open_count += 1
+                else:
+                    skipped += 1
+        else:
+            # max(atr_stop, candidat) : un stop NaN reste NaN, un candidat NaN est ignoré
+            if stop_candidate[k] > atr_stop[i]:
+                atr_stop[i] = stop_candidate[k]
+            pnl = notional[i] * (price / entry_price[i] - 1.0)
+            open_pnl += pnl - unrealized[i]
+            unrealized[i] = pnl
+            reached_profit_pct = False
+            reached_profit_amount = False
+            if enable_profit_target:
+                reached_profit_pct = (price / entry_price[i] - 1.0) * 100.0 >= profit_pct
+                reached_profit_amount = (price - entry_price[i]) >= profit_amount
+            if exit_[k] or price < atr_stop[i] or reached_profit_pct or reached_profit_amount:
+                cash += pnl
+                committed -= notional[i]
+                open_count -= 1
+                in_pos[i] = False
+                unrealized[i] = 0.0
+                # Sans position ouverte, on repart de zéro (pas d'erreur d'arrondi cumulée)
+                open_pnl = open_pnl - pnl if open_count > 0 else 0.0
+                committed = committed if open_count > 0 else 0.0
+                trade_ticker[count] = i
+                trade_entry[count] = entry_at[i]
+                trade_exit[count] = k
+                trade_notional[count] = notional[i]
+                count += 1
+
+        if k + 1 < offsets[i + 1]:
+            heapq.heappush(heap, (times[k + 1], 0 if in_pos[i] else 1, i, k + 1))
+
+    if total > 0:
+        eq_times[points] = current
+        eq_values[points] = cash + open_pnl
+        eq_positions[points] = open_count
+        points += 1
+    return (trade_ticker[:count], trade_entry[:count], trade_exit[:count], trade_notional[:count],
+            eq_times[:points], eq_values[:points], eq_positions[:points], skipped)
+
+
+_simulate_compiled = njit(cache=True)(_simulate) if njit is not None else None
+
+
+def _signal_arrays(panel, params, benchmark=None):
+    # Cours, stop candidat, entrées et sorties (barres × tickers) du panel
+    long_entry, long_exit = panel_signals(panel, params, benchmark)
+    close = panel["close"].to_numpy(dtype=np.float64)
+    stop = close - params["nATRMultip"] * panel_atr(panel, params["nATRPeriod"])
+    return close, stop, np.asarray(long_entry, dtype=np.bool_), np.asarray(long_exit, dtype=np.bool_)
+
+
+def _listed_bars(tickers, arrays):
+    # (tickers, lignes cotées de chacun, tableaux de ces seules barres concaténées ticker
+    # par ticker). Ticker sans aucun cours (colonne vide) : rien à fusionner dans la file
+    kept, rows, columns = [], [], []
+    for j, ticker in enumerate(tickers):
+        listed = np.flatnonzero(~np.isnan(arrays[0][:, j]))
+        if len(listed):
+            kept.append(ticker)
+            rows.append(listed)
+            columns.append(np.full(len(listed), j))
+    if not rows:
+        return kept, rows, [np.empty(0, dtype=a.dtype) for a in arrays]
+    position, column = np.concatenate(rows), np.concatenate(columns)
+    return kept, rows, [a[position, column] for a in arrays]
+
+
+def _empty_result(account):
+    empty = pd.Series(dtype=float)
+    return pd.DataFrame(columns=TRADE_COLUMNS), empty, empty, compute_metrics(pd.DataFrame(), None, *account)
+
+
+def simulate_portfolio(bars, params, benchmark=None):
+    # bars : {ticker: DataFrame OHLCV} ou CompactBars. Renvoie (trades_df, equity, positions,
+    # metrics) : equity et positions (nombre de positions ouvertes) par horodatage du compte.
+    # benchmark : barres 5m de SPY pour les RRS réelles (voir engine.timeframes)
+    account = [params[k] for k in ACCOUNT_PARAMS]
+    if isinstance(bars, CompactBars) and len(bars):
+        # Signaux par groupes de tickers (engine.panel.PANEL_CHUNK) sur l'index partagé ;
+        # seules les barres cotées de chaque groupe sont gardées
+        index = bars.index
+        parts = [_listed_bars(chunk, _signal_arrays(chunk_panel(bars, chunk), params, benchmark))
+                 for chunk in bars.chunks(PANEL_CHUNK)]
+    else:
+        panel = build_panel(bars)
+        if panel.empty:
+            return _empty_result(account)
+        # Signaux de tous les tickers en une passe (panel), puis une série de barres par ticker
+        index = panel.index
+        parts = [_listed_bars(panel_tickers(panel), _signal_arrays(panel, params, benchmark))]
+
+    tickers = [ticker for part in parts for ticker in part[0]]
+    rows = [r for part in parts for r in part[1]]
+    if not rows:
+        return _empty_result(account)
+    offsets = np.zeros(len(rows) + 1, dtype=np.int64)
+    offsets[1:] = np.cumsum([len(r) for r in rows])
+    position = np.concatenate(rows)
+    close, stop, long_entry, long_exit = (np.concatenate([part[2][k] for part in parts]) for k in range(4))
+
+    # Le panel est trié par horodatage : son numéro de ligne sert de clé temporelle
+    args = (
+        position, offsets, close, stop, long_entry, long_exit,
+        float(params["initial_capital"]), float(params["alloc_pct"]), float(params["leverage"]),
+        float(params["profit_pct"]), float(params["profit_amount"]), bool(params["enable_profit_target"]),
+    )
+    simulate = _simulate_compiled or _simulate
+    ticker_ids, entries, exits, notionals, eq_times, eq_values, eq_positions, skipped = simulate(*args)
+
+    tickers = np.array(tickers, dtype=object)
+    entry_time = index[position[entries]]
+    exit_time = index[position[exits]]
+    index = index[eq_times]
+    entry_price = close[entries]
+    exit_price = close[exits]
+    trades_df = pd.DataFrame({
+        "ticker": tickers[ticker_ids],
+        "entry_time": entry_time,
+        "entry_price": entry_price,
+        "exit_time": exit_time,
+        "exit_price": exit_price,
+        "pnl_%": (exit_price / entry_price - 1.0) * 100.0,
+        "duration": exit_time - entry_time,
+        "notional": notionals,
+    }) if len(entries) else pd.DataFrame(columns=TRADE_COLUMNS + ["notional"])
+    equity = pd.Series(eq_values, index=index)
+    positions = pd.Series(eq_positions, index=index)
+
+    metrics = compute_metrics(trades_df, equity, *account)
+    metrics["max_positions"] = int(eq_positions.max())
+    metrics["skipped_entries"] = int(skipped)
+    return trades_df, equity, positions, metrics
@@ -0,0 +1,123 @@
+# Fournisseurs de données de marché du screener et du backtest
+#
+# Un fournisseur regroupe les deux sources externes :
+#   scan(columns, limit, criteria) pré-sélection TradingView (critères du screener LONG,
+#                                  SCAN_CRITERIA par défaut), DataFrame avec une ligne par
+#                                  action et les colonnes demandées, triée par volume
+#   latest_session()               date de la séance que renvoie intraday
+#   intraday(symbols)              barres 5m de cette séance
+#   since(symbols, start)          barres 5m à partir de `start` (inclus)
+#   history(symbols, start, end, interval="5m")
+#                                  barres de [start, end), téléchargement de BarCache
+# Les barres sont au format de yf.download(group_by='ticker') : colonnes (symbole, champ),
+# champs Open/High/Low/Close/Volume, index horaire de New York.
+#
+# LiveProvider interroge TradingView et Yahoo Finance ; SyntheticProvider
+# (engine/synthetic.py) génère un marché déterministe pour travailler et mesurer hors
+# ligne ; ReplayProvider (engine/replay.py) rejoue des réponses enregistrées servies par
+# un serveur local. cache_root : dossier du cache disque des barres de ce fournisseur.
+
+import os
+
+import pandas as pd
+
+from engine.bar_cache import DEFAULT_ROOT, BarCache, latest_session, yahoo_download
+
+SCAN_LIMIT = 3000
+YAHOO_FIELDS = ["Open", "High", "Low", "Close", "Adj Close", "Volume"]
+# Critères du screener LONG (modifiables dans Streamlit) ; sma : SMA sous la clôture
+SCAN_CRITERIA = {
+    "price_min": 25, "price_max": 250, "market_cap_min": 1_000_000_000, "avg_volume_min": 1_000_000,
+    "volume_min": 1_000_000, "change_min": 0, "relative_volume_min": 1.2, "sma": (50, 100, 200),
+}
+
+
+def filter_scan(df, criteria):
+    # Critères appliqués localement par les fournisseurs hors ligne, sur les colonnes qu'ils
+    # produisent (cours, volume, variation, volume relatif) ; capitalisation, volume moyen
+    # et SMA ne sont pas simulés
+    criteria = {**SCAN_CRITERIA, **criteria}
+    keep = (df["close"].between(criteria["price_min"], criteria["price_max"])
+            & (df["volume"] > criteria["volume_min"])
+            & (df["change"] > criteria["change_min"]))
+    if "relative_volume_10d_calc" in df:
+        keep &= df["relative_volume_10d_calc"] > criteria["relative_volume_min"]
+    return df[keep].reset_index(drop=True)
+
+
+def wide_frame(frames, symbols):
+    # {symbole: barres} -> format yf.download(group_by='ticker') ; symboles sans barre : colonnes NaN
+    columns = pd.MultiIndex.from_product([list(symbols), YAHOO_FIELDS])
+    if not frames:
+        return pd.DataFrame(columns=columns, dtype=float)
+    return pd.concat(frames, axis=1, sort=True).reindex(columns=columns)
+
+
+class LiveProvider:
+    name = "live"
+    cache_root = DEFAULT_ROOT
+
+    def scan(self, columns, limit=SCAN_LIMIT, criteria=None):
+        from tradingview_screener import Query, col
+        criteria = {**SCAN_CRITERIA, **(criteria or {})}
+        query = Query().select(*columns).where(
+            col('type') == 'stock',
+            col('exchange').isin(['NASDAQ', 'NYSE']),
+            col('close').between(criteria["price_min"], criteria["price_max"]),
+            col('market_cap_basic') >= criteria["market_cap_min"],
+            col('average_volume_30d_calc') > criteria["avg_volume_min"],
+            col('volume') > criteria["volume_min"],
+            col('change') > criteria["change_min"],
+            col('relative_volume') > criteria["relative_volume_min"],
+        )
+        for length in criteria["sma"]:
+            query = query.where(col(f'SMA{length}') < col('close'))
+        _, df = query.order_by('volume', ascending=False).limit(limit).get_scanner_data()
+        return df
+
+    def latest_session(self):
+        return latest_session()
+
+    def intraday(self, symbols):
+        import yfinance as yf
+        return yf.download(symbols, period='1d', interval='5m', group_by='ticker',
+                           threads=False, auto_adjust=False, progress=False)
+
+    def since(self, symbols, start):
+        import yfinance as yf
+        return yf.download(symbols, start=start, interval='5m', group_by='ticker',
+                           threads=False, auto_adjust=False, progress=False)
+
+    def history(self, symbols, start, end, interval="5m"):
+        return yahoo_download(symbols, start, end, interval)
+
+
+def get_provider(name="live", **options):
+    # "live", "synthetic" (options : voir SyntheticProvider) ou "replay" (voir ReplayProvider)
+    if name == "live":
+        return LiveProvider()
+    if name == "synthetic":
+        from engine.synthetic import SyntheticProvider
+        return SyntheticProvider(**options)
+    if name == "replay":
+        from engine.replay import ReplayProvider
+        return ReplayProvider(**options)
+    raise ValueError(f"Fournisseur de données inconnu : {name} (live, synthetic, replay)")
+
+
+def provider_from_env():
+    # MARKET_DATA=live|synthetic|replay ; marché synthétique : SYNTHETIC_TICKERS,
+    # SYNTHETIC_SEED ; rejeu : REPLAY_URL (serveur lancé par python -m engine.replay serve)
+    name = os.environ.get("MARKET_DATA", "live")
+    if name == "synthetic":
+        return get_provider(name, tickers=int(os.environ.get("SYNTHETIC_TICKERS", 500)),
+                            seed=int(os.environ.get("SYNTHETIC_SEED", 0)))
+    if name == "replay" and "REPLAY_URL" in os.environ:
+        return get_provider(name, url=os.environ["REPLAY_URL"])
+    return get_provider(name)
+
+
+def provider_bar_cache(provider=None, root=None):
+    # Cache disque des barres alimenté par le fournisseur (par défaut celui de MARKET_DATA)
+    provider = provider or provider_from_env()
+    return BarCache(root=root or provider.cache_root, download=provider.history)
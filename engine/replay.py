@@ -0,0 +1,405 @@
+# Serveur local de rejeu des données de marché (tests de charge hors ligne)
+#
+#   python -m engine.replay record replay/ --synthetic 500 --days 5      (ou --live)
+#   python -m engine.replay serve replay/ --port 8765 --latency 0.05 --jitter 0.02 \
+#                                         --error-rate 0.01 --rate-limit 200
+#   MARKET_DATA=replay REPLAY_URL=http://127.0.0.1:8765 python3 PWA/server.py
+#
+# record enregistre sur disque des réponses au format des deux services : scanner
+# TradingView (tradingview/scan-*.json : {"totalCount", "columns", "data": [{"s", "d"}]})
+# et graphiques Yahoo (yahoo/<symbole>.json : réponse /v8/finance/chart, barres 5m de
+# toutes les séances enregistrées, SPY compris pour les RRS du backtest).
+#
+# serve rejoue ces réponses :
+#   POST /america/scan                     scans enregistrés, l'un après l'autre (en boucle)
+#   GET  /v8/finance/chart/<symbole>       barres de [period1, period2), 404 sans barre
+#   GET  /meta                             description de l'enregistrement (dernière séance...)
+#   GET  /metrics                          requêtes servies par route et statut (Prometheus)
+# Chaque requête attend latency ± jitter secondes ; error_rate des requêtes reçoivent une
+# erreur 500 ; au-delà de rate_limit requêtes par seconde (seau à jetons), réponse 429
+# avec Retry-After, comme la limitation de Yahoo. Le tirage des erreurs et latences suit
+# la graine : un même scénario de charge se rejoue à l'identique.
+#
+# ReplayProvider (MARKET_DATA=replay) est le client : même interface que les autres
+# fournisseurs (engine/providers.py), une requête par symbole comme yfinance, en
+# parallèle. Un symbole en erreur est absent de la réponse (comme un échec yfinance) ;
+# une réponse 429 fait échouer tout le lot (RateLimited), ce qui déclenche les nouvelles
+# tentatives du screener.
+
+import argparse
+import glob
+import http.server
+import json
+import os
+import threading
+import time
+import urllib.error
+import urllib.request
+from concurrent.futures import ThreadPoolExecutor
+from datetime import date, timedelta
+from urllib.parse import parse_qs, urlparse
+
+import numpy as np
+import pandas as pd
+
+from engine.bar_cache import DEFAULT_ROOT, MARKET_TZ, to_date
+from engine.metrics import CONTENT_TYPE, METRICS, Metrics
+from engine.providers import SCAN_LIMIT, YAHOO_FIELDS, filter_scan, get_provider, wide_frame
+from engine.synthetic import TV_FIELDS
+from engine.timeframes import BENCHMARK
+
+REPLAY_URL = "http://127.0.0.1:8765"
+REPLAY_THREADS = 8     # requêtes de graphiques simultanées par lot (comme yf.download(threads=True))
+RECORD_BATCH = 100
+QUOTE_FIELDS = ["open", "high", "low", "close", "volume"]
+
+
+class RateLimited(Exception):
+    pass
+
+
+# ========================
+# Enregistrement
+# ========================
+def chart_response(symbol, frame):
+    # Réponse /v8/finance/chart de Yahoo pour des barres au format yf.download
+    timestamps = frame.index.tz_convert("UTC").as_unit("s").asi8
+    quote = {f.lower(): [None if v != v else float(v) for v in frame[f].to_numpy(dtype=float)]
+             for f in ["Open", "High", "Low", "Close", "Volume"]}
+    return {"chart": {"result": [{
+        "meta": {"symbol": symbol, "exchangeTimezoneName": MARKET_TZ, "dataGranularity": "5m"},
+        "timestamp": timestamps.tolist(),
+        "indicators": {"quote": [quote]},
+    }], "error": None}}
+
+
+def scan_response(df):
+    # Réponse du scanner TradingView : une ligne {"s": "BOURSE:SYMBOLE", "d": [valeurs]}
+    columns = [c for c in df.columns if c != "ticker"]
+    data = [{"s": row[0], "d": [None if isinstance(v, float) and v != v else v for v in row[1:]]}
+            for row in df[["ticker"] + columns].itertuples(index=False)]
+    return {"totalCount": len(data), "columns": columns, "data": data}
+
+
+def _write_json(path, data):
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path, "w") as f:
+        json.dump(data, f, separators=(",", ":"), default=float)
+
+
+def record(provider, out_dir, start, end, scans=1, columns=TV_FIELDS):
+    # Enregistre `scans` réponses du scanner puis les barres 5m de [start, end) de leurs
+    # symboles (et du benchmark SPY)
+    symbols = []
+    for i in range(scans):
+        df = provider.scan(columns)
+        _write_json(os.path.join(out_dir, "tradingview", f"scan-{i:04d}.json"), scan_response(df))
+        symbols += [s for s in df["name"] if s not in symbols]
+    symbols.append(BENCHMARK)
+
+    recorded = 0
+    last = None
+    for i in range(0, len(symbols), RECORD_BATCH):
+        batch = symbols[i:i + RECORD_BATCH]
+        raw = provider.history(batch, start, end)
+        for symbol in batch:
+            if symbol not in raw.columns.get_level_values(0):
+                continue
+            frame = raw[symbol].dropna(subset=["Close"])
+            if frame.empty:
+                continue
+            _write_json(os.path.join(out_dir, "yahoo", f"{symbol}.json"), chart_response(symbol, frame))
+            recorded += 1
+            last = max(last or frame.index[-1], frame.index[-1])
+        print(f"   [{min(i + RECORD_BATCH, len(symbols))}/{len(symbols)}] symboles enregistrés...", end="\r")
+
+    meta = {"source": provider.name, "start": str(to_date(start)), "end": str(to_date(end)),
+            "latest_session": str(last.date()) if last is not None else None,
+            "scans": scans, "symbols": recorded}
+    _write_json(os.path.join(out_dir, "meta.json"), meta)
+    print(f"\n✅ {scans} scan(s) et {recorded} symboles enregistrés dans {out_dir}")
+    return meta
+
+
+# ========================
+# Serveur de rejeu
+# ========================
+class Recording:
+    def __init__(self, directory):
+        with open(os.path.join(directory, "meta.json")) as f:
+            self.meta = json.load(f)
+        self.scans = []
+        for path in sorted(glob.glob(os.path.join(directory, "tradingview", "scan-*.json"))):
+            with open(path) as f:
+                self.scans.append(json.load(f))
+        # Barres chargées une fois : (horodatages en s, tableau barres × QUOTE_FIELDS)
+        self.charts = {}
+        for path in glob.glob(os.path.join(directory, "yahoo", "*.json")):
+            with open(path) as f:
+                result = json.load(f)["chart"]["result"][0]
+            quote = result["indicators"]["quote"][0]
+            values = np.array([[np.nan if v is None else v for v in quote[k]] for k in QUOTE_FIELDS], dtype=float).T
+            self.charts[result["meta"]["symbol"]] = (np.asarray(result["timestamp"], dtype=np.int64), values)
+
+    def chart(self, symbol, period1, period2):
+        timestamps, values = self.charts[symbol]
+        a, b = np.searchsorted(timestamps, [period1, period2])
+        if a == b:
+            return None
+        quote = {k: values[a:b, j].tolist() for j, k in enumerate(QUOTE_FIELDS)}
+        return {"chart": {"result": [{
+            "meta": {"symbol": symbol, "exchangeTimezoneName": MARKET_TZ, "dataGranularity": "5m"},
+            "timestamp": timestamps[a:b].tolist(),
+            "indicators": {"quote": [quote]},
+        }], "error": None}}
+
+
+class ReplayServer(http.server.ThreadingHTTPServer):
+    daemon_threads = True
+    allow_reuse_address = True
+    request_queue_size = 1024
+
+    def __init__(self, address, recording, latency=0.0, jitter=0.0, error_rate=0.0, rate_limit=0.0, seed=0):
+        super().__init__(address, ReplayHandler)
+        self.recording = recording
+        self.latency = latency
+        self.jitter = jitter
+        self.error_rate = error_rate
+        self.rate_limit = rate_limit
+        self.metrics = Metrics()
+        self._rng = np.random.default_rng(seed)
+        self._lock = threading.Lock()
+        self._tokens = rate_limit
+        self._refilled = time.monotonic()
+        self._scan = 0
+
+    def draw(self):
+        # (attente, erreur injectée) de la prochaine requête
+        with self._lock:
+            delay = max(0.0, self.latency + self._rng.normal(0.0, self.jitter)) if self.jitter else self.latency
+            return delay, self._rng.random() < self.error_rate
+
+    def take_token(self):
+        # Seau à jetons : rate_limit requêtes par seconde, rafales jusqu'à rate_limit
+        if not self.rate_limit:
+            return True
+        with self._lock:
+            now = time.monotonic()
+            self._tokens = min(self.rate_limit, self._tokens + (now - self._refilled) * self.rate_limit)
+            self._refilled = now
+            if self._tokens < 1:
+                return False
+            self._tokens -= 1
+            return True
+
+    def next_scan(self):
+        with self._lock:
+            scan = self.recording.scans[self._scan % len(self.recording.scans)]
+            self._scan += 1
+            return scan
+
+
+class ReplayHandler(http.server.BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+
+    def log_message(self, format, *args):
+        pass
+
+    def do_GET(self):
+        parsed = urlparse(self.path)
+        if parsed.path == "/meta":
+            return self.send_json(200, self.server.recording.meta, "meta")
+        if parsed.path == "/metrics":
+            body = self.server.metrics.render().encode()
+            self.send_response(200)
+            self.send_header("Content-Type", CONTENT_TYPE)
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+            return
+        if not parsed.path.startswith("/v8/finance/chart/"):
+            return self.send_json(404, {"error": "route inconnue"}, "inconnue")
+        if not self.throttle("chart"):
+            return
+        symbol = parsed.path[len("/v8/finance/chart/"):]
+        query = parse_qs(parsed.query)
+        data = None
+        if symbol in self.server.recording.charts:
+            data = self.server.recording.chart(symbol, int(query["period1"][0]), int(query["period2"][0]))
+        if data is None:
+            return self.send_json(404, {"chart": {"result": None, "error": {
+                "code": "Not Found", "description": "No data found, symbol may be delisted"}}}, "chart")
+        self.send_json(200, data, "chart")
+
+    def do_POST(self):
+        self.rfile.read(int(self.headers.get("Content-Length", 0)))
+        if urlparse(self.path).path != "/america/scan":
+            return self.send_json(404, {"error": "route inconnue"}, "inconnue")
+        if not self.throttle("scan"):
+            return
+        self.send_json(200, self.server.next_scan(), "scan")
+
+    def throttle(self, route):
+        # Latence, limitation de débit et erreurs injectées ; False si la réponse est déjà envoyée
+        delay, failed = self.server.draw()
+        time.sleep(delay)
+        if not self.server.take_token():
+            self.send_json(429, {"error": "Too Many Requests"}, route, {"Retry-After": "1"})
+            return False
+        if failed:
+            self.send_json(500, {"error": "erreur injectée"}, route)
+            return False
+        return True
+
+    def send_json(self, status, data, route, headers=None):
+        body = json.dumps(data, separators=(",", ":")).encode()
+        self.server.metrics.inc("replay_requests_total", help="Requêtes servies par route et statut",
+                                route=route, status=status)
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        self.end_headers()
+        self.wfile.write(body)
+
+
+def start_server(directory, host="127.0.0.1", port=0, **options):
+    # Serveur de rejeu dans un thread ; renvoie (serveur, URL)
+    server = ReplayServer((host, port), Recording(directory), **options)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server, f"http://{host}:{server.server_address[1]}"
+
+
+# ========================
+# Client (fournisseur "replay")
+# ========================
+class ReplayProvider:
+    name = "replay"
+
+    def __init__(self, url=REPLAY_URL, threads=REPLAY_THREADS, timeout=30):
+        self.url = url.rstrip("/")
+        self.threads = threads
+        self.timeout = timeout
+        self.cache_root = os.path.join(os.path.dirname(DEFAULT_ROOT), "replay")
+        self._meta = None
+        self._pool = None
+        self._lock = threading.Lock()
+
+    def _request(self, path, body=None):
+        data = json.dumps(body).encode() if body is not None else None
+        request = urllib.request.Request(self.url + path, data=data, headers={"Content-Type": "application/json"})
+        with urllib.request.urlopen(request, timeout=self.timeout) as response:
+            return json.load(response)
+
+    def meta(self):
+        if self._meta is None:
+            self._meta = self._request("/meta")
+        return self._meta
+
+    def latest_session(self):
+        return date.fromisoformat(self.meta()["latest_session"])
+
+    def scan(self, columns, limit=SCAN_LIMIT, criteria=None):
+        # Critères appliqués localement sur la réponse enregistrée complète, puis `limit`
+        requested = limit if criteria is None else SCAN_LIMIT
+        try:
+            response = self._request("/america/scan", {"columns": list(columns), "range": [0, requested]})
+        except urllib.error.HTTPError as e:
+            if e.code == 429:
+                raise RateLimited("scanner : trop de requêtes") from e
+            raise
+        recorded = response["columns"]
+        rows = [[item["s"]] + item["d"] for item in response["data"][:requested]]
+        df = pd.DataFrame(rows, columns=["ticker"] + recorded)
+        if criteria is not None:
+            df = filter_scan(df, criteria).iloc[:limit]
+        return df[["ticker"] + [c for c in columns if c != "ticker"]]
+
+    def _chart(self, symbol, period1, period2):
+        try:
+            data = self._request(f"/v8/finance/chart/{symbol}?period1={period1}&period2={period2}&interval=5m")
+        except urllib.error.HTTPError as e:
+            if e.code == 429:
+                raise RateLimited(f"{symbol} : trop de requêtes") from e
+            METRICS.inc("replay_symbol_failures_total", help="Symboles absents d'une réponse (erreur du service)",
+                        status=e.code)
+            return None
+        result = data["chart"]["result"][0]
+        quote = result["indicators"]["quote"][0]
+        index = pd.to_datetime(np.asarray(result["timestamp"], dtype=np.int64), unit="s", utc=True).tz_convert(MARKET_TZ)
+        frame = pd.DataFrame({f.capitalize(): np.array(quote[f], dtype=float) for f in QUOTE_FIELDS},
+                             index=pd.DatetimeIndex(index, name="Datetime"))
+        frame["Adj Close"] = frame["Close"]
+        return frame[YAHOO_FIELDS]
+
+    def _download(self, symbols, start, end):
+        with self._lock:
+            if self._pool is None:
+                self._pool = ThreadPoolExecutor(max_workers=self.threads)
+        period1, period2 = (int(pd.Timestamp(t).timestamp()) for t in (start, end))
+        frames = dict(zip(symbols, self._pool.map(lambda s: self._chart(s, period1, period2), symbols)))
+        return wide_frame({s: f for s, f in frames.items() if f is not None}, symbols)
+
+    def _day_start(self, day):
+        return pd.Timestamp(to_date(day)).tz_localize(MARKET_TZ)
+
+    def intraday(self, symbols):
+        session = self.latest_session()
+        return self._download(symbols, self._day_start(session), self._day_start(session + timedelta(days=1)))
+
+    def since(self, symbols, start):
+        start = pd.Timestamp(start)
+        start = start.tz_localize(MARKET_TZ) if start.tz is None else start
+        return self._download(symbols, start, self._day_start(self.latest_session() + timedelta(days=1)))
+
+    def history(self, symbols, start, end, interval="5m"):
+        if interval != "5m":
+            raise ValueError(f"Intervalle {interval} non enregistré (barres 5m)")
+        return self._download(symbols, self._day_start(start), self._day_start(end))
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Enregistrement et rejeu local des données de marché")
+    commands = parser.add_subparsers(dest="command", required=True)
+    rec = commands.add_parser("record", help="enregistre scans TradingView et barres Yahoo")
+    rec.add_argument("directory")
+    source = rec.add_mutually_exclusive_group(required=True)
+    source.add_argument("--live", action="store_true", help="TradingView et Yahoo Finance")
+    source.add_argument("--synthetic", type=int, metavar="N", help="marché synthétique de N actions")
+    rec.add_argument("--seed", type=int, default=0, help="graine du marché synthétique")
+    rec.add_argument("--days", type=int, default=5, help="séances enregistrées (jusqu'à la dernière)")
+    rec.add_argument("--scans", type=int, default=1, help="réponses du scanner enregistrées")
+    srv = commands.add_parser("serve", help="rejoue un enregistrement")
+    srv.add_argument("directory")
+    srv.add_argument("--host", default="127.0.0.1")
+    srv.add_argument("--port", type=int, default=8765)
+    srv.add_argument("--latency", type=float, default=0.0, help="latence moyenne par requête (s)")
+    srv.add_argument("--jitter", type=float, default=0.0, help="écart type de la latence (s)")
+    srv.add_argument("--error-rate", type=float, default=0.0, help="part des requêtes en erreur 500")
+    srv.add_argument("--rate-limit", type=float, default=0.0, help="requêtes par seconde avant 429 (0 : illimité)")
+    srv.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    if args.command == "record":
+        provider = get_provider("live") if args.live else get_provider("synthetic", tickers=args.synthetic, seed=args.seed)
+        last = provider.latest_session()
+        start = pd.bdate_range(end=last, periods=args.days)[0].date()
+        record(provider, args.directory, start, last + timedelta(days=1), args.scans)
+        return
+
+    server = ReplayServer((args.host, args.port), Recording(args.directory), args.latency, args.jitter,
+                          args.error_rate, args.rate_limit, args.seed)
+    meta = server.recording.meta
+    print(f"🎞️  Rejeu de {args.directory} ({meta['source']}, {meta['symbols']} symboles, {meta['scans']} scan(s), "
+          f"dernière séance {meta['latest_session']}) sur http://{args.host}:{args.port}")
+    print(f"   MARKET_DATA=replay REPLAY_URL=http://{args.host}:{args.port} pour y brancher le screener et le backtest")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        print("\n🛑 Arrêt du serveur de rejeu.")
+        server.server_close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,492 @@
+# Règles de signaux : petit langage d'expressions compilé en plan vectorisé
+#
+#   close > ema(30) and rvol(5) > 1.5
+#   crossover(rrs("30m")) or close > prev(high)
+#
+# Grammaire (du moins au plus prioritaire) : or, and, not, comparaisons (> >= < <= == !=,
+# non enchaînées), + -, * /, moins unaire, parenthèses. Valeurs : nombres, "chaînes",
+# true / false, champs open high low close volume et fonctions :
+#   ema(n), ema(x, n)        moyenne exponentielle du close (ou de x) sur n barres
+#   sma(x, n)                moyenne mobile simple
+#   atr(n)                   Average True Range
+#   vwap()                   VWAP de séance
+#   rvol(n)                  volume / moyenne du volume sur n barres
+#   prev(x, k=1)             valeur de x k barres plus tôt (close > prev(high) : HOD[1])
+#   change(x, k=1)           x - prev(x, k)
+#   pct_change(x, k=1)       x / prev(x, k) - 1
+#   highest(x, n), lowest(x, n)
+#   abs(x), min(x, y), max(x, y)
+#   crossover(x, level=0), crossunder(x, level=0)   ta.crossover / ta.crossunder
+#   rrs("5m" | "15m" | "30m" | "1D")                RRS contre SPY (engine.timeframes)
+# Une barre sans valeur (NaN, début d'historique) ne vérifie aucune comparaison, != compris.
+# Le premier argument de ema, sma, prev, highest, lowest, crossover et crossunder est une
+# série : une constante y est refusée (ema(5, 3) est une faute de frappe, pas une règle).
+#
+# compile_rules(expressions) analyse les expressions une fois et construit un seul plan :
+# chaque sous-expression n'y figure qu'une fois, quelle que soit la règle qui la contient
+# (après normalisation : a < b devient b > a, chaînes de and / or sans doublon et triées,
+# opérandes de +, *, ==, != triés, rvol / change / pct_change développés).
+# plan.evaluate(df) calcule chaque nœud une fois, en NumPy, sur un ticker (colonnes
+# open ... volume) ou sur tout un panel (barres × tickers, engine.panel). Les indicateurs
+# et les valeurs numériques intermédiaires passent par INDICATOR_CACHE : d'un plan à
+# l'autre (variantes d'une règle dans un balayage), ils ne sont calculés qu'une fois par
+# DataFrame.
+
+import math
+import re
+from functools import lru_cache
+
+import numpy as np
+import pandas as pd
+
+from engine.indicator_cache import INDICATOR_CACHE
+from engine.indicators import atr, close_ema, session_vwap, volume_sma
+from engine.timeframes import TIMEFRAMES
+
+FIELDS = ("open", "high", "low", "close", "volume")
+KEYWORDS = {"and", "or", "not", "true", "false"}
+PLAN_CACHE = 4096   # plans compilés gardés en mémoire (LRU)
+
+TOKEN = re.compile(r"""\s*(?:
+    (?P<number>\d+(?:\.\d*)?(?:[eE][-+]?\d+)?|\.\d+(?:[eE][-+]?\d+)?)
+  | (?P<string>"[^"]*"|'[^']*')
+  | (?P<name>[A-Za-z_]\w*)
+  | (?P<op>>=|<=|==|!=|[-+*/<>(),])
+)""", re.X)
+
+COMPARISONS = {">", ">=", "<", "<=", "==", "!="}
+COMMUTATIVE = {"and", "or", "+", "*", "==", "!="}
+
+
+class RuleError(ValueError):
+    pass
+
+
+# ========================
+# Analyse
+# ========================
+def tokenize(text):
+    tokens = []
+    pos = 0
+    text = text.rstrip()
+    while pos < len(text):
+        match = TOKEN.match(text, pos)
+        if match is None or match.end() == pos:
+            raise RuleError(f"Caractère inattendu en position {pos} : {text[pos:pos + 10]!r}")
+        kind = match.lastgroup
+        tokens.append((kind, match.group(kind), match.start(kind)))
+        pos = match.end()
+    tokens.append(("end", None, len(text)))
+    return tokens
+
+
+class Parser:
+    # Descente récursive ; nœuds : tuples hachables (voir normalize)
+    #   ("const", valeur) ("field", nom) ("call", nom, *args) ("op", op, a, b) ("not", a) ("neg", a)
+    def __init__(self, text):
+        self.text = text
+        self.tokens = tokenize(text)
+        self.i = 0
+
+    def peek(self):
+        return self.tokens[self.i]
+
+    def take(self, value=None):
+        token = self.tokens[self.i]
+        if value is not None and token[1] != value:
+            found = "la fin de la règle" if token[0] == "end" else repr(token[1])
+            raise RuleError(f"{value!r} attendu en position {token[2]}, {found} trouvé")
+        self.i += 1
+        return token
+
+    def accept(self, value):
+        if self.peek()[1] == value and self.peek()[0] in ("op", "name"):
+            self.i += 1
+            return True
+        return False
+
+    def parse(self):
+        node = self.disjunction()
+        if self.peek()[0] != "end":
+            kind, value, pos = self.peek()
+            raise RuleError(f"{value!r} inattendu en position {pos}")
+        return node
+
+    def disjunction(self):
+        node = self.conjunction()
+        while self.accept("or"):
+            node = ("op", "or", node, self.conjunction())
+        return node
+
+    def conjunction(self):
+        node = self.negation()
+        while self.accept("and"):
+            node = ("op", "and", node, self.negation())
+        return node
+
+    def negation(self):
+        if self.accept("not"):
+            return ("not", self.negation())
+        return self.comparison()
+
+    def comparison(self):
+        node = self.sum()
+        if self.peek()[0] == "op" and self.peek()[1] in COMPARISONS:
+            op = self.take()[1]
+            node = ("op", op, node, self.sum())
+            if self.peek()[0] == "op" and self.peek()[1] in COMPARISONS:
+                raise RuleError(f"Comparaisons enchaînées en position {self.peek()[2]} : utiliser and")
+        return node
+
+    def sum(self):
+        node = self.term()
+        while self.peek()[0] == "op" and self.peek()[1] in ("+", "-"):
+            node = ("op", self.take()[1], node, self.term())
+        return node
+
+    def term(self):
+        node = self.unary()
+        while self.peek()[0] == "op" and self.peek()[1] in ("*", "/"):
+            node = ("op", self.take()[1], node, self.unary())
+        return node
+
+    def unary(self):
+        if self.accept("-"):
+            return ("neg", self.unary())
+        return self.atom()
+
+    def atom(self):
+        kind, value, pos = self.take()
+        if kind == "number":
+            return ("const", float(value))
+        if kind == "string":
+            return ("const", value[1:-1])
+        if kind == "op" and value == "(":
+            node = self.disjunction()
+            self.take(")")
+            return node
+        if kind == "name" and value in ("true", "false"):
+            return ("const", value == "true")
+        if kind == "name" and value not in KEYWORDS:
+            if self.accept("("):
+                args = []
+                if not self.accept(")"):
+                    args.append(self.disjunction())
+                    while self.accept(","):
+                        args.append(self.disjunction())
+                    self.take(")")
+                return ("call", value, *args)
+            if value not in FIELDS:
+                raise RuleError(f"Champ inconnu en position {pos} : {value} ({', '.join(FIELDS)})")
+            return ("field", value)
+        found = "la fin de la règle" if kind == "end" else repr(value)
+        raise RuleError(f"Valeur attendue en position {pos}, {found} trouvé")
+
+
+# ========================
+# Fonctions
+# ========================
+# nom : (types des arguments, arguments facultatifs par défaut, type renvoyé).
+# "int" : nombre entier constant (période, décalage) ; "num" : valeur numérique ;
+# "str" : chaîne constante
+SIGNATURES = {
+    "ema": (("num", "int"), (), "num"),
+    "sma": (("num", "int"), (), "num"),
+    "atr": (("int",), (), "num"),
+    "vwap": ((), (), "num"),
+    "rvol": (("int",), (), "num"),
+    "prev": (("num", "int"), (1.0,), "num"),
+    "change": (("num", "int"), (1.0,), "num"),
+    "pct_change": (("num", "int"), (1.0,), "num"),
+    "highest": (("num", "int"), (), "num"),
+    "lowest": (("num", "int"), (), "num"),
+    "abs": (("num",), (), "num"),
+    "min": (("num", "num"), (), "num"),
+    "max": (("num", "num"), (), "num"),
+    "crossover": (("num", "num"), (0.0,), "bool"),
+    "crossunder": (("num", "num"), (0.0,), "bool"),
+    "rrs": (("str",), (), "num"),
+}
+
+
+# Fonctions dont le premier argument est une série de valeurs (pas une constante)
+SERIES_ARGUMENT = {"ema", "sma", "prev", "highest", "lowest", "crossover", "crossunder"}
+
+
+def _is_constant(node):
+    # Expression sans champ ni fonction : même valeur à chaque barre
+    if node[0] == "const":
+        return True
+    if node[0] == "neg":
+        return _is_constant(node[1])
+    if node[0] == "op":
+        return _is_constant(node[2]) and _is_constant(node[3])
+    return False
+
+
+def _check_call(node):
+    name, args = node[1], list(node[2:])
+    if name not in SIGNATURES:
+        raise RuleError(f"Fonction inconnue : {name}() ({', '.join(sorted(SIGNATURES))})")
+    types, defaults, _ = SIGNATURES[name]
+    # ema(n) : moyenne du close
+    if name == "ema" and len(args) == 1:
+        args = [("field", "close")] + args
+    if not len(types) - len(defaults) <= len(args) <= len(types):
+        raise RuleError(f"{name}() attend {len(types)} argument(s), {len(args)} donné(s)")
+    missing = len(types) - len(args)
+    args += [("const", v) for v in defaults[len(defaults) - missing:]]
+    for arg, kind in zip(args, types):
+        # ema(1e999), ema(nan) : int() lèverait OverflowError / ValueError
+        if kind == "int" and not (arg[0] == "const" and isinstance(arg[1], (int, float))
+                                  and not isinstance(arg[1], bool) and math.isfinite(arg[1])
+                                  and arg[1] == int(arg[1]) and arg[1] >= 1):
+            raise RuleError(f"{name}() : période ou décalage entier positif attendu")
+        if kind == "str" and not (arg[0] == "const" and isinstance(arg[1], str)):
+            raise RuleError(f"{name}() : chaîne attendue")
+    if name == "rrs" and args[0][1] not in TIMEFRAMES:
+        raise RuleError(f"rrs() : unité de temps inconnue {args[0][1]!r} ({', '.join(TIMEFRAMES)})")
+    return ("call", name, *[("const", int(a[1])) if kind == "int" else a for a, kind in zip(args, types)])
+
+
+def normalize(node):
+    # Arbre canonique : deux écritures équivalentes donnent le même nœud (sous-expressions
+    # communes) ; macros développées, types vérifiés. Renvoie (nœud, type)
+    kind = node[0]
+    if kind == "const":
+        value = node[1]
+        return node, "str" if isinstance(value, str) else "bool" if isinstance(value, bool) else "num"
+    if kind == "field":
+        return node, "num"
+    if kind == "neg":
+        child, child_type = normalize(node[1])
+        _expect(child_type, "num", "-")
+        if child[0] == "const":
+            return ("const", -child[1]), "num"
+        return ("neg", child), "num"
+    if kind == "not":
+        child, child_type = normalize(node[1])
+        _expect(child_type, "bool", "not")
+        return ("not", child), "bool"
+    if kind == "call":
+        node = _check_call(node)
+        name, args = node[1], node[2:]
+        # Macros : développées pour partager leurs sous-expressions avec le reste
+        if name == "rvol":
+            return normalize(("op", "/", ("field", "volume"), ("call", "sma", ("field", "volume"), args[0])))
+        if name == "change":
+            return normalize(("op", "-", args[0], ("call", "prev", *args)))
+        if name == "pct_change":
+            return normalize(("op", "-", ("op", "/", args[0], ("call", "prev", *args)), ("const", 1.0)))
+        types = SIGNATURES[name][0]
+        normalized = []
+        for arg, expected in zip(args, types):
+            arg, arg_type = normalize(arg)
+            _expect(arg_type, "num" if expected == "int" else expected, f"{name}()")
+            normalized.append(arg)
+        if name in SERIES_ARGUMENT and _is_constant(normalized[0]):
+            raise RuleError(f"{name}() : série attendue en premier argument (champ ou indicateur), constante trouvée")
+        if name in ("min", "max"):
+            normalized.sort(key=repr)
+        return ("call", name, *normalized), SIGNATURES[name][2]
+
+    _, op, a, b = node
+    if op == "<":
+        op, a, b = ">", b, a
+    elif op == "<=":
+        op, a, b = ">=", b, a
+    (a, a_type), (b, b_type) = normalize(a), normalize(b)
+    operand = "bool" if op in ("and", "or") else "num"
+    _expect(a_type, operand, op)
+    _expect(b_type, operand, op)
+    if op in ("and", "or"):
+        # Chaîne à plat, sans doublon, dans un ordre fixe : a or b or a == b or a
+        terms = sorted(set(_terms(a, op) + _terms(b, op)), key=repr)
+        node = terms[0]
+        for term in terms[1:]:
+            node = ("op", op, node, term)
+        return node, "bool"
+    if op in COMMUTATIVE and repr(b) < repr(a):
+        a, b = b, a
+    return ("op", op, a, b), "bool" if op in COMPARISONS else "num"
+
+
+def _terms(node, op):
+    if node[0] == "op" and node[1] == op:
+        return _terms(node[2], op) + _terms(node[3], op)
+    return [node]
+
+
+def _expect(found, expected, where):
+    if found != expected:
+        names = {"num": "une valeur numérique", "bool": "une condition", "str": "une chaîne"}
+        raise RuleError(f"{where} : {names[expected]} attendue, {names[found]} trouvée")
+
+
+def parse_rule(text):
+    # Arbre normalisé d'une condition ; RuleError si la règle est invalide
+    node, node_type = normalize(Parser(text).parse())
+    if node_type != "bool":
+        raise RuleError(f"La règle doit être une condition (comparaison, and, or...) : {text}")
+    return node
+
+
+# ========================
+# Plan d'évaluation
+# ========================
+def _shift(values, k):
+    out = np.full(values.shape, np.nan)
+    if k < len(values):
+        out[k:] = values[:len(values) - k]
+    return out
+
+
+def _rolling(values, n, method):
+    frame = pd.DataFrame(values.reshape(len(values), -1)).rolling(n)
+    return getattr(frame, method)().to_numpy().reshape(values.shape)
+
+
+def _ewm(values, n):
+    return pd.DataFrame(values.reshape(len(values), -1)).ewm(span=n, adjust=False).mean().to_numpy().reshape(values.shape)
+
+
+def _values(series):
+    return np.asarray(series, dtype=np.float64)
+
+
+def _not_equal(a, b):
+    # NaN != x vaut True en NumPy : une barre sans valeur ne vérifie aucune comparaison
+    return np.not_equal(a, b) & ~(np.isnan(a) | np.isnan(b))
+
+
+OPERATORS = {
+    "+": np.add, "-": np.subtract, "*": np.multiply, "/": np.divide,
+    ">": np.greater, ">=": np.greater_equal, "==": np.equal, "!=": _not_equal,
+    "and": np.logical_and, "or": np.logical_or,
+}
+
+
+def _call(node, args, df, rrs):
+    # args : valeurs des arguments (constantes telles quelles : périodes, unités de temps)
+    name = node[1]
+    if name == "ema":
+        # ema du close : indicateur partagé avec le reste des signaux
+        return _values(close_ema(df, args[1])) if node[2] == ("field", "close") else _ewm(args[0], args[1])
+    if name == "sma":
+        return _values(volume_sma(df, args[1])) if node[2] == ("field", "volume") else _rolling(args[0], args[1], "mean")
+    if name == "atr":
+        return _values(atr(df, args[0]))
+    if name == "vwap":
+        return _values(session_vwap(df))
+    if name == "prev":
+        return _shift(args[0], args[1])
+    if name == "highest":
+        return _rolling(args[0], args[1], "max")
+    if name == "lowest":
+        return _rolling(args[0], args[1], "min")
+    if name == "abs":
+        return np.abs(args[0])
+    if name == "min":
+        return np.minimum(args[0], args[1])
+    if name == "max":
+        return np.maximum(args[0], args[1])
+    if name == "crossover":
+        return (args[0] > args[1]) & (_shift(args[0], 1) <= args[1])
+    if name == "crossunder":
+        return (args[0] < args[1]) & (_shift(args[0], 1) >= args[1])
+    if rrs is None:
+        raise RuleError("rrs() demande les barres du benchmark (SPY)")
+    return _values(rrs(args[0]))
+
+
+def _step(node, args, df, rrs):
+    kind = node[0]
+    if kind == "const":
+        return node[1]
+    if kind == "field":
+        return _values(df[node[1]])
+    if kind == "neg":
+        return -args[0]
+    if kind == "not":
+        return ~np.asarray(args[0], dtype=bool)
+    if kind == "op":
+        return OPERATORS[node[1]](args[0], args[1])
+    return _call(node, args, df, rrs)
+
+
+class Plan:
+    # steps : (nœud, indices des arguments) dans l'ordre de calcul, un par sous-expression
+    # distincte ; outputs : indice du résultat de chaque règle
+    def __init__(self, roots):
+        self.steps = []
+        self.index = {}
+        self.uses_rrs = set()   # étapes qui dépendent du benchmark
+        self.outputs = [self._add(root) for root in roots]
+
+    def _add(self, node):
+        if node in self.index:
+            return self.index[node]
+        kind = node[0]
+        if kind in ("neg", "not"):
+            inputs = (self._add(node[1]),)
+        elif kind == "op":
+            inputs = (self._add(node[2]), self._add(node[3]))
+        elif kind == "call":
+            inputs = tuple(self._add(arg) for arg in node[2:])
+        else:
+            inputs = ()
+        i = self.index[node] = len(self.steps)
+        self.steps.append((node, inputs))
+        if (kind == "call" and node[1] == "rrs") or any(j in self.uses_rrs for j in inputs):
+            self.uses_rrs.add(i)
+        return i
+
+    def __len__(self):
+        return len(self.steps)
+
+    def evaluate(self, df, rrs=None):
+        # Tableaux booléens (barres,) ou (barres, tickers) de chaque règle.
+        # rrs(unité) : RRS contre le benchmark (voir compute_signals), requis par rrs()
+        values = []
+        with np.errstate(divide="ignore", invalid="ignore"):
+            for i, (node, inputs) in enumerate(self.steps):
+                args = [values[j] for j in inputs]
+                if self._shared(i, node):
+                    # Valeurs numériques calculées (indicateurs, arithmétique) : partagées
+                    # d'un plan à l'autre tant que df vit
+                    value = INDICATOR_CACHE.get(df, "rule", node, lambda: _step(node, args, df, rrs))
+                else:
+                    value = _step(node, args, df, rrs)
+                values.append(value)
+        shape = np.shape(df["close"])
+        return [np.full(shape, values[i]) if np.ndim(values[i]) == 0 else values[i] for i in self.outputs]
+
+    def _shared(self, i, node):
+        # Conditions (peu coûteuses) et valeurs dépendant du benchmark : recalculées
+        if i in self.uses_rrs or node[0] in ("const", "field", "not"):
+            return False
+        if node[0] == "op" and (node[1] in COMPARISONS or node[1] in ("and", "or")):
+            return False
+        return not (node[0] == "call" and SIGNATURES[node[1]][2] == "bool")
+
+
+@lru_cache(maxsize=PLAN_CACHE)
+def compile_rules(expressions):
+    # expressions : tuple de règles ; un plan commun à toutes
+    return Plan([parse_rule(text) for text in expressions])
+
+
+def compile_rule(expression):
+    return compile_rules((expression,))
+
+
+def evaluate_rules(df, expressions, rrs=None):
+    return compile_rules(tuple(expressions)).evaluate(df, rrs)
+
+
+def as_signal(df, values):
+    # Tableau de booléens -> Series (un ticker) ou DataFrame (panel) indexés comme df["close"]
+    close = df["close"]
+    if isinstance(close, pd.DataFrame):
+        return pd.DataFrame(values, index=close.index, columns=close.columns)
+    return pd.Series(values, index=close.index)
@@ -0,0 +1,78 @@
+# Signaux d'entrée / sortie LONG (un ticker ou un panel multi-tickers, voir engine.indicators)
+
+from engine.indicators import compute_relative_volume, compute_rrs, detect_keybars, volume_sma
+from engine.rules import as_signal, compile_rules
+from engine.timeframes import relative_strength
+
+# Filtres de la checklist LONG (langage de engine/rules.py). Sans benchmark, les deux
+# filtres RRS gardent leur approximation (EMA 30, variation sur 6 barres)
+CHECKLIST_RULES = {
+    "Aligned relative strength filter": 'rrs("15m") > 0 and rrs("5m") > 0',
+    "RRS 30m crossover 0": 'crossover(rrs("30m"))',
+    "Keybar VWAP breakout": "close > vwap()",
+    "Red to green strike": "close > open",
+    "HA Bullish reversal": "close > open",
+    "Bullish thrust": "pct_change(close) > 0.01",
+    "ATR trailing stop bullish cross": "close > ema(14)",
+    "Breakout of HOD[1]": "close > prev(high)",
+}
+RRS_APPROXIMATIONS = {
+    "Aligned relative strength filter": "close > ema(30)",
+    "RRS 30m crossover 0": "change(close, 6) > 0",
+}
+EXIT_RULE = "close < open"   # Bearish reversal (simplifié, à adapter : Heikin Ashi...)
+
+
+def checklist_rule(checklist_long, benchmark=True):
+    # OU des filtres cochés, en une seule règle (les filtres identiques n'en font qu'un)
+    rules = [RRS_APPROXIMATIONS.get(name, rule) if not benchmark else rule
+             for name, rule in CHECKLIST_RULES.items() if checklist_long[name]]
+    return " or ".join(f"({rule})" for rule in rules) or "false"
+
+
+def signal_checklist_long(df, checklist_long, rrs=None):
+    # rrs : RRS réelles contre le benchmark par unité de temps (engine.timeframes)
+    plan = compile_rules((checklist_rule(checklist_long, rrs is not None),))
+    return plan.evaluate(df, rrs)[0]
+
+
+def compute_signals(
+    df,
+    keybar_atr_length,
+    keybar_atr_mult,
+    keybar_vol_avg_length,
+    keybar_min_body_pct,
+    rrs_price_change_length,
+    rrs_atr_length,
+    rvol_n_day_avg,
+    rvol_highlight_thres,
+    rvol_soft_highlight_thres,
+    checklist_long,
+    volume_sma_check,
+    volume_sma_length,
+    entry_rule="",
+    exit_rule=EXIT_RULE,
+    causal=False,
+    benchmark=None
+):
+    # entry_rule : règle (engine.rules) qui remplace la checklist cochée, "" pour la garder ;
+    # exit_rule : règle de sortie ("" : EXIT_RULE). Les deux règles forment un seul plan.
+    # causal : le signal d'une barre ne dépend que des barres précédentes (voir compute_rrs)
+    # benchmark : barres 5m de SPY (engine.timeframes.BENCHMARK) pour les RRS réelles
+    keybar = detect_keybars(df, keybar_atr_length, keybar_atr_mult, keybar_vol_avg_length, keybar_min_body_pct)
+    rrs_ok = compute_rrs(df, rrs_price_change_length, rrs_atr_length, causal)
+    rrs = None
+    if benchmark is not None:
+        rrs = lambda timeframe: relative_strength(df, benchmark, timeframe, rrs_price_change_length, rrs_atr_length)
+    entry_rule = entry_rule or checklist_rule(checklist_long, rrs is not None)
+    checklist_ok, long_exit = compile_rules((entry_rule, exit_rule or EXIT_RULE)).evaluate(df, rrs)
+    # Volume logic : OR between volume SMA and relative volume
+    vol_sma = volume_sma(df, volume_sma_length) if volume_sma_check else 0
+    volume_ok = (df["volume"] > vol_sma)
+    rvol_ok = compute_relative_volume(df, rvol_n_day_avg, rvol_highlight_thres, rvol_soft_highlight_thres)
+    # Combine volume_ok OR rvol_ok
+    volume_final = volume_ok | rvol_ok
+    # Final entry logic: keybar AND rrs_ok AND (volume_ok OR rvol_ok) AND checklist_ok
+    long_entry = keybar & rrs_ok & volume_final & checklist_ok
+    long_exit = as_signal(df, long_exit)
+    return long_entry.fillna(False), long_exit.fillna(False)
@@ -0,0 +1,256 @@
+# Indicateurs incrémentaux pour le suivi en direct des barres 5m
+#
+# Chaque indicateur garde son état et se met à jour en O(1) à l'arrivée d'une barre, au
+# lieu de tout recalculer sur l'historique. Les valeurs sont identiques à celles des
+# fonctions de engine/indicators.py (mêmes formules, mêmes arrondis que pandas).
+#
+# StreamingSignals rejoue compute_signals barre par barre pour un symbole ; SignalStream
+# fait de même pour plusieurs centaines de symboles.
+#
+# Seule différence avec le calcul complet : le filtre ATR de compute_rrs compare l'ATR à
+# sa moyenne sur tout l'historique. En direct, l'historique s'arrête à la barre courante :
+# le signal d'une barre est celui que donnerait compute_signals relancé sur les barres
+# reçues jusque-là (moyenne cumulée, égale au dernier bit près). Les filtres RRS de la
+# checklist utilisent les approximations de compute_signals sans benchmark (pas de barres
+# SPY en direct) : les RRS réelles contre SPY (engine/timeframes.py) restent au backtest,
+# comme les règles personnalisées (entry_rule, exit_rule, engine/rules.py).
+
+import math
+from collections import deque
+
+from engine.backtest import SIGNAL_PARAMS
+from engine.signals import EXIT_RULE
+from engine.vwap import Vwap, session_days
+
+NAN = float("nan")
+
+
+def _div(a, b):
+    # Division flottante IEEE comme NumPy (x/0 = ±inf, 0/0 = NaN)
+    if b != 0:
+        return a / b
+    if a != a or a == 0:
+        return NAN
+    return math.copysign(math.inf, a) * math.copysign(1.0, b)
+
+
+class Ema:
+    # ewm(span=period, adjust=False).mean()
+    def __init__(self, period):
+        self.alpha = 2.0 / (period + 1)
+        self.value = NAN
+
+    def update(self, x):
+        if self.value != self.value:
+            self.value = x
+        elif self.value != x:
+            old = 1.0 - self.alpha
+            self.value = (old * self.value + self.alpha * x) / (old + self.alpha)
+        return self.value
+
+
+class RollingMean:
+    # rolling(length).mean() : somme compensée (Kahan) en anneau, comme pandas
+    def __init__(self, length):
+        self.length = length
+        self.window = deque()
+        self.total = 0.0
+        self.comp_add = 0.0
+        self.comp_remove = 0.0
+        self.negatives = 0
+        self.same = 0
+        self.previous = NAN
+        self.value = NAN
+
+    def update(self, x):
+        if len(self.window) == self.length:
+            old = self.window.popleft()
+            if old < 0:
+                self.negatives -= 1
+            y = -old - self.comp_remove
+            t = self.total + y
+            self.comp_remove = t - self.total - y
+            self.total = t
+        self.window.append(x)
+        if x < 0:
+            self.negatives += 1
+        y = x - self.comp_add
+        t = self.total + y
+        self.comp_add = t - self.total - y
+        self.total = t
+        self.same = self.same + 1 if x == self.previous else 1
+        self.previous = x
+
+        n = len(self.window)
+        if n < self.length:
+            self.value = NAN
+        elif self.same >= n:
+            self.value = x
+        else:
+            self.value = self.total / n
+            if self.negatives == 0 and self.value < 0:
+                self.value = 0.0
+            elif self.negatives == n and self.value > 0:
+                self.value = 0.0
+        return self.value
+
+
+class RollingMin:
+    # rolling(length).min() : file monotone, O(1) amorti
+    def __init__(self, length):
+        self.length = length
+        self.count = 0
+        self.candidates = deque()   # (rang, valeur), valeurs croissantes
+        self.value = NAN
+
+    def update(self, x):
+        while self.candidates and self.candidates[-1][1] >= x:
+            self.candidates.pop()
+        self.candidates.append((self.count, x))
+        self.count += 1
+        if self.candidates[0][0] <= self.count - 1 - self.length:
+            self.candidates.popleft()
+        self.value = self.candidates[0][1] if self.count >= self.length else NAN
+        return self.value
+
+
+class ExpandingMean:
+    # Moyenne des valeurs reçues (NaN ignorés), comme Series.mean() sur l'historique
+    def __init__(self):
+        self.total = 0.0
+        self.count = 0
+
+    def update(self, x):
+        if x == x:
+            self.total += x
+            self.count += 1
+        return self.total / self.count if self.count else NAN
+
+
+class Lag:
+    # Valeur reçue `periods` barres plus tôt (shift(periods)), NaN au début
+    def __init__(self, periods):
+        self.values = deque([NAN] * periods, maxlen=periods)
+
+    def update(self, x):
+        lagged = self.values[0]
+        self.values.append(x)
+        return lagged
+
+
+class Atr:
+    # Moyenne simple du true range sur `period` barres (engine.indicators.atr)
+    def __init__(self, period):
+        self.mean = RollingMean(period)
+        self.prev_close = NAN
+
+    def update(self, high, low, close):
+        high_low = high - low
+        ranges = [r for r in (high_low, abs(high - self.prev_close), abs(low - self.prev_close)) if r == r]
+        self.prev_close = close
+        return self.mean.update(max(ranges) if ranges else NAN)
+
+
+class StreamingSignals:
+    # compute_signals barre par barre pour un symbole ; params : dictionnaire complet
+    # (voir DEFAULT_PARAMS). Les indicateurs de même paramètre sont partagés.
+    def __init__(self, params):
+        (self.keybar_atr_length, self.keybar_atr_mult, self.keybar_vol_avg_length, self.keybar_min_body_pct,
+         self.rrs_price_change_length, self.rrs_atr_length,
+         self.rvol_n_day_avg, self.rvol_highlight_thres, self.rvol_soft_highlight_thres,
+         self.checklist_long, self.volume_sma_check, self.volume_sma_length,
+         entry_rule, exit_rule) = [params[k] for k in SIGNAL_PARAMS]
+        if entry_rule or (exit_rule or EXIT_RULE) != EXIT_RULE:
+            raise ValueError("Règles personnalisées (entry_rule, exit_rule) non disponibles en direct : "
+                             "checklist et sortie par défaut uniquement")
+        checklist = self.checklist_long
+
+        self.atr = {n: Atr(n) for n in {self.keybar_atr_length, self.rrs_atr_length}}
+        lengths = {self.keybar_vol_avg_length, self.rvol_n_day_avg}
+        if self.volume_sma_check:
+            lengths.add(self.volume_sma_length)
+        self.volume_sma = {n: RollingMean(n) for n in lengths}
+        self.low_min = RollingMin(self.rrs_price_change_length)
+        self.rrs_atr_mean = ExpandingMean()
+        self.ema30 = Ema(30) if checklist["Aligned relative strength filter"] else None
+        self.ema14 = Ema(14) if checklist["ATR trailing stop bullish cross"] else None
+        self.close_lag6 = Lag(6) if checklist["RRS 30m crossover 0"] else None
+        self.vwap = Vwap() if checklist["Keybar VWAP breakout"] else None
+        self.prev_close = NAN
+        self.prev_high = NAN
+        self.bars = 0
+
+    def update(self, open_, high, low, close, volume, day):
+        # day : numéro de séance de la barre (engine.vwap.session_days), remet le VWAP à zéro
+        checklist = self.checklist_long
+        atr = {n: indicator.update(high, low, close) for n, indicator in self.atr.items()}
+        vol_ma = {n: indicator.update(volume) for n, indicator in self.volume_sma.items()}
+
+        # detect_keybars
+        range_candle = high - low
+        body_pct = _div(abs(close - open_), range_candle) * 100
+        keybar = (range_candle > self.keybar_atr_mult * atr[self.keybar_atr_length] and
+                  volume > 1.5 * vol_ma[self.keybar_vol_avg_length] and
+                  body_pct > self.keybar_min_body_pct)
+
+        # compute_rrs
+        rrs_atr = atr[self.rrs_atr_length]
+        rrs_ok = close > self.low_min.update(low) and rrs_atr > self.rrs_atr_mean.update(rrs_atr)
+
+        # signal_checklist_long (OU des filtres cochés)
+        filters = []
+        if self.ema30 is not None:
+            filters.append(close > self.ema30.update(close))
+        if self.close_lag6 is not None:
+            filters.append(close - self.close_lag6.update(close) > 0)
+        if self.vwap is not None:
+            filters.append(close > self.vwap.update(close, volume, day))
+        if checklist["Red to green strike"] or checklist["HA Bullish reversal"]:
+            filters.append(close > open_)
+        if checklist["Bullish thrust"]:
+            filters.append(_div(close, self.prev_close) - 1 > 0.01)
+        if self.ema14 is not None:
+            filters.append(close > self.ema14.update(close))
+        if checklist["Breakout of HOD[1]"]:
+            filters.append(close > self.prev_high)
+        checklist_ok = any(filters)
+
+        volume_ok = volume > (vol_ma[self.volume_sma_length] if self.volume_sma_check else 0)
+        rvol = _div(volume, vol_ma[self.rvol_n_day_avg])
+        rvol_ok = rvol > self.rvol_highlight_thres or rvol > self.rvol_soft_highlight_thres
+
+        self.prev_close = close
+        self.prev_high = high
+        self.bars += 1
+        long_entry = keybar and rrs_ok and (volume_ok or rvol_ok) and checklist_ok
+        return long_entry, close < open_
+
+
+class SignalStream:
+    # Un état StreamingSignals par symbole, créé à la première barre reçue
+    def __init__(self, params):
+        self.params = params
+        self.states = {}
+
+    def update(self, bars, time):
+        # bars : {symbole: (open, high, low, close, volume)} pour le nouvel horodatage `time` ;
+        # un symbole absent (pas de barre) garde son état. Renvoie {symbole: (entrée, sortie)}
+        day = session_days([time])[0]
+        signals = {}
+        for symbol, bar in bars.items():
+            state = self.states.get(symbol)
+            if state is None:
+                state = self.states[symbol] = StreamingSignals(self.params)
+            signals[symbol] = state.update(*bar, day)
+        return signals
+
+    def warm_up(self, history):
+        # history : {symbole: DataFrame OHLCV} ; rejoue l'historique et renvoie les
+        # signaux de la dernière barre de chaque symbole
+        signals = {}
+        for symbol, df in history.items():
+            state = self.states[symbol] = StreamingSignals(self.params)
+            columns = [df[f].tolist() for f in ("open", "high", "low", "close", "volume")]
+            for *bar, day in zip(*columns, session_days(df.index).tolist()):
+                signals[symbol] = state.update(*bar, day)
+        return signals
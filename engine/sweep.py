@@ -0,0 +1,249 @@
+# Balayage de paramètres (grid search) de la stratégie LONG
+#
+#   python -m engine.sweep sweep.json --out sweeps/run1 [--workers 8]
+#
+# sweep.json :
+# {
+#   "tickers": ["AAPL", "MSFT"], "start": "2024-05-01", "end": "2024-05-30",
+#   "base": {"profit_pct": 1.0},
+#   "grid": {"nATRMultip": [1.0, 1.5, 2.0],
+#            "keybar_atr_mult": {"start": 0.5, "stop": 2.0, "step": 0.25}},
+#   "rank_by": "total_pnl_$"
+# }
+#
+# La grille accepte aussi les règles de engine/rules.py ("entry_rule": ["close > ema(30)
+# and rvol(5) > 1.5", ...], "exit_rule": [...]) : indicateurs et sous-expressions communs
+# aux variantes ne sont calculés qu'une fois par ticker.
+#
+# Chaque combinaison est évaluée sur tous les tickers (capital de chaque ticker simulé
+# séparément, comme le récapitulatif Streamlit, puis agrégé : total_pnl_% et drawdown
+# sont rapportés à la somme des capitaux des sous-comptes). Les résultats sont ajoutés
+# au fil de l'eau dans <out>/results.jsonl ; relancer la même commande reprend là où le
+# balayage s'était arrêté. <out>/ranking.csv est réécrit à la fin, et toutes les
+# RANKING_INTERVAL secondes pendant le balayage (classement provisoire).
+
+import argparse
+import hashlib
+import itertools
+import json
+import os
+import time
+from collections import OrderedDict
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+import numpy as np
+import pandas as pd
+
+from engine import trades
+from engine.backtest import (ACCOUNT_PARAMS, DEFAULT_PARAMS, SIGNAL_PARAMS, TRADE_PARAMS, combine_equity, compute_metrics,
+                             load_benchmark)
+from engine.providers import provider_bar_cache
+from engine.equity import equity_curve
+from engine.indicators import atr
+from engine.signals import compute_signals
+
+CHUNK_SIZE = 50           # combinaisons par tâche envoyée aux processus
+SIGNAL_CACHE_SIZE = 256   # jeux de signaux gardés en mémoire par processus (indicateurs : INDICATOR_CACHE)
+RANKING_INTERVAL = 60     # secondes entre deux réécritures de ranking.csv (tri de tous les résultats)
+
+
+# ========================
+# Grille
+# ========================
+def expand_values(spec):
+    if isinstance(spec, dict):
+        count = int(round((spec["stop"] - spec["start"]) / spec["step"])) + 1
+        values = [spec["start"] + spec["step"] * i for i in range(count)]
+        if all(isinstance(spec[k], int) for k in ("start", "stop", "step")):
+            return values
+        return [round(v, 10) for v in values]
+    return list(spec)
+
+
+def expand_grid(grid):
+    # Paramètres de signaux en boucle externe : les combinaisons qui partagent les mêmes
+    # signaux se suivent et tombent dans le même lot
+    stage = {name: i for i, names in enumerate([SIGNAL_PARAMS, TRADE_PARAMS, ACCOUNT_PARAMS]) for name in names}
+    unknown = [name for name in grid if name not in stage]
+    if unknown:
+        raise ValueError(f"Paramètres inconnus : {unknown}")
+    names = sorted(grid, key=lambda name: (stage[name], name))
+    for values in itertools.product(*[expand_values(grid[name]) for name in names]):
+        yield dict(zip(names, values))
+
+
+def combo_id(combo):
+    return hashlib.sha1(json.dumps(combo, sort_keys=True).encode()).hexdigest()[:16]
+
+
+# ========================
+# Évaluation (processus de travail)
+# ========================
+_bars = {}
+_base = {}
+_cache = OrderedDict()
+_benchmark = None   # barres 5m de SPY pour les RRS réelles
+
+
+def _init_worker(bars, base, benchmark=None):
+    global _benchmark
+    _bars.update(bars)
+    _base.update(base)
+    _benchmark = benchmark
+
+
+def _cached(key, compute):
+    if key in _cache:
+        _cache.move_to_end(key)
+        return _cache[key]
+    value = compute()
+    _cache[key] = value
+    if len(_cache) > SIGNAL_CACHE_SIZE:
+        _cache.popitem(last=False)
+    return value
+
+
+def _freeze(value):
+    return tuple(sorted(value.items())) if isinstance(value, dict) else value
+
+
+def evaluate(bars, params):
+    signal_args = [params[k] for k in SIGNAL_PARAMS]
+    signal_key = tuple(_freeze(v) for v in signal_args)
+    account = [params[k] for k in ACCOUNT_PARAMS]
+    trade_frames = []
+    pnl = []
+
+    for ticker, df in bars.items():
+        long_entry, long_exit = _cached(
+            ("signals", ticker, signal_key),
+            lambda: tuple(s.to_numpy(dtype=bool) for s in compute_signals(df, *signal_args, benchmark=_benchmark)))
+        atr_values = atr(df, params["nATRPeriod"]).to_numpy()
+        close = df["close"].to_numpy(dtype=np.float64)
+        entries, exits = trades.scan_trades(
+            close, atr_values, long_entry, long_exit,
+            params["profit_pct"], params["profit_amount"], params["nATRMultip"], params["enable_profit_target"])
+        trades_df = trades.trades_frame(df.index, close, entries, exits, ticker)
+        if trades_df.empty:
+            continue
+        trade_frames.append(trades_df)
+        pnl.append(equity_curve(df, trades_df, *account) - params["initial_capital"])
+
+    if not trade_frames:
+        return compute_metrics(pd.DataFrame(), None, *account)
+    # Un sous-compte de initial_capital par ticker, qu'il ait tradé ou non
+    equity = combine_equity(pnl, params["initial_capital"] * len(bars))
+    return compute_metrics(pd.concat(trade_frames, ignore_index=True), equity, *account)
+
+
+def _run_chunk(chunk):
+    records = []
+    for combo in chunk:
+        metrics = evaluate(_bars, {**_base, **combo})
+        records.append({"id": combo_id(combo), "params": combo, **metrics})
+    return records
+
+
+# ========================
+# Orchestration
+# ========================
+def load_results(path):
+    records = []
+    if not os.path.exists(path):
+        return records
+    with open(path) as f:
+        for line in f:
+            try:
+                records.append(json.loads(line))
+            except json.JSONDecodeError:
+                # Dernière ligne tronquée par un arrêt brutal : elle sera recalculée
+                continue
+    return records
+
+
+def write_ranking(records, path, rank_by):
+    if not records:
+        return
+    rows = [{**r["params"], **{k: v for k, v in r.items() if k != "params"}} for r in records]
+    ranking = pd.DataFrame(rows)
+    if rank_by in ranking:
+        ranking = ranking.sort_values(rank_by, ascending=False, na_position="last")
+    tmp = f"{path}.tmp"
+    ranking.to_csv(tmp, index=False)
+    os.replace(tmp, path)
+
+
+def run_sweep(config, out_dir, bars=None, workers=None, chunk_size=CHUNK_SIZE, benchmark=None):
+    # bars / benchmark : barres déjà chargées ; par défaut lues dans le cache (SPY compris)
+    os.makedirs(out_dir, exist_ok=True)
+    config_path = os.path.join(out_dir, "sweep.json")
+    results_path = os.path.join(out_dir, "results.jsonl")
+    ranking_path = os.path.join(out_dir, "ranking.csv")
+    rank_by = config.get("rank_by", "total_pnl_$")
+
+    if os.path.exists(config_path):
+        with open(config_path) as f:
+            previous = json.load(f)
+        if previous != config:
+            raise SystemExit(f"❌ {out_dir} contient un autre balayage : choisissez un autre dossier.")
+    else:
+        with open(config_path, "w") as f:
+            json.dump(config, f, indent=4)
+
+    records = load_results(results_path)
+    done = {r["id"] for r in records}
+    combos = [c for c in expand_grid(config["grid"]) if combo_id(c) not in done]
+    total = len(done) + len(combos)
+    print(f"🔁 {total} combinaisons, {len(done)} déjà calculées, {len(combos)} à évaluer")
+    if not combos:
+        write_ranking(records, ranking_path, rank_by)
+        return records
+
+    if bars is None:
+        cache = provider_bar_cache()
+        bars = cache.get_many(config["tickers"], config["start"], config["end"])
+        bars = {t: df for t, df in bars.items() if len(df) > 0}
+        benchmark = load_benchmark(cache, config["start"], config["end"])
+    base = {**DEFAULT_PARAMS, **config.get("base", {})}
+
+    chunks = [combos[i:i + chunk_size] for i in range(0, len(combos), chunk_size)]
+    started = time.perf_counter()
+    ranked = started
+    evaluated = 0
+    with open(results_path, "a") as out, \
+            ProcessPoolExecutor(max_workers=workers, initializer=_init_worker, initargs=(bars, base, benchmark)) as pool:
+        futures = [pool.submit(_run_chunk, chunk) for chunk in chunks]
+        for future in as_completed(futures):
+            chunk_records = future.result()
+            for record in chunk_records:
+                out.write(json.dumps(record) + "\n")
+            out.flush()
+            os.fsync(out.fileno())
+            records.extend(chunk_records)
+            evaluated += len(chunk_records)
+            if time.perf_counter() - ranked > RANKING_INTERVAL:
+                write_ranking(records, ranking_path, rank_by)
+                ranked = time.perf_counter()
+            rate = evaluated / (time.perf_counter() - started)
+            print(f"   [{len(records)}/{total}] combinaisons ({rate:.1f}/s)...", end="\r")
+
+    write_ranking(records, ranking_path, rank_by)
+    print(f"\n✅ Balayage terminé, classement dans {ranking_path}")
+    return records
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Balayage de paramètres de la stratégie LONG")
+    parser.add_argument("config", help="fichier JSON (tickers, start, end, base, grid, rank_by)")
+    parser.add_argument("--out", required=True, help="dossier des résultats (reprise automatique)")
+    parser.add_argument("--workers", type=int, default=None, help="processus (défaut : nombre de cœurs)")
+    parser.add_argument("--chunk-size", type=int, default=CHUNK_SIZE)
+    args = parser.parse_args()
+
+    with open(args.config) as f:
+        config = json.load(f)
+    run_sweep(config, args.out, workers=args.workers, chunk_size=args.chunk_size)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,226 @@
+# Marché synthétique déterministe (fournisseur "synthetic", voir engine/providers.py)
+#
+# Chaque séance 5m d'un symbole est tirée d'un générateur initialisé par (graine, symbole,
+# date) : les mêmes paramètres donnent toujours les mêmes barres, quel que soit l'ordre
+# ou le découpage des requêtes, et le cache disque des barres reste valable d'un run à
+# l'autre. Particularités reproduites, aux taux ci-dessous :
+#   - barres absentes (trous dans la séance, comme chez Yahoo) ;
+#   - barres à volume nul (cours inchangé) ;
+#   - suspensions de cotation de quelques barres en cours de séance ;
+#   - symboles suspendus toute la séance (aucune barre, colonnes NaN dans la réponse).
+# Le cours d'ouverture suit un processus autorégressif journalier autour d'un prix de
+# base (il reste dans la fourchette 25-250 $ du screener) ; volumes en U sur la séance.
+#
+# scan() imite la réponse de TradingView (déjà filtrée par ses critères) : une ligne par
+# symbole SYN0000, SYN0001... avec cours, volume, variation, volume relatif, VWAP (prix
+# typique) et plus bas de la séance, triée par volume décroissant.
+
+import os
+import threading
+import time
+import zlib
+from collections import OrderedDict
+from functools import lru_cache
+from datetime import date, datetime, timedelta
+
+import numpy as np
+import pandas as pd
+
+from engine.bar_cache import DEFAULT_ROOT, MARKET_TZ, SESSION_OPEN, is_finished, latest_session, to_date
+from engine.providers import YAHOO_FIELDS, filter_scan, wide_frame
+
+ANCHOR = date(2015, 1, 2)   # origine du processus des cours d'ouverture
+BARS_PER_SESSION = 78
+LEVEL_MEMORY = 250          # séances prises en compte dans le cours d'ouverture
+LEVEL_PERSISTENCE = 0.98
+GAP_RATE = 0.01             # barres absentes
+ZERO_VOLUME_RATE = 0.01     # barres à volume nul
+HALT_RATE = 0.03            # séances avec une suspension de 3 à 12 barres
+HALTED_RATE = 0.01          # séances sans aucune barre
+SESSION_CACHE = 8192        # séances gardées en mémoire (LRU)
+TV_FIELDS = ["name", "close", "volume", "change", "relative_volume_10d_calc", "VWAP", "low"]
+
+
+def symbol_key(symbol):
+    return zlib.crc32(symbol.encode())
+
+
+@lru_cache(maxsize=64)
+def session_index(day):
+    # Horodatages des BARS_PER_SESSION barres d'une séance complète, partagés par tous les symboles
+    return pd.date_range(datetime.combine(day, SESSION_OPEN), periods=BARS_PER_SESSION, freq="5min",
+                         tz=MARKET_TZ, name="Datetime")
+
+
+def previous_session(day):
+    day -= timedelta(days=1)
+    while day.weekday() >= 5:
+        day -= timedelta(days=1)
+    return day
+
+
+class SyntheticProvider:
+    name = "synthetic"
+
+    def __init__(self, tickers=500, seed=0, today=None, latency=0.0):
+        # tickers : taille de l'univers de scan() ; today : séance de intraday (None : la
+        # dernière séance ouverte, tronquée à l'heure courante) ; latency : secondes
+        # ajoutées à chaque requête pour simuler le réseau
+        self.symbols = [f"SYN{i:04d}" for i in range(tickers)]
+        self.seed = seed
+        self.today = to_date(today) if today is not None else None
+        self.latency = latency
+        self.cache_root = os.path.join(os.path.dirname(DEFAULT_ROOT), f"synthetic-{seed}")
+        self._sessions = OrderedDict()
+        self._lock = threading.Lock()
+
+    # ========================
+    # Génération
+    # ========================
+    def _profile(self, key):
+        # (prix de base, volatilité journalière, volume moyen par séance) du symbole
+        rng = np.random.default_rng([self.seed, key])
+        return np.exp(rng.uniform(np.log(40), np.log(160))), rng.uniform(0.01, 0.03), np.exp(rng.uniform(np.log(2e6), np.log(4e7)))
+
+    def _open_level(self, key, day, base, daily_vol):
+        # Moyenne pondérée (poids LEVEL_PERSISTENCE^k) des chocs des LEVEL_MEMORY dernières séances
+        n = (day - ANCHOR).days + 1
+        shocks = np.random.default_rng([self.seed, key, 1]).normal(0.0, daily_vol, max(n, 1))[-LEVEL_MEMORY:]
+        weights = LEVEL_PERSISTENCE ** np.arange(len(shocks))[::-1]
+        return base * np.exp(float(weights @ shocks))
+
+    def session(self, symbol, day):
+        # Barres 5m d'une séance (colonnes YAHOO_FIELDS) ; None si le symbole n'a pas coté
+        key = (symbol, day)
+        with self._lock:
+            if key in self._sessions:
+                self._sessions.move_to_end(key)
+                return self._sessions[key]
+        frame = self._generate(symbol, day)
+        with self._lock:
+            self._sessions[key] = frame
+            if len(self._sessions) > SESSION_CACHE:
+                self._sessions.popitem(last=False)
+        return frame
+
+    def _generate(self, symbol, day):
+        if day.weekday() >= 5:
+            return None
+        key = symbol_key(symbol)
+        base, daily_vol, avg_volume = self._profile(key)
+        rng = np.random.default_rng([self.seed, key, day.toordinal()])
+        if rng.random() < HALTED_RATE:
+            return None
+
+        n = BARS_PER_SESSION
+        bar_vol = daily_vol / np.sqrt(n) * 1.2
+        first = self._open_level(key, day, base, daily_vol)
+        close = first * np.exp(np.cumsum(rng.normal(rng.normal(0.002, daily_vol) / n, bar_vol, n)))
+        open_ = np.r_[first, close[:-1]]
+        high = np.maximum(open_, close) * (1 + np.abs(rng.normal(0, bar_vol / 2, n)))
+        low = np.minimum(open_, close) * (1 - np.abs(rng.normal(0, bar_vol / 2, n)))
+        # Volume en U : plus fort à l'ouverture et à la clôture ; actions "en mouvement"
+        # (volume relatif moyen vers 1.5 comme après le filtre TradingView)
+        t = np.linspace(-1, 1, n)
+        shape = (1 + 1.5 * t ** 2) * rng.lognormal(0, 0.4, n)
+        volume = np.round(avg_volume * np.exp(rng.normal(0.4, 0.3)) * shape / shape.sum())
+
+        # Volume nul : cours figé à la clôture précédente
+        still = rng.random(n) < ZERO_VOLUME_RATE
+        still[0] = False
+        for j in np.flatnonzero(still):
+            open_[j] = high[j] = low[j] = close[j] = close[j - 1]
+        volume[still] = 0
+
+        keep = rng.random(n) >= GAP_RATE
+        if rng.random() < HALT_RATE:
+            start = rng.integers(6, n - 12)
+            keep[start:start + rng.integers(3, 13)] = False
+
+        prices = np.round(np.column_stack([open_, high, low, close, close]), 2)
+        values = np.column_stack([prices, volume])[keep]
+        return pd.DataFrame(values, index=session_index(day)[keep], columns=YAHOO_FIELDS)
+
+    # ========================
+    # Requêtes (interface des fournisseurs)
+    # ========================
+    def latest_session(self):
+        return self.today if self.today is not None else latest_session()
+
+    def _cutoff(self, day):
+        # Séance en cours (horloge réelle, today non fixé) : barres déjà terminées seulement
+        if self.today is not None or is_finished(day):
+            return None
+        return pd.Timestamp.now(tz=MARKET_TZ) - pd.Timedelta(minutes=5)
+
+    def _wide(self, symbols, days, start=None):
+        # Format yf.download(group_by='ticker') ; symbols sans barre : colonnes NaN
+        time.sleep(self.latency)
+        cutoff = self._cutoff(days[-1]) if days else None
+        frames = {}
+        for symbol in symbols:
+            sessions = [self.session(symbol, day) for day in days]
+            sessions = [s for s in sessions if s is not None and len(s)]
+            if not sessions:
+                continue
+            frame = pd.concat(sessions) if len(sessions) > 1 else sessions[0]
+            if cutoff is not None:
+                frame = frame[frame.index <= cutoff]
+            if start is not None:
+                frame = frame[frame.index >= start]
+            frames[symbol] = frame
+        return wide_frame(frames, symbols)
+
+    def intraday(self, symbols):
+        return self._wide(symbols, [self.latest_session()])
+
+    def since(self, symbols, start):
+        start = pd.Timestamp(start)
+        start = start.tz_localize(MARKET_TZ) if start.tz is None else start.tz_convert(MARKET_TZ)
+        days = [d.date() for d in pd.bdate_range(start.date(), self.latest_session())]
+        return self._wide(symbols, days, start)
+
+    def history(self, symbols, start, end, interval="5m"):
+        if interval != "5m":
+            raise ValueError(f"Intervalle {interval} non disponible (barres synthétiques 5m)")
+        days = [d.date() for d in pd.bdate_range(to_date(start), to_date(end) - timedelta(days=1))]
+        return self._wide(symbols, days)
+
+    def scan(self, columns=TV_FIELDS, limit=None, criteria=None):
+        time.sleep(self.latency)
+        day = self.latest_session()
+        cutoff = self._cutoff(day)
+        rows = []
+        for symbol in self.symbols:
+            shown = day
+            session = self.session(symbol, day)
+            if session is not None and cutoff is not None:
+                session = session[session.index <= cutoff]
+            if session is None or session.empty:
+                # Suspendu : TradingView garde les données de la séance précédente
+                shown = previous_session(day)
+                session = self.session(symbol, shown)
+                if session is None or session.empty:
+                    continue
+            before = self.session(symbol, previous_session(shown))
+            _, high, low, close, _, volume = session.to_numpy().T
+            prev_close = before["Close"].iat[-1] if before is not None and len(before) else session["Open"].iat[0]
+            total = volume.sum()
+            typical = (high + low + close) / 3
+            key = symbol_key(symbol)
+            rows.append({
+                "ticker": f"{'NASDAQ' if key % 2 else 'NYSE'}:{symbol}",
+                "name": symbol,
+                "close": close[-1],
+                "volume": int(total),
+                "change": (close[-1] / prev_close - 1) * 100,
+                "relative_volume_10d_calc": total / self._profile(key)[2],
+                "VWAP": typical @ volume / total if total > 0 else close[-1],
+                "low": low.min(),
+            })
+        df = pd.DataFrame(rows, columns=["ticker"] + TV_FIELDS)
+        if criteria is not None:
+            df = filter_scan(df, criteria)
+        # Comme TradingView : tri par volume puis `limit` premières lignes
+        df = df.sort_values("volume", ascending=False, kind="stable").iloc[:limit].reset_index(drop=True)
+        return df[["ticker"] + [c for c in columns if c != "ticker"]]
@@ -0,0 +1,141 @@
+# Unités de temps supérieures (15m, 30m, jour) dérivées des barres 5m, et Real Relative
+# Strength (RRS) contre SPY comme l'indicateur TradingView (ressources/indicator pinescript.txt)
+#
+#   calcPowerIndex = (close - close[pc_len]) / ta.atr(atr_len), sur les barres de l'unité
+#   RRS = power index du ticker - power index de SPY, sur la même unité
+#
+# Aucune barre supplémentaire n'est téléchargée : les barres 15m / 30m / jour sont
+# regroupées à partir des barres 5m du cache (paquets alignés sur l'ouverture 9h30, la
+# séance entière pour le jour), pour tous les tickers d'un panel à la fois.
+#
+# Pas de lookahead : à chaque barre 5m, la barre de l'unité supérieure est celle en
+# formation (plus haut / plus bas depuis son ouverture, clôture courante), comme
+# request.security en temps réel ; les barres précédentes sont complètes. À la dernière
+# barre 5m d'un paquet, la valeur est celle de la barre complète.
+#
+# Le power index est mis en cache par DataFrame (INDICATOR_CACHE) : celui de SPY n'est
+# calculé qu'une fois par run, puis aligné sur l'index de chaque ticker ou panel.
+
+import numpy as np
+import pandas as pd
+
+from engine.bar_cache import MARKET_TZ
+from engine.indicator_cache import INDICATOR_CACHE
+from engine.vwap import NS_PER_DAY
+
+BENCHMARK = "SPY"
+# Minutes par barre ; None : séance entière
+TIMEFRAMES = {"5m": 5, "15m": 15, "30m": 30, "1D": None}
+NS_PER_MINUTE = 60 * 10**9
+SESSION_OPEN_MINUTES = 9 * 60 + 30
+
+
+def bucket_ids(index, minutes):
+    # Numéro de la barre de l'unité supérieure de chaque barre 5m (croissant)
+    index = pd.DatetimeIndex(index)
+    if index.tz is not None:
+        index = index.tz_convert(MARKET_TZ).tz_localize(None)
+    local = index.as_unit("ns").asi8
+    days = local // NS_PER_DAY
+    if minutes is None:
+        return days
+    minute = (local % NS_PER_DAY) // NS_PER_MINUTE - SESSION_OPEN_MINUTES
+    return days * (24 * 60) + minute // minutes
+
+
+def _wilder(tr, length):
+    # ta.rma par colonne : moyenne simple des `length` premières valeurs, puis
+    # alpha * x + (1 - alpha) * précédent. NaN avant la première barre d'un ticker.
+    # Renvoie aussi la somme et le nombre de valeurs d'amorçage après chaque ligne.
+    # Amorçage par cumsum (sommes dans le même ordre que la boucle barre par barre), puis
+    # ewm(adjust=False) à partir de la moyenne simple : (1 - alpha) + alpha vaut
+    # exactement 1, le résultat est celui de la récurrence
+    ok = ~np.isnan(tr)
+    seen = np.cumsum(ok, axis=0)
+    totals = np.cumsum(np.where(ok & (seen <= length), tr, 0.0), axis=0)
+    counts = np.minimum(seen, length)
+    seeds = np.where(ok & (seen > length), tr, np.nan)
+    ready = ok & (seen == length)
+    seeds[ready] = totals[ready] / length
+    rma = pd.DataFrame(seeds).ewm(alpha=1.0 / length, adjust=False, ignore_na=True).mean().to_numpy()
+    return rma, totals, counts
+
+
+def _shifted(values, k, lag):
+    # values[k - lag] (barres complètes), NaN avant la première
+    rows = k - lag
+    out = values[np.maximum(rows, 0)]
+    out[rows < 0] = np.nan
+    return out
+
+
+def _true_range(high, low, prev_close):
+    # ta.tr(true) : plus haut - plus bas quand la clôture précédente manque
+    return np.fmax(np.fmax(high - low, np.abs(high - prev_close)), np.abs(low - prev_close))
+
+
+def power_index_values(high, low, close, buckets, pc_len, atr_len):
+    # Tableaux barres × tickers (NaN là où un ticker n'a pas de barre). Power index de
+    # l'unité `buckets` (bucket_ids) évalué à chaque barre 5m
+    listed = ~np.isnan(close)
+    # Barre manquante : dernière valeur connue (n'étend pas le plus haut / plus bas)
+    high, low, close = (pd.DataFrame(a).ffill().to_numpy() for a in (high, low, close))
+    new = np.r_[True, buckets[1:] != buckets[:-1]]
+    k = np.cumsum(new) - 1                      # barre de l'unité supérieure de chaque ligne
+    last = np.r_[new[1:], True]                 # dernière ligne de chaque barre
+    if new.all():
+        dev_high, dev_low = high, low
+    else:
+        dev_high = pd.DataFrame(high).groupby(k).cummax().to_numpy()
+        dev_low = pd.DataFrame(low).groupby(k).cummin().to_numpy()
+
+    # Barres complètes et leur ATR (Wilder)
+    full_close = close[last]
+    prev_full_close = _shifted(full_close, np.arange(len(full_close)), 1)
+    tr_full = _true_range(dev_high[last], dev_low[last], prev_full_close)
+    rma, totals, counts = _wilder(tr_full, atr_len)
+
+    # Barre en formation : état de l'ATR à la barre complète précédente + son true range
+    tr_dev = _true_range(dev_high, dev_low, _shifted(full_close, k, 1))
+    prev_rma = _shifted(rma, k, 1)
+    prev_total = np.where((k >= 1)[:, None], totals[np.maximum(k - 1, 0)], 0.0)
+    prev_count = np.where((k >= 1)[:, None], counts[np.maximum(k - 1, 0)], 0)
+    alpha = 1.0 / atr_len
+    with np.errstate(invalid="ignore"):
+        atr_dev = np.where(
+            ~np.isnan(prev_rma), alpha * tr_dev + (1 - alpha) * prev_rma,
+            np.where(prev_count == atr_len - 1, (prev_total + tr_dev) / atr_len, np.nan))
+    pc = close - _shifted(full_close, k, pc_len)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        index = pc / atr_dev
+    index[~listed] = np.nan
+    return index
+
+
+def power_index(df, timeframe, pc_len, atr_len):
+    # Série (un ticker) ou DataFrame barres × tickers (panel), comme df["close"]
+    def compute():
+        close = df["close"]
+        values = power_index_values(
+            *[np.asarray(df[f], dtype=np.float64).reshape(len(df), -1) for f in ("high", "low", "close")],
+            bucket_ids(df.index, TIMEFRAMES[timeframe]), pc_len, atr_len)
+        if isinstance(close, pd.DataFrame):
+            return pd.DataFrame(values, index=close.index, columns=close.columns)
+        return pd.Series(values[:, 0], index=close.index, name=close.name)
+    return INDICATOR_CACHE.get(df, "power_index", (timeframe, pc_len, atr_len), compute)
+
+
+def relative_strength(df, benchmark, timeframe, pc_len, atr_len):
+    # RRS du ticker (ou de chaque colonne du panel) contre le benchmark sur l'unité
+    # `timeframe`. Le power index du benchmark est aligné sur l'index de df : une barre
+    # absente chez le benchmark reprend sa dernière valeur connue
+    reference = power_index(benchmark, timeframe, pc_len, atr_len).reindex(df.index, method="ffill")
+    stock = power_index(df, timeframe, pc_len, atr_len)
+    if isinstance(stock, pd.DataFrame):
+        return stock.sub(reference.to_numpy(), axis=0)
+    return stock - reference.to_numpy()
+
+
+def crossover(series, level=0.0):
+    # ta.crossover(series, level)
+    return (series > level) & (series.shift(1) <= level)
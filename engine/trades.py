@@ -0,0 +1,121 @@
+# Machine à états des positions LONG sur tableaux NumPy
+#
+# Même logique que la boucle historique de build_trade_log (entrée sur signal, stop ATR
+# suiveur, profit target en % et en $, sortie sur signal), mais en une seule passe sur des
+# tableaux bruts, un ou plusieurs tickers à la fois. Si numba est installé, la passe est
+# compilée.
+
+import numpy as np
+import pandas as pd
+
+try:
+    from numba import njit
+except ImportError:
+    njit = None
+
+TRADE_COLUMNS = ["ticker", "entry_time", "entry_price", "exit_time", "exit_price", "pnl_%", "duration"]
+
+
+def _scan(close, stop_candidate, entry, exit_, profit_pct, profit_amount, enable_profit_target):
+    # Tableaux (tickers × barres) : une ligne par ticker, une barre sans cours (NaN) est
+    # absente pour ce ticker. Renvoie (ticker, barre d'entrée, barre de sortie) par trade.
+    m = len(close)
+    n = len(close[0]) if m else 0
+    columns = np.empty(m * (n // 2 + 1), dtype=np.int64)
+    entries = np.empty(m * (n // 2 + 1), dtype=np.int64)
+    exits = np.empty(m * (n // 2 + 1), dtype=np.int64)
+    count = 0
+    for j in range(m):
+        col_close = close[j]
+        col_stop = stop_candidate[j]
+        col_entry = entry[j]
+        col_exit = exit_[j]
+        in_pos = False
+        entry_idx = 0
+        entry_price = 0.0
+        atr_stop = 0.0
+        for i in range(n):
+            price = col_close[i]
+            if price != price:
+                continue
+            if not in_pos:
+                if col_entry[i]:
+                    in_pos = True
+                    entry_idx = i
+                    entry_price = price
+                    atr_stop = col_stop[i]
+            else:
+                # max(atr_stop, candidat) : un stop NaN reste NaN, un candidat NaN est ignoré
+                if col_stop[i] > atr_stop:
+                    atr_stop = col_stop[i]
+                reached_profit_pct = False
+                reached_profit_amount = False
+                if enable_profit_target:
+                    reached_profit_pct = (price / entry_price - 1.0) * 100.0 >= profit_pct
+                    reached_profit_amount = (price - entry_price) >= profit_amount
+                if col_exit[i] or price < atr_stop or reached_profit_pct or reached_profit_amount:
+                    columns[count] = j
+                    entries[count] = entry_idx
+                    exits[count] = i
+                    count += 1
+                    in_pos = False
+    return columns[:count], entries[:count], exits[:count]
+
+
+_scan_compiled = njit(cache=True)(_scan) if njit is not None else None
+
+
+def scan_panel(close, atr, entry, exit_, profit_pct, profit_amount, atr_mult, enable_profit_target):
+    # Tableaux (barres × tickers) : toute la machine à états en un seul appel.
+    # Renvoie les indices (colonne, barre d'entrée, barre de sortie) de chaque trade clôturé.
+    close = np.asarray(close, dtype=np.float64)
+    stop_candidate = np.ascontiguousarray((close - atr_mult * np.asarray(atr, dtype=np.float64)).T)
+    close = np.ascontiguousarray(close.T)
+    entry = np.ascontiguousarray(np.asarray(entry, dtype=np.bool_).T)
+    exit_ = np.ascontiguousarray(np.asarray(exit_, dtype=np.bool_).T)
+    args = (float(profit_pct), float(profit_amount), bool(enable_profit_target))
+    if _scan_compiled is not None:
+        return _scan_compiled(close, stop_candidate, entry, exit_, *args)
+    # Sans compilateur : listes Python, bien plus rapides à indexer que des scalaires NumPy
+    return _scan(close.tolist(), stop_candidate.tolist(), entry.tolist(), exit_.tolist(), *args)
+
+
+def scan_trades(close, atr, entry, exit_, profit_pct, profit_amount, atr_mult, enable_profit_target):
+    # Renvoie les indices de barre (entrée, sortie) de chaque trade clôturé
+    _, entries, exits = scan_panel(
+        np.reshape(close, (-1, 1)), np.reshape(atr, (-1, 1)),
+        np.reshape(entry, (-1, 1)), np.reshape(exit_, (-1, 1)),
+        profit_pct, profit_amount, atr_mult, enable_profit_target)
+    return entries, exits
+
+
+def trades_frame(index, close, entries, exits, ticker):
+    if len(entries) == 0:
+        return pd.DataFrame(columns=TRADE_COLUMNS)
+    entry_time = index[entries]
+    exit_time = index[exits]
+    entry_price = close[entries]
+    exit_price = close[exits]
+    return pd.DataFrame({
+        "ticker": ticker,
+        "entry_time": entry_time,
+        "entry_price": entry_price,
+        "exit_time": exit_time,
+        "exit_price": exit_price,
+        "pnl_%": (exit_price / entry_price - 1.0) * 100.0,
+        "duration": exit_time - entry_time,
+    })
+
+
+def trades_from_signals(
+    df, long_entry, long_exit, atr_values, ticker,
+    profit_pct, profit_amount,
+    nATRMultip,
+    enable_profit_target
+):
+    close = df["close"].to_numpy(dtype=np.float64)
+    entries, exits = scan_trades(
+        close, atr_values, long_entry, long_exit,
+        profit_pct, profit_amount, nATRMultip, enable_profit_target
+    )
+    return trades_frame(df.index, close, entries, exits, ticker)
@@ -0,0 +1,156 @@
+# VWAP de séance, commun au screener et à la stratégie
+#
+# VWAP = cumul(close × volume) / cumul(volume) depuis l'ouverture : les sommes repartent
+# de zéro à chaque nouvelle séance (date à New York de l'horodatage). Le calcul porte
+# sur des tableaux NumPy, une barre par ligne et un symbole par colonne : une somme
+# cumulée par séance, toutes colonnes à la fois. Une barre sans close ou sans volume
+# (symbole absent à cet horodatage) est ignorée, son VWAP vaut NaN.
+#
+# Calcul incrémental : session_sums / session_vwap reprennent l'état renvoyé par l'appel
+# précédent (séance et sommes par colonne). Les additions sont les mêmes, dans le même
+# ordre, qu'un recalcul sur tout l'historique : le résultat est identique au bit près.
+# Vwap est la version barre par barre d'un symbole (engine/streaming.py).
+#
+# Avec numba, les grands panels sont calculés en une seule passe sur les barres ; sinon
+# par sommes cumulées NumPy (une par séance), avec exactement les mêmes additions.
+
+import math
+
+import numpy as np
+import pandas as pd
+
+from engine.bar_cache import MARKET_TZ
+
+try:
+    from numba import njit
+except ImportError:
+    njit = None
+
+NS_PER_DAY = 86_400 * 10**9
+# En dessous (lots du screener), le chargement du noyau numba coûte plus que le calcul
+COMPILED_MIN_CELLS = 100_000
+
+
+def session_days(index):
+    # Numéro de jour (date à New York) de chaque horodatage ; index sans fuseau = heure locale
+    index = pd.DatetimeIndex(index)
+    if index.tz is not None:
+        index = index.tz_convert(MARKET_TZ).tz_localize(None)
+    return index.as_unit("ns").asi8 // NS_PER_DAY
+
+
+def _accumulate(close, volume, starts, seed_pv, seed_volume, cum_pv, cum_volume, valid):
+    # Une passe par colonne (compilée par numba) : sommes remises à zéro à chaque début de séance
+    n, m = close.shape
+    for j in range(m):
+        pv = seed_pv[j]
+        vol = seed_volume[j]
+        for i in range(n):
+            if starts[i]:
+                pv = 0.0
+                vol = 0.0
+            c = close[i, j]
+            v = volume[i, j]
+            ok = c == c and v == v
+            if ok:
+                pv += c * v
+                vol += v
+            valid[i, j] = ok
+            cum_pv[i, j] = pv
+            cum_volume[i, j] = vol
+
+
+def _accumulate_numpy(close, volume, starts, seed_pv, seed_volume, cum_pv, cum_volume, valid):
+    # Sans numba : une somme cumulée NumPy par séance, toutes colonnes à la fois
+    valid[:] = ~(np.isnan(close) | np.isnan(volume))
+    price_volume = np.where(valid, close * volume, 0.0)
+    volume = np.where(valid, volume, 0.0)
+    bounds = np.r_[np.flatnonzero(starts), len(starts)]
+    if bounds[0] != 0:
+        # Suite de la séance précédente : on repart des sommes de l'état
+        price_volume[0] += seed_pv
+        volume[0] += seed_volume
+        bounds = np.r_[0, bounds]
+    for a, b in zip(bounds[:-1], bounds[1:]):
+        np.cumsum(price_volume[a:b], axis=0, out=cum_pv[a:b])
+        np.cumsum(volume[a:b], axis=0, out=cum_volume[a:b])
+
+
+_accumulate_compiled = njit(cache=True)(_accumulate) if njit is not None else None
+
+
+def session_sums(close, volume, days, state=None):
+    # close, volume : (barres,) ou (barres, colonnes) ; days : jour de chaque barre (croissant).
+    # state : (jour, somme close × volume, somme volume) par colonne après les barres
+    # précédentes, ou None. Renvoie les sommes cumulées de la séance à chaque barre et
+    # le masque des barres prises en compte.
+    close = np.asarray(close, dtype=np.float64)
+    volume = np.asarray(volume, dtype=np.float64)
+    days = np.asarray(days)
+    shape = close.shape
+    # Nombre de colonnes explicite : reshape(0, -1) échoue sur un historique vide
+    columns = int(np.prod(shape[1:]))
+    close2 = close.reshape(len(close), columns)
+    volume2 = volume.reshape(len(volume), columns)
+    m = close2.shape[1]
+
+    starts = np.ones(len(days), dtype=np.bool_)
+    starts[1:] = days[1:] != days[:-1]
+    seed_pv = np.zeros(m)
+    seed_volume = np.zeros(m)
+    if state is not None and len(days):
+        # Suite de la séance en cours pour les colonnes dont l'état est du même jour
+        day, pv0, volume0 = (np.broadcast_to(np.asarray(x), (m,)) for x in state)
+        same = day == days[0]
+        seed_pv = np.where(same, pv0, 0.0)
+        seed_volume = np.where(same, volume0, 0.0)
+        starts[0] = False
+
+    cum_pv = np.empty_like(close2)
+    cum_volume = np.empty_like(close2)
+    valid = np.empty(close2.shape, dtype=np.bool_)
+    accumulate = _accumulate_numpy
+    if _accumulate_compiled is not None and close2.size >= COMPILED_MIN_CELLS:
+        accumulate = _accumulate_compiled
+    accumulate(close2, volume2, starts, seed_pv, seed_volume, cum_pv, cum_volume, valid)
+    return cum_pv.reshape(shape), cum_volume.reshape(shape), valid.reshape(shape)
+
+
+def session_vwap(close, volume, days, state=None):
+    # Renvoie (vwap à chaque barre, état à passer à l'appel suivant)
+    cum_pv, cum_volume, valid = session_sums(close, volume, days, state)
+    if len(valid) == 0:
+        return cum_pv, state
+    with np.errstate(divide="ignore", invalid="ignore"):
+        vwap = np.where(valid, cum_pv / cum_volume, np.nan)
+    return vwap, (np.full(cum_pv.shape[1:], days[-1]), cum_pv[-1], cum_volume[-1])
+
+
+def vwap_series(close, volume):
+    # session_vwap sur des Series (un ticker) ou DataFrame (panel) pandas à index horaire
+    values, _ = session_vwap(close.to_numpy(dtype=np.float64), volume.to_numpy(dtype=np.float64),
+                             session_days(close.index))
+    if values.ndim == 1:
+        return pd.Series(values, index=close.index)
+    return pd.DataFrame(values, index=close.index, columns=close.columns)
+
+
+class Vwap:
+    # Barre par barre pour un symbole : mêmes additions que session_vwap
+    def __init__(self):
+        self.day = None
+        self.price_volume = 0.0
+        self.volume = 0.0
+
+    def update(self, close, volume, day):
+        if day != self.day:
+            self.day = day
+            self.price_volume = 0.0
+            self.volume = 0.0
+        if close != close or volume != volume:
+            return math.nan
+        self.price_volume += close * volume
+        self.volume += volume
+        if self.volume != 0:
+            return self.price_volume / self.volume
+        return math.nan if self.price_volume == 0 else math.copysign(math.inf, self.price_volume)
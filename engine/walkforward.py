@@ -0,0 +1,284 @@
+# Évaluation walk-forward (hors échantillon) de la stratégie LONG
+#
+#   python -m engine.walkforward walkforward.json --out walkforward/run1 [--workers 8]
+#
+# walkforward.json : même format que engine.sweep, plus la découpe en fenêtres
+# {
+#   "tickers": ["AAPL", "MSFT"], "start": "2024-04-01", "end": "2024-05-30",
+#   "base": {"profit_pct": 1.0},
+#   "grid": {"nATRMultip": [1.0, 1.5, 2.0], "keybar_atr_mult": [0.75, 1.0, 1.5]},
+#   "rank_by": "total_pnl_$",
+#   "train_days": 10, "test_days": 2, "anchored": false
+# }
+#
+# Les séances sont découpées en fenêtres successives : entraînement sur train_days
+# séances, test sur les test_days suivantes, puis décalage de test_days (les périodes de
+# test se suivent sans se chevaucher). Sur chaque fenêtre, la combinaison de la grille la
+# mieux classée (rank_by) sur l'entraînement est évaluée sur le test. anchored :
+# l'entraînement part toujours de la première séance (fenêtre croissante).
+#
+# Les signaux sont calculés une fois par ticker et par jeu de paramètres de signaux sur
+# tout l'historique, en mode causal (une barre ne voit que les barres précédentes, voir
+# compute_signals), puis découpés pour chaque fenêtre : les fenêtres qui se chevauchent
+# partagent indicateurs et signaux au lieu de les recalculer, et les barres qui précèdent
+# une fenêtre servent au préchauffage des indicateurs. Les positions démarrent à plat à
+# l'ouverture de chaque période ; une position encore ouverte à la fin est ignorée,
+# comme dans le backtest.
+#
+# Résultats : <out>/windows.jsonl (une ligne par fenêtre : dates, paramètres retenus,
+# métriques d'entraînement et de test) et <out>/summary.json (métriques de l'ensemble des
+# périodes de test, capital enchaîné d'une fenêtre à l'autre).
+
+import argparse
+import json
+import os
+import time
+from collections import OrderedDict
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+import numpy as np
+import pandas as pd
+
+from engine import trades
+from engine.backtest import ACCOUNT_PARAMS, DEFAULT_PARAMS, SIGNAL_PARAMS, combine_equity, compute_metrics, load_benchmark
+from engine.providers import provider_bar_cache
+from engine.equity import equity_curve
+from engine.indicators import atr
+from engine.signals import compute_signals
+from engine.sweep import SIGNAL_CACHE_SIZE, _freeze, expand_grid
+from engine.vwap import session_days
+
+
+# ========================
+# Fenêtres
+# ========================
+def session_windows(sessions, train_days, test_days, anchored=False):
+    # sessions : numéros de séance croissants (engine.vwap.session_days).
+    # Chaque fenêtre : (numéro, (début, fin) d'entraînement, (début, fin) de test), fins exclues
+    sessions = np.asarray(sessions)
+    windows = []
+    first = 0
+    while first + train_days + test_days <= len(sessions):
+        train_start = 0 if anchored else first
+        split = first + train_days
+        stop = split + test_days
+        bounds = [sessions[i] if i < len(sessions) else sessions[-1] + 1 for i in (train_start, split, stop)]
+        windows.append((len(windows), (int(bounds[0]), int(bounds[1])), (int(bounds[1]), int(bounds[2]))))
+        first += test_days
+    if not windows:
+        raise ValueError(f"{len(sessions)} séances : au moins train_days + test_days = "
+                         f"{train_days + test_days} nécessaires")
+    return windows
+
+
+def day_label(day):
+    return pd.Timestamp(int(day), unit="D").date().isoformat()
+
+
+def last_session(sessions, stop):
+    # Dernière séance contenue avant la fin (exclue) d'une période : stop - 1 peut tomber
+    # un week-end ou un jour férié
+    return sessions[np.searchsorted(sessions, stop) - 1]
+
+
+# ========================
+# Évaluation (processus de travail)
+# ========================
+_bars = {}
+_days = {}
+_sessions = np.array([], dtype=np.int64)   # séances de l'ensemble des tickers
+_base = {}
+_combos = []
+_cache = OrderedDict()
+_benchmark = None   # barres 5m de SPY pour les RRS réelles
+
+
+def _init_worker(bars, base, combos, benchmark=None):
+    # Remplace l'état hérité : un processus créé par fork a déjà les globales du parent
+    global _benchmark, _sessions
+    _benchmark = benchmark
+    _bars.clear()
+    _bars.update(bars)
+    _days.clear()
+    _days.update({ticker: session_days(df.index) for ticker, df in bars.items()})
+    _sessions = np.unique(np.concatenate([_sessions[:0], *_days.values()]))
+    _base.clear()
+    _base.update(base)
+    _combos[:] = combos
+    _cache.clear()
+
+
+def _signals(ticker, params):
+    # Signaux causaux de tout l'historique, partagés par toutes les fenêtres (LRU)
+    signal_args = [params[k] for k in SIGNAL_PARAMS]
+    key = (ticker, tuple(_freeze(v) for v in signal_args))
+    if key in _cache:
+        _cache.move_to_end(key)
+        return _cache[key]
+    df = _bars[ticker]
+    value = tuple(s.to_numpy(dtype=bool) for s in compute_signals(df, *signal_args, causal=True, benchmark=_benchmark))
+    _cache[key] = value
+    if len(_cache) > SIGNAL_CACHE_SIZE:
+        _cache.popitem(last=False)
+    return value
+
+
+def evaluate_period(params, first_day, stop_day):
+    # Backtest des séances [first_day, stop_day) de tous les tickers, positions à plat au départ.
+    # Renvoie (métriques agrégées, trades, P&L combiné des tickers barre par barre)
+    account = [params[k] for k in ACCOUNT_PARAMS]
+    trade_frames = []
+    pnl = []
+    for ticker, df in _bars.items():
+        a, b = np.searchsorted(_days[ticker], [first_day, stop_day])
+        if b - a == 0:
+            continue
+        long_entry, long_exit = _signals(ticker, params)
+        close = df["close"].to_numpy(dtype=np.float64)
+        atr_values = atr(df, params["nATRPeriod"]).to_numpy()
+        entries, exits = trades.scan_trades(
+            close[a:b], atr_values[a:b], long_entry[a:b], long_exit[a:b],
+            params["profit_pct"], params["profit_amount"], params["nATRMultip"], params["enable_profit_target"])
+        trades_df = trades.trades_frame(df.index[a:b], close[a:b], entries, exits, ticker)
+        if trades_df.empty:
+            continue
+        trade_frames.append(trades_df)
+        pnl.append(equity_curve(df.iloc[a:b], trades_df, *account) - params["initial_capital"])
+
+    if not trade_frames:
+        return compute_metrics(pd.DataFrame(), None, *account), None, None
+    all_trades = pd.concat(trade_frames, ignore_index=True)
+    combined = combine_equity(pnl, 0.0)
+    # Un sous-compte de initial_capital par ticker : total_pnl_% rapporté à leur somme
+    capital = params["initial_capital"] * len(_bars)
+    return compute_metrics(all_trades, combined + capital, *account), all_trades, combined
+
+
+def _rank_value(metrics, rank_by):
+    # Sans trade, compute_metrics n'a pas les métriques en $ : résultat nul
+    value = metrics.get(rank_by, 0)
+    return -np.inf if value is None or value != value else value
+
+
+def _run_window(window, rank_by):
+    number, (train_start, train_stop), (test_start, test_stop) = window
+    best = None
+    for combo in _combos:
+        params = {**_base, **combo}
+        metrics, _, _ = evaluate_period(params, train_start, train_stop)
+        # À égalité, la première combinaison de la grille est gardée
+        if best is None or _rank_value(metrics, rank_by) > _rank_value(best[1], rank_by):
+            best = (combo, metrics)
+
+    combo, train_metrics = best
+    test_metrics, test_trades, test_pnl = evaluate_period({**_base, **combo}, test_start, test_stop)
+    record = {
+        "window": number,
+        "train_start": day_label(train_start), "train_end": day_label(last_session(_sessions, train_stop)),
+        "test_start": day_label(test_start), "test_end": day_label(last_session(_sessions, test_stop)),
+        "params": combo, "train": train_metrics, "test": test_metrics,
+    }
+    return record, test_trades, test_pnl
+
+
+def _run_windows(windows, rank_by):
+    # Fenêtres consécutives évaluées dans le même processus : elles se chevauchent et
+    # réutilisent les signaux du cache au lieu de les recalculer dans chaque processus
+    return [_run_window(window, rank_by) for window in windows]
+
+
+# ========================
+# Orchestration
+# ========================
+def aggregate(results, params, tickers):
+    # Métriques de toutes les périodes de test : trades réunis, P&L de chaque fenêtre
+    # ajouté au capital atteint à la fin de la précédente (un sous-compte par ticker)
+    account = [params[k] for k in ACCOUNT_PARAMS]
+    trade_frames = []
+    pieces = []
+    offset = 0.0
+    for _, test_trades, test_pnl in sorted(results, key=lambda r: r[0]["window"]):
+        if test_trades is None:
+            continue
+        trade_frames.append(test_trades)
+        pieces.append(test_pnl + offset)
+        offset += test_pnl.iloc[-1]
+    if not trade_frames:
+        return compute_metrics(pd.DataFrame(), None, *account)
+    equity = pd.concat(pieces) + params["initial_capital"] * tickers
+    return compute_metrics(pd.concat(trade_frames, ignore_index=True), equity, *account)
+
+
+def run_walkforward(config, out_dir=None, bars=None, workers=None, benchmark=None):
+    # bars / benchmark : barres déjà chargées ; par défaut lues dans le cache (SPY compris)
+    rank_by = config.get("rank_by", "total_pnl_$")
+    if bars is None:
+        cache = provider_bar_cache()
+        bars = cache.get_many(config["tickers"], config["start"], config["end"])
+        benchmark = load_benchmark(cache, config["start"], config["end"])
+    bars = {t: df for t, df in bars.items() if len(df) > 0}
+    sessions = np.unique(np.concatenate([session_days(df.index) for df in bars.values()]))
+    windows = session_windows(sessions, config["train_days"], config["test_days"], config.get("anchored", False))
+    combos = list(expand_grid(config.get("grid", {})))
+    base = {**DEFAULT_PARAMS, **config.get("base", {})}
+    print(f"🔁 {len(windows)} fenêtres ({config['train_days']} séances d'entraînement, {config['test_days']} de test) "
+          f"× {len(combos)} combinaisons, {len(bars)} tickers")
+
+    started = time.perf_counter()
+    results = []
+    # Une suite contiguë de fenêtres par processus (et non une fenêtre par tâche)
+    workers = min(workers or os.cpu_count() or 1, len(windows))
+    bounds = np.linspace(0, len(windows), workers + 1).astype(int)
+    runs = [windows[a:b] for a, b in zip(bounds[:-1], bounds[1:])]
+    with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker, initargs=(bars, base, combos, benchmark)) as pool:
+        futures = [pool.submit(_run_windows, run, rank_by) for run in runs]
+        for future in as_completed(futures):
+            results.extend(future.result())
+            print(f"   [{len(results)}/{len(windows)}] fenêtres ({time.perf_counter() - started:.1f} s)...", end="\r")
+
+    records = sorted((r[0] for r in results), key=lambda r: r["window"])
+    summary = {
+        "windows": len(records),
+        "profitable_windows": sum(r["test"].get("total_pnl_$", 0) > 0 for r in records),
+        "test": aggregate(results, base, len(bars)),
+    }
+    print(f"\n✅ Walk-forward terminé en {time.perf_counter() - started:.1f} s")
+
+    if out_dir is not None:
+        os.makedirs(out_dir, exist_ok=True)
+        with open(os.path.join(out_dir, "walkforward.json"), "w") as f:
+            json.dump(config, f, indent=4)
+        with open(os.path.join(out_dir, "windows.jsonl"), "w") as f:
+            for record in records:
+                f.write(json.dumps(record) + "\n")
+        with open(os.path.join(out_dir, "summary.json"), "w") as f:
+            json.dump(summary, f, indent=4)
+    return records, summary
+
+
+def print_report(records, summary, rank_by="total_pnl_$"):
+    print(f"{'fenêtre':>7}  {'entraînement':<23}  {'test':<23}  {'train ' + rank_by:>20}  {'test ' + rank_by:>19}  trades")
+    for r in records:
+        print(f"{r['window']:>7}  {r['train_start']} → {r['train_end']}  {r['test_start']} → {r['test_end']}  "
+              f"{r['train'].get(rank_by, 0):>20}  {r['test'].get(rank_by, 0):>19}  {r['test']['trades']:>6}")
+    test = summary["test"]
+    print(f"Hors échantillon : {test['trades']} trades, P&L {test.get('total_pnl_$', 0)} $ "
+          f"({test['total_pnl_%']} %), drawdown max {test['max_drawdown_%']} %, "
+          f"{summary['profitable_windows']}/{summary['windows']} fenêtres gagnantes")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Évaluation walk-forward de la stratégie LONG")
+    parser.add_argument("config", help="fichier JSON (tickers, start, end, base, grid, rank_by, train_days, test_days)")
+    parser.add_argument("--out", help="dossier des résultats (windows.jsonl, summary.json)")
+    parser.add_argument("--workers", type=int, default=None, help="processus (défaut : nombre de cœurs)")
+    args = parser.parse_args()
+
+    with open(args.config) as f:
+        config = json.load(f)
+    records, summary = run_walkforward(config, args.out, workers=args.workers)
+    print_report(records, summary, config.get("rank_by", "total_pnl_$"))
+
+
+if __name__ == "__main__":
+    main()